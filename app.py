@@ -1,4 +1,5 @@
 import streamlit as st
+from pages import chat, technical_analysis, stock_info, ai_assistant, doc_summary, document_qa
 
 st.set_page_config(
     page_title="Stock Assistant",
@@ -19,31 +20,23 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Page modules are imported once per process; each rerun only calls render()
+PAGES = {
+    "💬 Chat": chat.render,
+    "📈 Technical Analysis": technical_analysis.render,
+    "💹 Stock Information": stock_info.render,
+    "🤖 AI Assistant": ai_assistant.render,
+    "📄 Document Summary": doc_summary.render,
+    "❓ Document Q&A": document_qa.render,
+}
+
 with st.sidebar:
     st.title("📈 Stock Assistant")
     
     page = st.radio(
         "",
-        [
-            "💬 Chat",
-            "📈 Technical Analysis",
-            "💹 Stock Information", 
-            "🤖 AI Assistant",
-            "📄 Document Summary",
-            "❓ Document Q&A"
-        ],
+        list(PAGES),
         label_visibility="collapsed"
     )
 
-if page == "💬 Chat":
-    exec(open("pages/chat.py").read())
-elif page == "📈 Technical Analysis":
-    exec(open("pages/technical_analysis.py").read())
-elif page == "💹 Stock Information":
-    exec(open("pages/stock_info.py").read())
-elif page == "🤖 AI Assistant":
-    exec(open("pages/ai_assistant.py").read())
-elif page == "📄 Document Summary":
-    exec(open("pages/doc_summary.py").read())
-elif page == "❓ Document Q&A":
-    exec(open("pages/document_qa.py").read())
+PAGES[page]()
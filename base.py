@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import streamlit.components.v1 as components
 import random
+import prompts
+from memory import ConversationMemory
 
 icons = {
     "assistant": "🤖",
@@ -234,6 +236,12 @@ def init_stock_advisor():
   if 'total_cost' not in st.session_state:
       st.session_state['total_cost'] = 0.0
 
+def get_memory():
+  """Rolling memory of st.session_state.messages for this session"""
+  if 'conversation_memory' not in st.session_state:
+      st.session_state['conversation_memory'] = ConversationMemory()
+  return st.session_state['conversation_memory']
+
 def init_slidebar():
   with st.sidebar:
       st.markdown(
@@ -309,6 +317,7 @@ def clear_chat_history():
     st.session_state.show_expanders = True
     st.session_state.show_animation = True
     st.session_state.messages = [{"role": "assistant", "content": message}]
+    get_memory().reset()
     st.session_state["exif_df"] = pd.DataFrame()
     st.session_state["url_exif_df"] = pd.DataFrame()
     st.cache_data.clear()
@@ -319,6 +328,7 @@ def clear_stock_advisor():
     st.session_state['generated'] = []
     st.session_state['past'] = []
     st.session_state.messages = [{"role": "assistant", "content": message}]
+    get_memory().reset()
     st.session_state['number_tokens'] = []
     st.session_state['model_name'] = []
     st.session_state['cost'] = []
@@ -331,9 +341,9 @@ def show_video(video_url):
 
 
 def get_num_tokens(prompt):
+    # Kept for existing callers; prompts.count_tokens is the cached token estimate
     try:
-        # Simple token estimation: roughly 4 characters per token
-        return len(prompt) // 4
+        return prompts.count_tokens(prompt)
     except Exception:
         return 0
 
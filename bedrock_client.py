@@ -0,0 +1,50 @@
+import os
+import threading
+import boto3
+from botocore.config import Config
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+DEFAULT_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
+
+# Connection pool settings shared by every pooled client
+MAX_POOL_CONNECTIONS = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+TCP_KEEPALIVE = os.getenv("BEDROCK_TCP_KEEPALIVE", "true").lower() in ("1", "true", "yes")
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(service_name="bedrock-runtime", region_name=None, model_id=None):
+    """Return the process-wide boto3 client for (service, region, model), creating it once"""
+    key = (service_name, region_name or DEFAULT_REGION, model_id or MODEL_ID)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        # Another thread may have created it while we waited for the lock
+        client = _clients.get(key)
+        if client is None:
+            config = Config(
+                max_pool_connections=MAX_POOL_CONNECTIONS,
+                tcp_keepalive=TCP_KEEPALIVE,
+            )
+            # boto3's default session is not thread-safe, use a private one per client
+            session = boto3.session.Session()
+            client = session.client(service_name=service_name, region_name=key[1], config=config)
+            _clients[key] = client
+    return client
+
+
+def get_bedrock_runtime(region_name=None, model_id=None):
+    """Pooled bedrock-runtime client used for model invocation"""
+    return get_client("bedrock-runtime", region_name, model_id)
+
+
+def reset_clients():
+    """Drop all pooled clients (e.g. after rotating credentials)"""
+    with _lock:
+        _clients.clear()
@@ -0,0 +1,138 @@
+"""
+Asyncio streaming for Bedrock model responses.
+
+boto3 has no async API, so each generation reads its event stream on a worker
+thread and hands text chunks to an asyncio.Queue on a shared background event
+loop. The queue is bounded, so a slow consumer pauses the reader (backpressure),
+and closing or cancelling the consumer stops the reader and closes the HTTP
+stream. `stream()` is the synchronous wrapper used by existing callers.
+"""
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import bedrock_client
+from resilience import get_upstream
+
+STREAM_BUFFER = int(os.getenv('BEDROCK_STREAM_BUFFER', '64'))
+MAX_CONCURRENT_STREAMS = int(os.getenv('BEDROCK_MAX_CONCURRENT_STREAMS', str(bedrock_client.MAX_POOL_CONNECTIONS)))
+
+_DONE = object()
+_loop = None
+_loop_lock = threading.Lock()
+_readers = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_STREAMS, thread_name_prefix='bedrock-stream')
+
+
+def get_loop():
+    """Background event loop shared by the sync wrappers, started on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='bedrock-stream-loop', daemon=True).start()
+    return _loop
+
+
+def _texts(event_stream):
+    """Text deltas from a Claude invoke_model_with_response_stream body"""
+    for event in event_stream:
+        chunk = event.get('chunk')
+        if chunk:
+            chunk_obj = json.loads(chunk.get('bytes').decode())
+            delta_obj = chunk_obj.get('delta')
+            if delta_obj and delta_obj.get('text'):
+                yield delta_obj['text']
+
+
+async def astream(body, model_id=None, max_buffer=STREAM_BUFFER):
+    """Async generator of text chunks for one generation; body is the request dict"""
+    model_id = model_id or bedrock_client.MODEL_ID
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max_buffer)
+    cancelled = threading.Event()
+
+    def put(item):
+        """Block the reader thread until the queue has room; False once the consumer is gone"""
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=0.5)
+                return True
+            except FutureTimeout:
+                if cancelled.is_set():
+                    future.cancel()
+                    return False
+
+    def read():
+        try:
+            client = bedrock_client.get_bedrock_runtime(model_id=model_id)
+            # Throttling is retried with backoff before any text is produced
+            response = get_upstream('bedrock').call(
+                client.invoke_model_with_response_stream,
+                body=json.dumps(body),
+                modelId=model_id,
+                accept="application/json",
+                contentType="application/json"
+            )
+            event_stream = response['body']
+            try:
+                for text in _texts(event_stream):
+                    if cancelled.is_set() or not put(text):
+                        return
+            finally:
+                event_stream.close()
+        except Exception as e:
+            put(e)
+            return
+        put(_DONE)
+
+    loop.run_in_executor(_readers, read)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+
+
+async def acomplete(body, model_id=None):
+    """Full text of one generation"""
+    return "".join([text async for text in astream(body, model_id)])
+
+
+def submit_many(bodies, model_id=None, max_concurrency=4):
+    """Start generations on the background loop, at most max_concurrency at a time.
+
+    Yields a concurrent.futures.Future per body as it is submitted, so a lazy
+    `bodies` (e.g. prompts for a document still being parsed) starts each
+    generation as soon as its body arrives. Synchronous callers can wait with
+    as_completed; cancelling a future cancels its generation.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def one(body):
+        async with semaphore:
+            return await acomplete(body, model_id)
+
+    loop = get_loop()
+    for body in bodies:
+        yield asyncio.run_coroutine_threadsafe(one(body), loop)
+
+
+def stream(body, model_id=None):
+    """Synchronous generator over astream(); closing it cancels the generation"""
+    loop = get_loop()
+    agen = astream(body, model_id)
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Measure the technical analysis chart payload before and after decimation.
+
+Usage:
+    python benchmarks/chart_payload_benchmark.py
+    python benchmarks/chart_payload_benchmark.py --bars 1260 23400 --repeat 3
+
+"before" is the previous behaviour: all four tabs built at full resolution with
+SVG traces. "after" builds only the selected view (the price chart, the
+heaviest one) with LTTB/min-max decimation and WebGL for long traces. Times
+cover figure construction plus JSON serialization, which is what Streamlit
+does before the browser receives anything; browser render time scales with
+the number of points drawn.
+"""
+import argparse
+import os
+import sys
+import time
+import plotly.io as pio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import charts
+import indicators
+from indicators_benchmark import synthetic_bars
+
+
+def build(df, views, max_points, webgl_threshold):
+    charts.WEBGL_THRESHOLD = webgl_threshold
+    figs = [charts.FIGURES[view](df, 'TEST', max_points) for view in views]
+    payload = sum(len(pio.to_json(fig, validate=False)) for fig in figs)
+    return figs, payload
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bars', type=int, nargs='+', default=[252, 1260, 2340, 23400])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    webgl_threshold = charts.WEBGL_THRESHOLD
+
+    print(f"{'bars':>7} {'':>7} {'points':>9} {'payload (KB)':>13} {'build+json (ms)':>16}")
+    for n in args.bars:
+        df = indicators.compute_indicators(synthetic_bars(n))
+        runs = {
+            'before': lambda: build(df, charts.VIEWS, None, float('inf')),
+            'after': lambda: build(df, charts.VIEWS[:1], charts.MAX_POINTS, webgl_threshold),
+        }
+        for label, run in runs.items():
+            elapsed, (figs, payload) = best_of(run, args.repeat)
+            points = sum(charts.points(fig) for fig in figs)
+            print(f"{n:>7,} {label:>7} {points:>9,} {payload / 1024:>13.0f} {elapsed * 1e3:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF text extraction: the old serial `content +=` loop against the
+shared extraction module (single join, process pool, page generator).
+
+Runs on each samples/*.pdf and on a synthetic report built by repeating the
+sample pages up to --pages pages.
+
+Usage:
+    EXTRACTION_MAX_WORKERS=4 python benchmarks/extraction_benchmark.py --pages 300
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from io import BytesIO
+import PyPDF2
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+import extraction
+
+
+def old_extract(data):
+    """The loop both document pages used before the extraction module"""
+    pdf_reader = PyPDF2.PdfReader(BytesIO(data))
+    content = ""
+    for page in pdf_reader.pages:
+        content += page.extract_text()
+    return content
+
+
+def synthetic_report(paths, pages):
+    writer = PyPDF2.PdfWriter()
+    readers = [PyPDF2.PdfReader(p) for p in paths]
+    source = [page for r in readers for page in r.pages]
+    for i in range(pages):
+        writer.add_page(source[i % len(source)])
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def first_page_latency(data, workers):
+    start = time.perf_counter()
+    pages = extraction.iter_pdf_pages(data, max_workers=workers)
+    next(pages)
+    latency = time.perf_counter() - start
+    pages.close()
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF extraction benchmark")
+    parser.add_argument('--pages', type=int, default=300)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join('samples', '*.pdf')))
+    docs = [(os.path.basename(p), open(p, 'rb').read()) for p in paths]
+    docs.append((f"synthetic {args.pages} pages", synthetic_report(paths, args.pages)))
+
+    # Start the pool outside the timings; it is created once per process in the app
+    extraction._get_pool().submit(int).result()
+
+    print(f"workers={extraction.MAX_WORKERS}, cpus={os.cpu_count()}")
+    print(f"{'document':<58} {'old +=':>8} {'serial':>8} {'pool':>8} {'1st page':>9}")
+    for name, data in docs:
+        old_time, old_text = timed(lambda: old_extract(data))
+        serial_time, serial_text = timed(lambda: "\n".join(extraction.iter_pdf_pages(data, max_workers=1)))
+        pool_time, pool_text = timed(lambda: "\n".join(extraction.iter_pdf_pages(data, max_workers=extraction.MAX_WORKERS)))
+        assert serial_text == pool_text and serial_text.replace("\n", "") == old_text.replace("\n", "")
+        latency = first_page_latency(data, extraction.MAX_WORKERS)
+        print(f"{name:<58} {old_time:>7.2f}s {serial_time:>7.2f}s {pool_time:>7.2f}s {latency:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
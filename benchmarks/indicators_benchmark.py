@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized indicator engine against the previous `ta`-based path.
+
+Usage:
+    python benchmarks/indicators_benchmark.py
+    python benchmarks/indicators_benchmark.py --sizes 10000 100000 --repeat 3
+
+The reported difference is relative to `ta`. On very long series the largest
+gap is in the Bollinger columns: pandas' online rolling variance (used by `ta`)
+drifts, while the engine computes each window's variance exactly.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import ta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import indicators
+
+
+def ta_reference(df):
+    """The calculate_technical_indicators implementation before the engine existed"""
+    df = df.copy()
+    df['SMA_20'] = ta.trend.sma_indicator(close=df['Close'], window=20)
+    df['SMA_50'] = ta.trend.sma_indicator(close=df['Close'], window=50)
+    df['SMA_200'] = ta.trend.sma_indicator(close=df['Close'], window=200)
+    df['EMA_12'] = ta.trend.ema_indicator(close=df['Close'], window=12)
+    df['EMA_26'] = ta.trend.ema_indicator(close=df['Close'], window=26)
+    df['EMA_50'] = ta.trend.ema_indicator(close=df['Close'], window=50)
+    bb = ta.volatility.BollingerBands(close=df['Close'], window=20, window_dev=2)
+    df['BB_Upper'] = bb.bollinger_hband()
+    df['BB_Middle'] = bb.bollinger_mavg()
+    df['BB_Lower'] = bb.bollinger_lband()
+    df['BB_Width'] = df['BB_Upper'] - df['BB_Lower']
+    df['BB_Percent'] = bb.bollinger_pband()
+    macd = ta.trend.MACD(close=df['Close'])
+    df['MACD'] = macd.macd()
+    df['MACD_Signal'] = macd.macd_signal()
+    df['MACD_Histogram'] = macd.macd_diff()
+    df['RSI'] = ta.momentum.rsi(close=df['Close'], window=14)
+    df['RSI_30'] = ta.momentum.rsi(close=df['Close'], window=30)
+    stoch = ta.momentum.StochasticOscillator(high=df['High'], low=df['Low'], close=df['Close'])
+    df['STOCH_K'] = stoch.stoch()
+    df['STOCH_D'] = stoch.stoch_signal()
+    df['WILLR'] = ta.momentum.williams_r(high=df['High'], low=df['Low'], close=df['Close'])
+    adx = ta.trend.ADXIndicator(high=df['High'], low=df['Low'], close=df['Close'])
+    df['ADX'] = adx.adx()
+    df['PLUS_DI'] = adx.adx_pos()
+    df['MINUS_DI'] = adx.adx_neg()
+    df['ATR'] = ta.volatility.average_true_range(high=df['High'], low=df['Low'], close=df['Close'])
+    df['CCI'] = ta.trend.cci(high=df['High'], low=df['Low'], close=df['Close'])
+    df['ROC'] = ta.momentum.roc(close=df['Close'], window=10)
+    df['OBV'] = ta.volume.on_balance_volume(close=df['Close'], volume=df['Volume'])
+    df['MFI'] = ta.volume.money_flow_index(high=df['High'], low=df['Low'], close=df['Close'], volume=df['Volume'])
+    df['Volume_SMA'] = ta.trend.sma_indicator(close=df['Volume'], window=20)
+    df['Pivot'] = (df['High'] + df['Low'] + df['Close']) / 3
+    df['R1'] = 2 * df['Pivot'] - df['Low']
+    df['S1'] = 2 * df['Pivot'] - df['High']
+    df['R2'] = df['Pivot'] + (df['High'] - df['Low'])
+    df['S2'] = df['Pivot'] - (df['High'] - df['Low'])
+    return df
+
+
+def synthetic_bars(n, seed=42):
+    """Random-walk daily OHLCV bars"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = np.abs(rng.normal(0, 0.01, n)) * close
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(1_000_000, 50_000_000, n).astype(float)
+    index = pd.date_range('1990-01-01', periods=n, freq='min')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+
+def best_of(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def max_rel_diff(expected, actual):
+    """Largest relative difference per column, NaN positions must match"""
+    diffs = {}
+    for col in expected.columns:
+        a = expected[col].to_numpy(dtype=float)
+        b = actual[col].to_numpy(dtype=float)
+        if not np.array_equal(np.isnan(a), np.isnan(b)):
+            diffs[col] = float('inf')
+            continue
+        mask = np.isfinite(a) & np.isfinite(b)
+        diffs[col] = float(np.max(np.abs(a[mask] - b[mask]) / np.maximum(1.0, np.abs(a[mask])))) if mask.any() else 0.0
+    return diffs
+
+
+def bench_streaming(history=10_000, updates=1_000):
+    """Time IndicatorState.update per bar and compare the streamed rows with the batch engine"""
+    df = synthetic_bars(history + updates)
+    state = indicators.IndicatorState.from_frame(df.iloc[:history])
+    start = time.perf_counter()
+    rows = [state.update(bar, ts) for ts, bar in df.iloc[history:].iterrows()]
+    elapsed = time.perf_counter() - start
+    streamed = pd.DataFrame(rows, index=df.index[history:])
+    batch = indicators.compute_indicators(df).iloc[history:][streamed.columns]
+    worst = max(max_rel_diff(batch, streamed).items(), key=lambda kv: kv[1])
+    print(f"streaming: {elapsed / updates * 1e6:.0f} us/bar after {history:,} bars, "
+          f"max rel diff vs batch {worst[1]:.1e} ({worst[0]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'bars':>10} {'ta (s)':>10} {'engine (s)':>11} {'speedup':>8} {'max rel diff':>13}")
+    for n in args.sizes:
+        df = synthetic_bars(n)
+        ta_time, expected = best_of(ta_reference, df, args.repeat)
+        engine_time, actual = best_of(indicators.compute_indicators, df, args.repeat)
+        assert list(expected.columns) == list(actual.columns), "column sets differ"
+        worst = max(max_rel_diff(expected, actual).items(), key=lambda kv: kv[1])
+        print(f"{n:>10,} {ta_time:>10.3f} {engine_time:>11.3f} {ta_time / engine_time:>7.1f}x "
+              f"{worst[1]:>9.1e} ({worst[0]})")
+    bench_streaming()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Measure the per-rerun dispatch overhead of app.py pages.
+
+Before: app.py read each page file, compiled it and executed the whole module
+(imports, helper definitions, module-level setup such as load_tickers() or the
+AI Assistant tool list) on every rerun, then ran the UI code.
+After: each page module is imported once per process and a rerun only calls
+render(). The UI code is the same in both cases, so this measures just the
+read + compile + module execution that no longer happens per rerun.
+
+Usage:
+    python benchmarks/page_dispatch_benchmark.py --repeat 50
+"""
+import argparse
+import importlib
+import io
+import logging
+import os
+import sys
+import time
+from contextlib import redirect_stderr, redirect_stdout
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.append(os.path.join(ROOT, 'scripts'))
+os.chdir(ROOT)
+
+PAGES = ['chat', 'technical_analysis', 'stock_info', 'ai_assistant', 'doc_summary', 'document_qa']
+
+
+def per_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-rerun page dispatch overhead")
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    print(f"{'page':<20} {'read+compile':>13} {'exec module':>12} {'before':>9} {'after':>9}")
+    for name in PAGES:
+        path = os.path.join('pages', f'{name}.py')
+        try:
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                module = importlib.import_module(f'pages.{name}')
+        except ImportError as e:
+            print(f"{name:<20} skipped ({e.name} not installed)")
+            continue
+
+        def read_compile():
+            with open(path, encoding='utf-8') as f:
+                return compile(f.read(), path, 'exec')
+
+        code = read_compile()
+
+        def exec_module():
+            with redirect_stdout(io.StringIO()):
+                exec(code, {'__name__': 'page_exec', '__file__': path})
+
+        pages = {name: module.render}
+        compile_ms = per_call(read_compile, args.repeat)
+        exec_ms = per_call(exec_module, args.repeat)
+        after_ms = per_call(lambda: pages[name], args.repeat)
+        print(f"{name:<20} {compile_ms:>10.2f} ms {exec_ms:>9.2f} ms {compile_ms + exec_ms:>6.2f} ms "
+              f"{after_ms:>6.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark timeframes.resample against pandas resample().agg() on 1-minute bars.
+
+Usage:
+    python benchmarks/resample_benchmark.py
+    python benchmarks/resample_benchmark.py --days 5 60 180 --repeat 5
+
+Bars cover US regular sessions only (390 per weekday), like the intraday cache.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import timeframes
+
+PANDAS_RULES = {'5m': '5min', '15m': '15min', '1h': '1h', '1d': '1D'}
+AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def session_minutes(days, seed=42):
+    """Random-walk 1-minute bars for 13:30-20:00 UTC on weekdays"""
+    sessions = pd.bdate_range('2024-01-01', periods=days)
+    index = (sessions.values[:, None] + np.timedelta64(810, 'm') + np.arange(390) * np.timedelta64(1, 'm')).ravel()
+    n = len(index)
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0005, n)))
+    open_ = close * (1 + rng.normal(0, 0.0002, n))
+    spread = np.abs(rng.normal(0, 0.0005, n)) * close
+    volume = rng.integers(100, 10_000, n).astype(float)
+    return pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) + spread,
+                         'Low': np.minimum(open_, close) - spread, 'Close': close, 'Volume': volume},
+                        index=pd.DatetimeIndex(index, name='Date'))
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, nargs='+', default=[5, 60, 180])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'days':>5} {'1m bars':>9} {'tf':>4} {'bars':>7} {'pandas (ms)':>12} {'numpy (ms)':>11} {'speedup':>8}")
+    for days in args.days:
+        df = session_minutes(days)
+        for tf, rule in PANDAS_RULES.items():
+            pandas_time, expected = best_of(lambda: df.resample(rule).agg(AGG).dropna(subset=['Close']), args.repeat)
+            numpy_time, actual = best_of(lambda: timeframes.resample(df, tf), args.repeat)
+            pd.testing.assert_frame_equal(expected, actual, check_freq=False, check_index_type=False)
+            print(f"{days:>5} {len(df):>9,} {tf:>4} {len(actual):>7,} {pandas_time * 1e3:>12.2f} "
+                  f"{numpy_time * 1e3:>11.2f} {pandas_time / numpy_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Measure redraws and bytes sent when rendering a streamed answer.
+
+Usage:
+    python benchmarks/stream_render_benchmark.py
+    python benchmarks/stream_render_benchmark.py --tokens 500 2048 --tokens-per-second 80
+
+"before" redraws the placeholder with the whole text after every chunk, as the
+pages did. "after" uses streaming.StreamRenderer. Chunks are replayed at a
+steady token rate, as Bedrock delivers them, and the placeholder only records
+what would be sent to the browser.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import streaming
+
+
+class Placeholder:
+    def __init__(self):
+        self.redraws = 0
+        self.bytes = 0
+
+    def markdown(self, body):
+        self.redraws += 1
+        self.bytes += len(body.encode('utf-8'))
+
+
+def chunks(tokens, rate):
+    for i in range(tokens):
+        time.sleep(1 / rate)
+        yield f"word{i % 97} "
+
+
+def naive(tokens, rate):
+    placeholder, text = Placeholder(), ""
+    for chunk in chunks(tokens, rate):
+        text += chunk
+        placeholder.markdown(text)
+    return placeholder.redraws, placeholder.bytes
+
+
+def throttled(tokens, rate):
+    renderer = streaming.render_stream(chunks(tokens, rate), Placeholder())
+    return renderer.flushes, renderer.bytes_sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tokens', type=int, nargs='+', default=[256, 1024, 2048])
+    parser.add_argument('--tokens-per-second', type=float, default=400,
+                        help='replay rate; real generations run at ~50-100')
+    args = parser.parse_args()
+
+    print(f"{'tokens':>7} {'':>7} {'redraws':>8} {'sent (KB)':>10}")
+    for n in args.tokens:
+        for label, run in (('before', naive), ('after', throttled)):
+            redraws, sent = run(n, args.tokens_per_second)
+            print(f"{n:>7,} {label:>7} {redraws:>8,} {sent / 1024:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark search-as-you-type latency of the ticker registry.
+
+Builds an in-memory registry from the real ticker sources plus synthetic
+symbols up to --size rows, then times typical keystroke queries.
+
+Usage:
+    python benchmarks/ticker_search_benchmark.py --size 50000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(os.path.join(ROOT, 'scripts'))
+os.chdir(ROOT)
+from ticker_registry import TickerRegistry, DEFAULT_SOURCES
+
+QUERIES = ['', 'A', 'AA', 'AAPL', 'fpt', 'FPT.VN', 'vin', 'vinhomes', 'ngan hang', 'ngân hàng', 'sua viet nam',
+           'microsft']
+SUFFIXES = ['Inc.', 'Corporation', 'Holdings', 'Group', 'Công ty Cổ phần', 'Tập đoàn']
+
+
+def synthetic_name(rng):
+    """A pronounceable company name, e.g. 'Tovari Melu Holdings'"""
+    words = [''.join(rng.choice('bcdfghklmnprstv') + rng.choice('aeiou') for _ in range(rng.randint(2, 4)))
+             for _ in range(rng.randint(1, 2))]
+    return ' '.join(w.capitalize() for w in words) + ' ' + rng.choice(SUFFIXES)
+
+
+def synthetic_rows(n, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        symbol = ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 5)))
+        name = synthetic_name(rng)
+        country = rng.choice(['US', 'VN'])
+        rows.append((symbol + ('.VN' if country == 'VN' else ''), name, 'Synthetic', country))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ticker registry search latency")
+    parser.add_argument('--size', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    registry = TickerRegistry(db_path=':memory:')
+    start = time.perf_counter()
+    rows = registry._rows()
+    rows += synthetic_rows(max(args.size - len(rows), 0))
+    registry._conn = registry.build(rows)
+    print(f"built {len(registry):,} symbols in {time.perf_counter() - start:.2f}s")
+
+    print(f"{'query':<16} {'us/query':>9}  top matches")
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            matches = registry.search(query, limit=50)
+        elapsed = (time.perf_counter() - start) / args.repeat * 1e6
+        print(f"{query!r:<16} {elapsed:>9.0f}  {', '.join(matches[:3])}")
+
+
+if __name__ == "__main__":
+    main()
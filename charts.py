@@ -0,0 +1,264 @@
+"""
+Plotly figures for the technical analysis page, decimated to screen resolution.
+
+A chart cannot show more points than it has pixels, so long series are reduced
+before they are serialized to the browser:
+- lines keep the points chosen by Largest-Triangle-Three-Buckets (LTTB), which
+  preserves the visual shape including peaks;
+- candles are merged into fixed-size buckets of consecutive bars (open of the
+  first, highest high, lowest low, close of the last);
+- bars (volume, MACD histogram) keep each bucket's minimum and maximum.
+Traces that still have many points use WebGL (Scattergl) instead of SVG.
+"""
+import os
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Points per line trace (about one per pixel of a wide chart) and the size above which lines use WebGL
+MAX_POINTS = int(os.getenv('CHART_MAX_POINTS', '1000'))
+WEBGL_THRESHOLD = int(os.getenv('CHART_WEBGL_THRESHOLD', '500'))
+# A candle needs a few pixels to be readable
+CANDLE_PIXELS = 3
+
+VIEWS = ["📈 Price & Overlays", "📊 Momentum", "📉 Volatility", "📦 Volume"]
+
+
+def lttb(x, y, n_out):
+    """Indices of the n_out points Largest-Triangle-Three-Buckets keeps (x, y float arrays without NaN)"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Mean of the following bucket for every bucket, the last bucket's successor is the last point
+    sum_x = np.r_[0.0, np.cumsum(x)]
+    sum_y = np.r_[0.0, np.cumsum(y)]
+    next_lo = np.r_[edges[1:-1], n - 1]
+    next_hi = np.r_[edges[2:], n]
+    next_x = ((sum_x[next_hi] - sum_x[next_lo]) / (next_hi - next_lo)).tolist()
+    next_y = ((sum_y[next_hi] - sum_y[next_lo]) / (next_hi - next_lo)).tolist()
+
+    # Each pick depends on the previous one, so this loop is sequential; plain floats beat
+    # per-bucket numpy calls for the few points per bucket a chart has
+    xs, ys, bounds = x.tolist(), y.tolist(), edges.tolist()
+    out = [0]
+    ax, ay = xs[0], ys[0]
+    for i in range(len(bounds) - 1):
+        dx = ax - next_x[i]
+        dy = next_y[i] - ay
+        best, pick = -1.0, bounds[i]
+        for j in range(bounds[i], bounds[i + 1]):
+            area = abs(dx * (ys[j] - ay) - (ax - xs[j]) * dy)
+            if area > best:
+                best, pick = area, j
+        out.append(pick)
+        ax, ay = xs[pick], ys[pick]
+    out.append(n - 1)
+    return np.asarray(out)
+
+
+def minmax(y, n_out):
+    """Indices of the minimum and maximum of each of n_out // 2 equal buckets, in order"""
+    n = len(y)
+    buckets = n_out // 2
+    if n_out >= n or buckets < 1:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    width = int(np.diff(edges).max())
+    # Pad ragged buckets to a rectangle by repeating each bucket's last index
+    pos = np.minimum(edges[:-1, None] + np.arange(width), edges[1:, None] - 1)
+    values = y[pos]
+    rows = np.arange(buckets)
+    picks = np.concatenate([pos[rows, np.argmin(values, axis=1)], pos[rows, np.argmax(values, axis=1)]])
+    return np.unique(picks)
+
+
+def ohlc_buckets(df, n_out):
+    """Merge consecutive bars into at most n_out candles"""
+    n = len(df)
+    if n_out >= n or n_out < 1:
+        return df
+    starts = np.linspace(0, n, n_out + 1).astype(np.int64)[:-1]
+    ends = np.r_[starts[1:], n] - 1
+    out = df.iloc[starts][['Open']].copy()
+    out['High'] = np.maximum.reduceat(df['High'].to_numpy(), starts)
+    out['Low'] = np.minimum.reduceat(df['Low'].to_numpy(), starts)
+    out['Close'] = df['Close'].to_numpy()[ends]
+    return out
+
+
+def _xy(df, column):
+    """Non-NaN x (as float ns) and y values of a column plus their index positions"""
+    y = df[column].to_numpy(dtype=float)
+    keep = np.flatnonzero(~np.isnan(y))
+    x = df.index.values.astype('datetime64[ns]').view('i8').astype(float)
+    return keep, x[keep], y[keep]
+
+
+def line(df, column, max_points=MAX_POINTS, **kwargs):
+    """Line trace of df[column], LTTB-decimated to max_points (None keeps every point)"""
+    keep, x, y = _xy(df, column)
+    if max_points:
+        keep = keep[lttb(x, y, max_points)]
+    trace = go.Scattergl if len(keep) > WEBGL_THRESHOLD else go.Scatter
+    return trace(x=df.index[keep], y=df[column].to_numpy()[keep], **kwargs)
+
+
+def bars(df, column, max_points=MAX_POINTS, **kwargs):
+    """Bar trace of df[column] keeping each bucket's extremes"""
+    keep, x, y = _xy(df, column)
+    if max_points:
+        keep = keep[minmax(y, max_points)]
+    return go.Bar(x=df.index[keep], y=df[column].to_numpy()[keep], **kwargs)
+
+
+def candles(df, max_points=MAX_POINTS, **kwargs):
+    """Candlestick trace with consecutive bars merged to fit the chart width"""
+    if max_points:
+        df = ohlc_buckets(df, max_points // CANDLE_PIXELS)
+    return go.Candlestick(x=df.index, open=df['Open'], high=df['High'], low=df['Low'], close=df['Close'], **kwargs)
+
+
+def price_figure(df, ticker, max_points=MAX_POINTS):
+    fig = make_subplots(
+        rows=3, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=(f'{ticker} - Price Action & Moving Averages', 'MACD', 'ADX Trend Strength'),
+        row_heights=[0.6, 0.2, 0.2]
+    )
+
+    # Candlestick Chart
+    fig.add_trace(candles(df, max_points, name='Price'), row=1, col=1)
+
+    # Moving Averages
+    fig.add_trace(line(df, 'SMA_20', max_points, name='SMA 20', line=dict(color='orange')), row=1, col=1)
+    fig.add_trace(line(df, 'SMA_50', max_points, name='SMA 50', line=dict(color='red')), row=1, col=1)
+    fig.add_trace(line(df, 'EMA_50', max_points, name='EMA 50', line=dict(color='purple')), row=1, col=1)
+
+    # Bollinger Bands
+    if 'BB_Upper' in df.columns:
+        fig.add_trace(line(df, 'BB_Upper', max_points, name='BB Upper', line=dict(color='gray', dash='dash'), fill=None), row=1, col=1)
+        fig.add_trace(line(df, 'BB_Lower', max_points, name='BB Lower', line=dict(color='gray', dash='dash'), fill='tonexty', fillcolor='rgba(128,128,128,0.1)'), row=1, col=1)
+
+    # MACD
+    fig.add_trace(line(df, 'MACD', max_points, name='MACD', line=dict(color='blue')), row=2, col=1)
+    fig.add_trace(line(df, 'MACD_Signal', max_points, name='Signal', line=dict(color='red')), row=2, col=1)
+    if 'MACD_Histogram' in df.columns:
+        fig.add_trace(bars(df, 'MACD_Histogram', max_points, name='MACD Histogram', marker_color='green'), row=2, col=1)
+
+    # ADX
+    if 'ADX' in df.columns:
+        fig.add_trace(line(df, 'ADX', max_points, name='ADX', line=dict(color='purple')), row=3, col=1)
+        fig.add_hline(y=25, line_dash="dash", line_color="orange", row=3, col=1)
+
+    fig.update_layout(height=800, showlegend=True, title_text=f"Price Action Analysis - {ticker}")
+    return fig
+
+
+def momentum_figure(df, ticker, max_points=MAX_POINTS):
+    fig = make_subplots(
+        rows=4, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=('RSI (14 & 30)', 'Stochastic Oscillator', 'Williams %R', 'Rate of Change'),
+        row_heights=[0.25, 0.25, 0.25, 0.25]
+    )
+
+    # RSI
+    fig.add_trace(line(df, 'RSI', max_points, name='RSI 14', line=dict(color='purple')), row=1, col=1)
+    if 'RSI_30' in df.columns:
+        fig.add_trace(line(df, 'RSI_30', max_points, name='RSI 30', line=dict(color='blue')), row=1, col=1)
+    fig.add_hline(y=70, line_dash="dash", line_color="red", row=1, col=1)
+    fig.add_hline(y=30, line_dash="dash", line_color="green", row=1, col=1)
+
+    # Stochastic
+    if 'STOCH_K' in df.columns:
+        fig.add_trace(line(df, 'STOCH_K', max_points, name='%K', line=dict(color='blue')), row=2, col=1)
+        fig.add_trace(line(df, 'STOCH_D', max_points, name='%D', line=dict(color='red')), row=2, col=1)
+        fig.add_hline(y=80, line_dash="dash", line_color="red", row=2, col=1)
+        fig.add_hline(y=20, line_dash="dash", line_color="green", row=2, col=1)
+
+    # Williams %R
+    if 'WILLR' in df.columns:
+        fig.add_trace(line(df, 'WILLR', max_points, name='Williams %R', line=dict(color='orange')), row=3, col=1)
+        fig.add_hline(y=-20, line_dash="dash", line_color="red", row=3, col=1)
+        fig.add_hline(y=-80, line_dash="dash", line_color="green", row=3, col=1)
+
+    # Rate of Change
+    if 'ROC' in df.columns:
+        fig.add_trace(line(df, 'ROC', max_points, name='ROC', line=dict(color='green')), row=4, col=1)
+        fig.add_hline(y=0, line_dash="dash", line_color="gray", row=4, col=1)
+
+    fig.update_layout(height=800, showlegend=True, title_text=f"Momentum Analysis - {ticker}")
+    return fig
+
+
+def volatility_figure(df, ticker, max_points=MAX_POINTS):
+    fig = make_subplots(
+        rows=3, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=(f'{ticker} - Bollinger Bands & Keltner Channels', 'Average True Range (ATR)', 'Bollinger Band Width & %B'),
+        row_heights=[0.5, 0.25, 0.25]
+    )
+
+    # Price with Bollinger Bands and Keltner Channels
+    fig.add_trace(line(df, 'Close', max_points, name='Close', line=dict(color='black')), row=1, col=1)
+    if 'BB_Upper' in df.columns:
+        fig.add_trace(line(df, 'BB_Upper', max_points, name='BB Upper', line=dict(color='blue', dash='dash')), row=1, col=1)
+        fig.add_trace(line(df, 'BB_Lower', max_points, name='BB Lower', line=dict(color='blue', dash='dash')), row=1, col=1)
+
+    # ATR
+    if 'ATR' in df.columns:
+        fig.add_trace(line(df, 'ATR', max_points, name='ATR', line=dict(color='orange')), row=2, col=1)
+
+    # Bollinger Band Width and %B
+    if 'BB_Width' in df.columns:
+        fig.add_trace(line(df, 'BB_Width', max_points, name='BB Width', line=dict(color='green')), row=3, col=1)
+    if 'BB_Percent' in df.columns:
+        fig.add_trace(line(df, 'BB_Percent', max_points, name='%B', line=dict(color='purple')), row=3, col=1)
+        fig.add_hline(y=1, line_dash="dash", line_color="red", row=3, col=1)
+        fig.add_hline(y=0, line_dash="dash", line_color="green", row=3, col=1)
+
+    fig.update_layout(height=800, showlegend=True, title_text=f"Volatility Analysis - {ticker}")
+    return fig
+
+
+def volume_figure(df, ticker, max_points=MAX_POINTS):
+    """Volume chart, or None when the ticker has no volume data"""
+    if 'Volume' not in df.columns or df['Volume'].isna().all():
+        return None
+    fig = make_subplots(
+        rows=3, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=(f'{ticker} - Price & Volume', 'On Balance Volume (OBV)', 'Money Flow Index (MFI)'),
+        row_heights=[0.4, 0.3, 0.3]
+    )
+
+    # Price and Volume
+    fig.add_trace(line(df, 'Close', max_points, name='Close', line=dict(color='blue')), row=1, col=1)
+    fig.add_trace(bars(df, 'Volume', max_points, name='Volume', marker_color='lightblue', yaxis='y2'), row=1, col=1)
+
+    # OBV
+    if 'OBV' in df.columns:
+        fig.add_trace(line(df, 'OBV', max_points, name='OBV', line=dict(color='green')), row=2, col=1)
+
+    # MFI
+    if 'MFI' in df.columns:
+        fig.add_trace(line(df, 'MFI', max_points, name='MFI', line=dict(color='purple')), row=3, col=1)
+        fig.add_hline(y=80, line_dash="dash", line_color="red", row=3, col=1)
+        fig.add_hline(y=20, line_dash="dash", line_color="green", row=3, col=1)
+
+    fig.update_layout(height=600, showlegend=True, title_text=f"Volume Analysis - {ticker}")
+    return fig
+
+
+FIGURES = dict(zip(VIEWS, [price_figure, momentum_figure, volatility_figure, volume_figure]))
+
+
+def points(fig):
+    """Number of data points across a figure's traces"""
+    return sum(len(trace.x) for trace in fig.data if trace.x is not None)
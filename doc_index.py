@@ -0,0 +1,147 @@
+"""
+In-process retrieval index for Document Q&A.
+
+A document is split into overlapping chunks once, when it is loaded. Chunks are
+embedded with a pluggable embedder (Bedrock Titan, a local sentence-transformers
+model, or any callable mapping a list of texts to a 2-D array) and searched by
+cosine similarity. Without an embedder the index falls back to BM25, so
+retrieval works with no extra models or network calls.
+"""
+import json
+import math
+import os
+import re
+from collections import Counter
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+import bedrock_client
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+CHUNK_SIZE = int(os.getenv('DOC_QA_CHUNK_SIZE', '1500'))
+CHUNK_OVERLAP = int(os.getenv('DOC_QA_CHUNK_OVERLAP', '200'))
+TOP_K = int(os.getenv('DOC_QA_TOP_K', '4'))
+# bm25 (default), bedrock or local
+EMBEDDER = os.getenv('DOC_QA_EMBEDDER', 'bm25')
+BEDROCK_EMBED_MODEL_ID = os.getenv('BEDROCK_EMBED_MODEL_ID', 'amazon.titan-embed-text-v2:0')
+LOCAL_EMBED_MODEL = os.getenv('LOCAL_EMBED_MODEL', 'all-MiniLM-L6-v2')
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def split_text(text, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    """Split text into overlapping chunks on paragraph, line and sentence boundaries"""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                                              separators=["\n\n", "\n", ". ", " ", ""])
+    return [c for c in splitter.split_text(text) if c.strip()]
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def bedrock_embedder(texts):
+    """Embed texts with a Titan embedding model through the pooled Bedrock client"""
+    client = bedrock_client.get_bedrock_runtime(model_id=BEDROCK_EMBED_MODEL_ID)
+    vectors = []
+    for text in texts:
+        response = client.invoke_model(
+            body=json.dumps({"inputText": text}),
+            modelId=BEDROCK_EMBED_MODEL_ID,
+            accept="application/json",
+            contentType="application/json"
+        )
+        vectors.append(json.loads(response['body'].read())['embedding'])
+    return np.asarray(vectors, dtype=np.float32)
+
+
+_local_model = None
+
+
+def local_embedder(texts):
+    """Embed texts with a local sentence-transformers model, loaded once per process"""
+    global _local_model
+    if _local_model is None:
+        _local_model = SentenceTransformer(LOCAL_EMBED_MODEL)
+    return np.asarray(_local_model.encode(texts), dtype=np.float32)
+
+
+def get_embedder(name=EMBEDDER):
+    """Resolve the configured embedder, or None to use BM25"""
+    if name == 'bedrock':
+        return bedrock_embedder
+    if name == 'local' and SentenceTransformer is not None:
+        return local_embedder
+    return None
+
+
+class BM25Index:
+    """Okapi BM25 over pre-tokenized chunks with an inverted index"""
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        lengths = []
+        for i, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((i, tf))
+        self.size = len(chunks)
+        self.lengths = np.asarray(lengths, dtype=float)
+        self.avg_length = self.lengths.mean() if self.size else 0.0
+        self.postings = {term: (np.array([d for d, _ in p]), np.array([tf for _, tf in p], dtype=float))
+                         for term, p in self.postings.items()}
+
+    def scores(self, query):
+        scores = np.zeros(self.size)
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            docs, tf = self.postings[term]
+            idf = math.log(1 + (self.size - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[docs] / self.avg_length)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+
+class VectorIndex:
+    """Cosine similarity over L2-normalized chunk embeddings"""
+
+    def __init__(self, chunks, embedder):
+        self.embedder = embedder
+        vectors = np.asarray(embedder(chunks), dtype=np.float32)
+        self.vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def scores(self, query):
+        q = np.asarray(self.embedder([query]), dtype=np.float32)[0]
+        return self.vectors @ (q / max(np.linalg.norm(q), 1e-12))
+
+
+class DocumentIndex:
+    """Chunks of one document plus the index used to rank them for a question"""
+
+    def __init__(self, text, embedder=None, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+        self.chunks = split_text(text, chunk_size, chunk_overlap)
+        self.index = None
+        if embedder is not None and self.chunks:
+            try:
+                self.index = VectorIndex(self.chunks, embedder)
+            except Exception as e:
+                print(f"Embedding failed, falling back to BM25: {e}")
+        if self.index is None:
+            self.index = BM25Index(self.chunks)
+        self.method = 'bm25' if isinstance(self.index, BM25Index) else 'embedding'
+
+    def search(self, query, k=TOP_K):
+        """Return the k most relevant chunks, most relevant first (ties in document order)"""
+        if not self.chunks:
+            return []
+        scores = self.index.scores(query)
+        top = np.argpartition(-scores, k - 1)[:k] if len(self.chunks) > k else np.arange(len(self.chunks))
+        # build_prompt trims documents from the tail, so the order must be by relevance
+        top = top[np.lexsort((top, -scores[top]))]
+        return [self.chunks[i] for i in top]
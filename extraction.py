@@ -0,0 +1,256 @@
+"""
+Text extraction for uploaded documents, shared by Document Summary and Document Q&A.
+
+PDF pages are extracted in a process pool and yielded in order as soon as they
+are ready. `iter_extract_cached` hands them on page by page, so the summary's
+map step starts before the last page is parsed. Text is always assembled with a
+single join rather than repeated string `+=`.
+
+Extracted text is cached on disk by the SHA-256 of the uploaded bytes, so
+reruns, repeated clicks and duplicate uploads across sessions skip parsing.
+"""
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+try:
+    import docx
+except ImportError:
+    docx = None
+
+# PDFs with fewer pages are extracted in-process; pool dispatch would cost more than it saves
+PARALLEL_MIN_PAGES = int(os.getenv('EXTRACTION_PARALLEL_MIN_PAGES', '16'))
+PAGES_PER_TASK = 8
+MAX_WORKERS = int(os.getenv('EXTRACTION_MAX_WORKERS', str(os.cpu_count() or 1)))
+CACHE_DIR = os.getenv('EXTRACTION_CACHE_DIR', os.path.join('data', 'cache', 'text'))
+CACHE_MAX_BYTES = int(os.getenv('EXTRACTION_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+_pool = None
+_worker_reader = (None, None)
+
+
+def _get_pool():
+    """Process pool shared by all sessions; spawn avoids forking the multi-threaded server"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def _extract_range(path, start, stop):
+    """Worker task: extract pages [start, stop) of the PDF at path, reusing the parsed reader"""
+    global _worker_reader
+    if _worker_reader[0] != path:
+        _worker_reader = (path, PyPDF2.PdfReader(path))
+    reader = _worker_reader[1]
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(data, max_workers=MAX_WORKERS):
+    """Yield the text of each PDF page, in order"""
+    if PyPDF2 is None:
+        raise ImportError("PDF processing requires PyPDF2")
+    reader = PyPDF2.PdfReader(BytesIO(data))
+    num_pages = len(reader.pages)
+    if max_workers <= 1 or num_pages < PARALLEL_MIN_PAGES:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    # Workers read the PDF from a temp file, so the bytes are not pickled once per task
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # Small page ranges keep the pool balanced and the first pages early; workers cache the parsed reader
+        step = max(1, min(PAGES_PER_TASK, -(-num_pages // (max_workers * 4))))
+        ranges = [(start, min(start + step, num_pages)) for start in range(0, num_pages, step)]
+        pool = _get_pool()
+        futures = [pool.submit(_extract_range, path, start, stop) for start, stop in ranges]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+    finally:
+        os.remove(path)
+
+
+def iter_docx_paragraphs(data):
+    """Yield the non-empty paragraphs of a DOCX file"""
+    if docx is None:
+        raise ImportError("DOCX processing requires python-docx")
+    for paragraph in docx.Document(BytesIO(data)).paragraphs:
+        if paragraph.text:
+            yield paragraph.text
+
+
+def file_kind(name, mime=None):
+    if mime == "application/pdf" or name.endswith('.pdf'):
+        return 'pdf'
+    if name.endswith('.docx'):
+        return 'docx'
+    return 'text'
+
+
+def iter_text(data, name, mime=None):
+    """Yield text segments (PDF pages, DOCX paragraphs, or the whole text file)"""
+    kind = file_kind(name, mime)
+    if kind == 'pdf':
+        return iter_pdf_pages(data)
+    if kind == 'docx':
+        return iter_docx_paragraphs(data)
+    return iter([str(data, "utf-8")])
+
+
+def join_segments(segments):
+    """Return (text, offsets) where offsets[i] is where segment i (e.g. PDF page i) starts in text"""
+    offsets, position = [], 0
+    for segment in segments:
+        offsets.append(position)
+        position += len(segment) + 1
+    return "\n".join(segments), offsets
+
+
+def split_segments(text, offsets):
+    """Inverse of join_segments"""
+    ends = offsets[1:] + [len(text) + 1]
+    return [text[start:end - 1] for start, end in zip(offsets, ends)]
+
+
+def extract(data, name, mime=None):
+    """Return (text, offsets) for the whole document; see join_segments"""
+    return join_segments(list(iter_text(data, name, mime)))
+
+
+def extract_text(data, name, mime=None):
+    """Extract the full text of an uploaded file; raises ImportError or UnicodeDecodeError"""
+    return extract_cached(data, name, mime)[0]
+
+
+class TextCache:
+    """Disk cache of extracted text keyed by the SHA-256 of the source bytes.
+
+    Entries are evicted least recently used first once the directory grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def _path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def get(self, digest, source_size=0):
+        """Return (text, offsets) for a digest, or None"""
+        path = self._path(digest)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += source_size
+        return entry['text'], entry['offsets']
+
+    def put(self, digest, text, offsets):
+        """Store an entry; a cache that cannot be written (read-only, disk full) is skipped, not fatal"""
+        with self._lock:
+            path = self._path(digest)
+            tmp = path + '.tmp'
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump({'text': text, 'offsets': offsets}, f, ensure_ascii=False)
+                os.replace(tmp, path)
+            except OSError as e:
+                print(f"Extraction cache write error: {e}")
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                return
+            self._evict()
+
+    def _evict(self):
+        try:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith('.json'):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+        except OSError as e:
+            print(f"Extraction cache eviction error: {e}")
+
+    def stats(self):
+        """Hit/miss counters and source bytes whose parsing was skipped"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+            }
+
+
+text_cache = TextCache()
+
+
+def cache_key(data, name, mime=None):
+    # The kind is part of the key so the same bytes uploaded as .txt and .pdf do not collide
+    return hashlib.sha256(data).hexdigest() + '-' + file_kind(name, mime)
+
+
+def extract_cached(data, name, mime=None, cache=text_cache):
+    """extract() through the content-hash cache; identical bytes are parsed once"""
+    digest = cache_key(data, name, mime)
+    cached = cache.get(digest, len(data))
+    if cached is not None:
+        return cached
+    text, offsets = extract(data, name, mime)
+    cache.put(digest, text, offsets)
+    return text, offsets
+
+
+def iter_extract_cached(data, name, mime=None, cache=text_cache):
+    """Yield the document's segments through the content-hash cache.
+
+    A hit replays the cached segments; a miss yields each segment as soon as it
+    is parsed and caches the text once the last one has been read.
+    """
+    digest = cache_key(data, name, mime)
+    cached = cache.get(digest, len(data))
+    if cached is not None:
+        yield from split_segments(*cached)
+        return
+    segments = []
+    for segment in iter_text(data, name, mime):
+        segments.append(segment)
+        yield segment
+    cache.put(digest, *join_segments(segments))
@@ -0,0 +1,569 @@
+"""
+Vectorized technical indicator engine.
+
+Computes the same columns as the `ta`-based implementation that used to live in
+pages/technical_analysis.py, but in a single pass over contiguous float64 arrays.
+Intermediate series (previous close, true range, typical price, gains/losses,
+the 12/26 EMAs, the 14-bar high/low windows) are computed once and shared by
+every indicator that needs them. Values match `ta` 0.10.2, including its
+warm-up conventions (NaN for rolling indicators, 0 for ATR/ADX/DI).
+"""
+import math
+from collections import deque
+import os
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from lru import LRUCache
+
+# Column order produced by compute_indicators, volume columns only when volume is present
+PRICE_COLUMNS = [
+    'SMA_20', 'SMA_50', 'SMA_200', 'EMA_12', 'EMA_26', 'EMA_50',
+    'BB_Upper', 'BB_Middle', 'BB_Lower', 'BB_Width', 'BB_Percent',
+    'MACD', 'MACD_Signal', 'MACD_Histogram',
+    'RSI', 'RSI_30', 'STOCH_K', 'STOCH_D', 'WILLR',
+    'ADX', 'PLUS_DI', 'MINUS_DI', 'ATR', 'CCI', 'ROC',
+]
+VOLUME_COLUMNS = ['OBV', 'MFI', 'Volume_SMA']
+LEVEL_COLUMNS = ['Pivot', 'R1', 'S1', 'R2', 'S2']
+
+# Computed frames shared across all sessions in the process
+indicator_cache = LRUCache(maxsize=int(os.getenv('INDICATOR_CACHE_SIZE', '256')))
+
+
+def _as_array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _shift(x, n=1):
+    out = np.empty_like(x)
+    out[:n] = np.nan
+    out[n:] = x[:-n]
+    return out
+
+
+def rolling_sum(x, window):
+    """Rolling sum over `window` bars, NaN until the window is full of valid values.
+
+    Uses pandas' compensated rolling kernel; a plain cumsum difference loses
+    precision on long histories (1M bars) which shows up in BB %B.
+    """
+    return pd.Series(x, copy=False).rolling(window).sum().to_numpy(copy=True)
+
+
+def rolling_mean(x, window):
+    return rolling_sum(x, window) / window
+
+
+def _windows(x, window):
+    return sliding_window_view(x, window)
+
+
+def rolling_max(x, window):
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        out[window - 1:] = _windows(x, window).max(axis=1)
+    return out
+
+
+def rolling_min(x, window):
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        out[window - 1:] = _windows(x, window).min(axis=1)
+    return out
+
+
+def rolling_std(x, window):
+    """Population (ddof=0) rolling standard deviation"""
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        out[window - 1:] = _windows(x, window).std(axis=1)
+    return out
+
+
+def rolling_mad(x, window):
+    """Rolling mean absolute deviation around the window mean"""
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        w = _windows(x, window)
+        out[window - 1:] = np.abs(w - w.mean(axis=1, keepdims=True)).mean(axis=1)
+    return out
+
+
+def ewm(x, alpha, min_periods=0):
+    """Recursive exponential smoothing (adjust=False) seeded with the first valid value.
+
+    The recursion itself runs in pandas' compiled ewm kernel; leading NaNs are
+    skipped and the first `min_periods` valid outputs are masked.
+    """
+    out = pd.Series(x, copy=False).ewm(alpha=alpha, adjust=False).mean().to_numpy(copy=True)
+    if min_periods > 1:
+        valid = np.flatnonzero(~np.isnan(x))
+        cutoff = valid[0] + min_periods - 1 if len(valid) else len(x)
+        out[:min(cutoff, len(x))] = np.nan
+    return out
+
+
+def ema(x, span):
+    return ewm(x, 2.0 / (span + 1.0), min_periods=span)
+
+
+def wilder(seed, x, window):
+    """Wilder smoothing y[i] = y[i-1] * (1 - 1/n) + x[i] / n starting from `seed`"""
+    return ewm(np.concatenate(([seed], x)), 1.0 / window)
+
+
+def true_range(high, low, prev_close):
+    """True range; the first bar (no previous close) falls back to high - low"""
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return tr
+
+
+def rsi(gains, losses, window):
+    """RSI from precomputed gain/loss series (Wilder smoothing)"""
+    alpha = 1.0 / window
+    up = ewm(gains, alpha, min_periods=window)
+    down = ewm(losses, alpha, min_periods=window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(down == 0, 100.0, 100.0 - 100.0 / (1.0 + up / down))
+
+
+def atr(tr, window):
+    out = np.zeros(len(tr))
+    if len(tr) < window:
+        return out
+    out[window - 1:] = wilder(tr[:window].mean(), tr[window:], window)
+    return out
+
+
+def adx(high, low, tr_no_first, window):
+    """ADX, +DI and -DI using Wilder's running sums, aligned like `ta`"""
+    n = len(high)
+    adx_out = np.zeros(n)
+    plus_di = np.zeros(n)
+    minus_di = np.zeros(n)
+    if n <= window:
+        return adx_out, plus_di, minus_di
+
+    up = high - _shift(high)
+    down = _shift(low) - low
+    pos = np.where((up > down) & (up > 0), up, 0.0)
+    neg = np.where((down > up) & (down > 0), down, 0.0)
+
+    # Running sums seeded with bars 1..window, then smoothed from bar window+1 on
+    trs = window * wilder(tr_no_first[1:window + 1].sum() / window, tr_no_first[window + 1:], window)
+    dip = window * wilder(pos[1:window + 1].sum() / window, pos[window + 1:], window)
+    din = window * wilder(neg[1:window + 1].sum() / window, neg[window + 1:], window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_pos = 100.0 * dip / trs
+        di_neg = 100.0 * din / trs
+        dx = 100.0 * np.abs((di_pos - di_neg) / (di_pos + di_neg))
+
+    # `ta` leaves the first smoothed bar at zero for the DI lines
+    plus_di[window + 1:] = di_pos[1:]
+    minus_di[window + 1:] = di_neg[1:]
+
+    start = 2 * window - 1
+    if n > start:
+        adx_out[start:] = wilder(dx[:window].mean(), dx[window:], window)
+    return adx_out, plus_di, minus_di
+
+
+def compute_indicators(df):
+    """Return a copy of an OHLCV frame with every technical indicator column added"""
+    high = _as_array(df['High'].values)
+    low = _as_array(df['Low'].values)
+    close = _as_array(df['Close'].values)
+    volume = _as_array(df['Volume'].values) if 'Volume' in df.columns else None
+
+    # Shared intermediates
+    prev_close = _shift(close)
+    tr = true_range(high, low, prev_close)
+    typical = (high + low + close) / 3.0
+    diff = close - prev_close
+    gains = np.where(diff > 0, diff, 0.0)
+    losses = np.where(diff < 0, -diff, 0.0)
+    high_14 = rolling_max(high, 14)
+    low_14 = rolling_min(low, 14)
+    ema_12 = ema(close, 12)
+    ema_26 = ema(close, 26)
+
+    cols = {}
+
+    # Moving Averages
+    sma_20 = rolling_mean(close, 20)
+    cols['SMA_20'] = sma_20
+    cols['SMA_50'] = rolling_mean(close, 50)
+    cols['SMA_200'] = rolling_mean(close, 200)
+    cols['EMA_12'] = ema_12
+    cols['EMA_26'] = ema_26
+    cols['EMA_50'] = ema(close, 50)
+
+    # Bollinger Bands (middle band is the SMA 20)
+    std_20 = rolling_std(close, 20)
+    upper = sma_20 + 2 * std_20
+    lower = sma_20 - 2 * std_20
+    cols['BB_Upper'] = upper
+    cols['BB_Middle'] = sma_20
+    cols['BB_Lower'] = lower
+    cols['BB_Width'] = upper - lower
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cols['BB_Percent'] = (close - lower) / np.where(upper != lower, upper - lower, np.nan)
+
+    # MACD reuses the 12/26 EMAs
+    macd = ema_12 - ema_26
+    macd_signal = ema(macd, 9)
+    cols['MACD'] = macd
+    cols['MACD_Signal'] = macd_signal
+    cols['MACD_Histogram'] = macd - macd_signal
+
+    # RSI 14 and 30 share the gain/loss series
+    cols['RSI'] = rsi(gains, losses, 14)
+    cols['RSI_30'] = rsi(gains, losses, 30)
+
+    # Stochastic and Williams %R share the 14-bar high/low window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stoch_k = 100 * (close - low_14) / (high_14 - low_14)
+        cols['STOCH_K'] = stoch_k
+        cols['STOCH_D'] = rolling_mean(stoch_k, 3)
+        cols['WILLR'] = -100 * (high_14 - close) / (high_14 - low_14)
+
+    # ADX and ATR share the true range
+    tr_no_first = tr.copy()
+    tr_no_first[0] = np.nan
+    cols['ADX'], cols['PLUS_DI'], cols['MINUS_DI'] = adx(high, low, tr_no_first, 14)
+    cols['ATR'] = atr(tr, 14)
+
+    # CCI on the typical price
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cols['CCI'] = (typical - rolling_mean(typical, 20)) / (0.015 * rolling_mad(typical, 20))
+        close_10 = _shift(close, 10)
+        cols['ROC'] = (close - close_10) / close_10 * 100
+
+    # Volume indicators (if volume available)
+    if volume is not None and not np.isnan(volume).all():
+        signed = np.where(close < prev_close, -volume, volume)
+        obv = np.nancumsum(signed)
+        obv[np.isnan(signed)] = np.nan
+        cols['OBV'] = obv
+
+        prev_typical = _shift(typical)
+        direction = np.where(typical > prev_typical, 1.0, np.where(typical < prev_typical, -1.0, 0.0))
+        flow = typical * volume * direction
+        positive = rolling_sum(np.where(flow >= 0, flow, np.where(np.isnan(flow), np.nan, 0.0)), 14)
+        negative = np.abs(rolling_sum(np.where(flow < 0, flow, np.where(np.isnan(flow), np.nan, 0.0)), 14))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cols['MFI'] = 100 - 100 / (1 + positive / negative)
+        cols['Volume_SMA'] = rolling_mean(volume, 20)
+
+    # Support & Resistance
+    pivot = typical
+    cols['Pivot'] = pivot
+    cols['R1'] = 2 * pivot - low
+    cols['S1'] = 2 * pivot - high
+    cols['R2'] = pivot + (high - low)
+    cols['S2'] = pivot - (high - low)
+
+    out = df.copy()
+    for name, values in cols.items():
+        out[name] = values
+    return out
+
+
+def cached_indicators(df, ticker, period):
+    """compute_indicators memoized on (ticker, period, last bar) across sessions"""
+    if df is None or df.empty:
+        return compute_indicators(df)
+    last = df.index[-1]
+    # The close is part of the key so a still-forming last bar is not served stale
+    key = (ticker, period, pd.Timestamp(last).isoformat(), len(df), float(df['Close'].iloc[-1]))
+    result = indicator_cache.get_or_compute(key, lambda: compute_indicators(df))
+    # The cached frame is shared by every session; hand out copies so callers can modify them
+    return result.copy()
+
+
+class _Window:
+    """Fixed-size window of the most recent values"""
+
+    def __init__(self, size, values=()):
+        self.size = size
+        self.values = deque(values, maxlen=size)
+
+    def push(self, value):
+        self.values.append(value)
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def mean(self):
+        if not self.full or any(np.isnan(v) for v in self.values):
+            return np.nan
+        return math.fsum(self.values) / self.size
+
+    def oldest(self):
+        return self.values[0] if self.full else np.nan
+
+
+class _Smoother:
+    """Recursive y = y * (1 - alpha) + x * alpha, NaN until `min_periods` valid inputs"""
+
+    def __init__(self, alpha, min_periods=0, value=np.nan, count=0):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = value
+        self.count = count
+
+    def push(self, x):
+        if np.isnan(x):
+            return self.output()
+        self.value = x if self.count == 0 else self.value * (1 - self.alpha) + x * self.alpha
+        self.count += 1
+        return self.output()
+
+    def output(self):
+        return self.value if self.count >= self.min_periods else np.nan
+
+
+class IndicatorState:
+    """Streaming counterpart of compute_indicators.
+
+    Feed bars one at a time with update(bar); each call costs O(1) in the length
+    of the history and returns the new row, matching the batch engine (and so
+    `ta`) to floating-point rounding. The state round-trips through to_dict() /
+    from_dict() so it can be stored next to the cached OHLCV bars.
+    A still-forming bar should be applied to a copy() of the state.
+    """
+
+    ADX_WINDOW = 14
+
+    def __init__(self, has_volume=True):
+        self.has_volume = has_volume
+        self.bars = 0
+        self.last_date = None
+        self.prev_close = np.nan
+        self.prev_high = np.nan
+        self.prev_low = np.nan
+        self.prev_typical = np.nan
+        self.obv = 0.0
+
+        self.close_20 = _Window(20)
+        self.close_50 = _Window(50)
+        self.close_200 = _Window(200)
+        self.close_11 = _Window(11)
+        self.high_14 = _Window(14)
+        self.low_14 = _Window(14)
+        self.typical_20 = _Window(20)
+        self.stoch_3 = _Window(3)
+        self.flow_14 = _Window(14)
+        self.volume_20 = _Window(20)
+        self.tr_14 = _Window(14)
+
+        self.ema_12 = _Smoother(2 / 13, 12)
+        self.ema_26 = _Smoother(2 / 27, 26)
+        self.ema_50 = _Smoother(2 / 51, 50)
+        self.macd_signal = _Smoother(2 / 10, 9)
+        self.rsi_up_14 = _Smoother(1 / 14, 14)
+        self.rsi_down_14 = _Smoother(1 / 14, 14)
+        self.rsi_up_30 = _Smoother(1 / 30, 30)
+        self.rsi_down_30 = _Smoother(1 / 30, 30)
+
+        # Wilder running sums for ATR / ADX, seeded from the first window
+        self.atr = 0.0
+        self.trs = self.dip = self.din = 0.0
+        self.dx_seed = []
+        self.adx = 0.0
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the state by replaying every bar of an OHLCV frame"""
+        has_volume = 'Volume' in df.columns and not df['Volume'].isna().all()
+        state = cls(has_volume=has_volume)
+        for timestamp, bar in df.iterrows():
+            state.update(bar, timestamp)
+        return state
+
+    def update(self, bar, timestamp=None):
+        """Consume one bar (mapping with High/Low/Close[/Volume]) and return its indicator row"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            row = self._update(
+                np.float64(bar['High']), np.float64(bar['Low']), np.float64(bar['Close']),
+                np.float64(bar['Volume']) if self.has_volume else np.float64(np.nan),
+            )
+        self.bars += 1
+        if timestamp is not None:
+            self.last_date = pd.Timestamp(timestamp).isoformat()
+        return row
+
+    def _update(self, high, low, close, volume):
+        w = self.ADX_WINDOW
+        i = self.bars
+        prev_close = self.prev_close
+        typical = (high + low + close) / 3.0
+        row = {}
+
+        for window in (self.close_20, self.close_50, self.close_200, self.close_11):
+            window.push(close)
+        self.high_14.push(high)
+        self.low_14.push(low)
+        self.typical_20.push(typical)
+
+        # Moving Averages
+        sma_20 = self.close_20.mean()
+        ema_12 = self.ema_12.push(close)
+        ema_26 = self.ema_26.push(close)
+        row['SMA_20'] = sma_20
+        row['SMA_50'] = self.close_50.mean()
+        row['SMA_200'] = self.close_200.mean()
+        row['EMA_12'] = ema_12
+        row['EMA_26'] = ema_26
+        row['EMA_50'] = self.ema_50.push(close)
+
+        # Bollinger Bands
+        if np.isnan(sma_20):
+            std_20 = np.float64(np.nan)
+        else:
+            std_20 = np.float64(math.sqrt(math.fsum((v - sma_20) ** 2 for v in self.close_20.values) / 20))
+        upper = sma_20 + 2 * std_20
+        lower = sma_20 - 2 * std_20
+        row['BB_Upper'] = upper
+        row['BB_Middle'] = sma_20
+        row['BB_Lower'] = lower
+        row['BB_Width'] = upper - lower
+        row['BB_Percent'] = (close - lower) / (upper - lower) if upper != lower else np.nan
+
+        # MACD
+        macd = ema_12 - ema_26
+        macd_signal = self.macd_signal.push(macd)
+        row['MACD'] = macd
+        row['MACD_Signal'] = macd_signal
+        row['MACD_Histogram'] = macd - macd_signal
+
+        # RSI (the first bar counts as a zero change, like `ta`)
+        diff = close - prev_close
+        gain = diff if diff > 0 else 0.0
+        loss = -diff if diff < 0 else 0.0
+        for name, up, down in (('RSI', self.rsi_up_14, self.rsi_down_14),
+                               ('RSI_30', self.rsi_up_30, self.rsi_down_30)):
+            avg_up, avg_down = up.push(gain), down.push(loss)
+            row[name] = 100.0 if avg_down == 0 else 100.0 - 100.0 / (1.0 + avg_up / avg_down)
+
+        # Stochastic / Williams %R
+        if self.high_14.full:
+            high_14, low_14 = max(self.high_14.values), min(self.low_14.values)
+        else:
+            high_14 = low_14 = np.float64(np.nan)
+        stoch_k = 100 * (close - low_14) / (high_14 - low_14)
+        self.stoch_3.push(stoch_k)
+        row['STOCH_K'] = stoch_k
+        row['STOCH_D'] = self.stoch_3.mean()
+        row['WILLR'] = -100 * (high_14 - close) / (high_14 - low_14)
+
+        # ADX / DI from Wilder running sums of true range and directional movement
+        tr = np.fmax(high - low, np.fmax(abs(high - prev_close), abs(low - prev_close)))
+        up_move = high - self.prev_high
+        down_move = self.prev_low - low
+        pos = up_move if (up_move > down_move and up_move > 0) else 0.0
+        neg = down_move if (down_move > up_move and down_move > 0) else 0.0
+        plus_di = minus_di = 0.0
+        if 1 <= i <= w:
+            self.trs += tr
+            self.dip += pos
+            self.din += neg
+        elif i > w:
+            self.trs = self.trs * (1 - 1 / w) + tr
+            self.dip = self.dip * (1 - 1 / w) + pos
+            self.din = self.din * (1 - 1 / w) + neg
+            plus_di = 100.0 * self.dip / self.trs
+            minus_di = 100.0 * self.din / self.trs
+        if i >= w:
+            di_pos = 100.0 * self.dip / self.trs
+            di_neg = 100.0 * self.din / self.trs
+            dx = 100.0 * abs((di_pos - di_neg) / (di_pos + di_neg))
+            if i < 2 * w - 1:
+                self.dx_seed.append(float(dx))
+            elif i == 2 * w - 1:
+                self.adx = (math.fsum(self.dx_seed) + dx) / w
+                self.dx_seed = []
+            else:
+                self.adx = self.adx * (1 - 1 / w) + dx / w
+        row['ADX'] = self.adx if i >= 2 * w - 1 else 0.0
+        row['PLUS_DI'] = plus_di
+        row['MINUS_DI'] = minus_di
+
+        # ATR (the first bar's true range is high - low)
+        self.tr_14.push(tr)
+        if i == w - 1:
+            self.atr = math.fsum(self.tr_14.values) / w
+        elif i >= w:
+            self.atr = self.atr * (1 - 1 / w) + tr / w
+        row['ATR'] = self.atr if i >= w - 1 else 0.0
+
+        # CCI / ROC
+        if self.typical_20.full:
+            mean_tp = math.fsum(self.typical_20.values) / 20
+            mad = math.fsum(abs(v - mean_tp) for v in self.typical_20.values) / 20
+            row['CCI'] = (typical - mean_tp) / (0.015 * np.float64(mad))
+        else:
+            row['CCI'] = np.nan
+        close_10 = self.close_11.oldest()
+        row['ROC'] = (close - close_10) / close_10 * 100
+
+        # Volume indicators
+        if self.has_volume:
+            if np.isnan(volume):
+                row['OBV'] = np.nan
+            else:
+                self.obv += -volume if close < prev_close else volume
+                row['OBV'] = self.obv
+            direction = 1.0 if typical > self.prev_typical else (-1.0 if typical < self.prev_typical else 0.0)
+            self.flow_14.push(typical * volume * direction)
+            if self.flow_14.full and not any(np.isnan(v) for v in self.flow_14.values):
+                positive = np.float64(math.fsum(v for v in self.flow_14.values if v >= 0))
+                negative = np.float64(abs(math.fsum(v for v in self.flow_14.values if v < 0)))
+                row['MFI'] = 100 - 100 / (1 + positive / negative)
+            else:
+                row['MFI'] = np.nan
+            self.volume_20.push(volume)
+            row['Volume_SMA'] = self.volume_20.mean()
+
+        # Support & Resistance
+        row['Pivot'] = typical
+        row['R1'] = 2 * typical - low
+        row['S1'] = 2 * typical - high
+        row['R2'] = typical + (high - low)
+        row['S2'] = typical - (high - low)
+
+        self.prev_close, self.prev_high, self.prev_low = close, high, low
+        self.prev_typical = typical
+        return {name: float(value) for name, value in row.items()}
+
+    def to_dict(self):
+        """JSON-serializable snapshot of the state"""
+        out = {}
+        for name, value in vars(self).items():
+            if isinstance(value, _Window):
+                out[name] = {'window': value.size, 'values': [float(v) for v in value.values]}
+            elif isinstance(value, _Smoother):
+                out[name] = {'alpha': value.alpha, 'min_periods': value.min_periods,
+                             'value': float(value.value), 'count': value.count}
+            elif isinstance(value, np.floating):
+                out[name] = float(value)
+            else:
+                out[name] = value
+        return out
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(has_volume=data.get('has_volume', True))
+        for name, value in data.items():
+            if isinstance(value, dict) and 'window' in value:
+                value = _Window(value['window'], value['values'])
+            elif isinstance(value, dict) and 'alpha' in value:
+                value = _Smoother(value['alpha'], value['min_periods'], value['value'], value['count'])
+            setattr(state, name, value)
+        return state
+
+    def copy(self):
+        return IndicatorState.from_dict(self.to_dict())
@@ -1,4 +1,7 @@
-import boto3, json
+import json
+import os
+import threading
+from concurrent.futures import as_completed
 from dotenv import load_dotenv
 from langchain_community.retrievers import AmazonKnowledgeBasesRetriever
 from langchain_community.chat_models.bedrock import BedrockChat
@@ -6,17 +9,30 @@ from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
 from langchain.chains import RetrievalQA
+import bedrock_client
+import bedrock_stream
+import prompts
+from response_cache import response_cache
+from retrieval_cache import CachedRetriever
 
 load_dotenv()
 
-def call_claude_sonet_stream(prompt):
+def call_claude_sonet_stream(prompt, use_cache=True):
     # Ensure prompt is a string
     if not isinstance(prompt, str):
         prompt = str(prompt)
-    
-    prompt_config = {
+    # Fail before the request rather than with a Bedrock validation error mid-stream
+    prompts.check(prompt, bedrock_client.MODEL_ID)
+    # Temperature is 0, so a repeated prompt can be answered from the response cache
+    if use_cache:
+        return response_cache.stream(prompt, invoke_claude_sonet_stream)
+    return invoke_claude_sonet_stream(prompt)
+
+def claude_request(prompt):
+    """Bedrock request body for a single-turn Claude prompt"""
+    return {
         "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 2000,
+        "max_tokens": prompts.output_tokens(bedrock_client.MODEL_ID),
         "temperature": 0, 
         "top_k": 0,
         "messages": [
@@ -29,53 +45,55 @@ def call_claude_sonet_stream(prompt):
         ],
     }
 
-    modelId = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+def invoke_claude_sonet_stream(prompt):
+    """Stream a Claude response from Bedrock, bypassing the response cache"""
+    return bedrock_stream.stream(claude_request(prompt), bedrock_client.MODEL_ID)
 
-    bedrock = boto3.client(service_name="bedrock-runtime")  
-    response = bedrock.invoke_model_with_response_stream(
-        body=json.dumps(prompt_config),
-        modelId=modelId,
-        accept="application/json", 
-        contentType="application/json"
-    )
+def complete_many(prompt_list, max_concurrency=4, on_progress=None):
+    """Full responses for several prompts, generated concurrently on the shared event loop.
 
-    stream = response['body']
-    if stream:
-        for event in stream:
-            chunk = event.get('chunk')
-            if chunk:
-                chunk_obj = json.loads(chunk.get('bytes').decode())
-                if 'delta' in chunk_obj:
-                    delta_obj = chunk_obj.get('delta', None)
-                    if delta_obj:
-                        text = delta_obj.get('text', None)
-                        yield text
+    prompt_list may be lazy: each generation starts as soon as its prompt is
+    produced. on_progress(done, total) is called from the calling thread as
+    generations finish. Bypasses the response cache; if one generation fails,
+    or producing a prompt fails, the rest are cancelled.
+    """
+    def bodies():
+        for prompt in prompt_list:
+            prompt = str(prompt)
+            prompts.check(prompt, bedrock_client.MODEL_ID)
+            yield claude_request(prompt)
+
+    futures = []
+    try:
+        futures.extend(bedrock_stream.submit_many(bodies(), bedrock_client.MODEL_ID, max_concurrency))
+        for done, future in enumerate(as_completed(futures), 1):
+            future.result()
+            if on_progress:
+                on_progress(done, len(futures))
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return [future.result() for future in futures]
                     
-def rewrite_document(input_text): 
-    prompt = """Your name is good writer. You need to rewrite content: 
+# The content is a trimmable document: an oversized input is cut to the input budget
+# instead of raising PromptTooLongError
+REWRITE_TEMPLATE = """Your name is good writer. You need to rewrite content: 
         \n\nHuman: here is the content
-        <text>""" + str(input_text) + """</text>
+        <text>{documents}</text>
     \n\nAssistant: """
-    return call_claude_sonet_stream(prompt)
-
 
-def summary_stream(input_text):     
-    prompt = f"""Based on the provided context, create summary of the final content. Provide summary in Vietnamese.
+SUMMARY_STREAM_TEMPLATE = """Based on the provided context, create summary of the final content. Provide summary in Vietnamese.
         \n\nHuman: here is the content
-        <text>""" + str(input_text) + """</text>
+        <text>{documents}</text>
     \n\nAssistant: """
-    return call_claude_sonet_stream(prompt)
 
-def query_document(question, docs): 
-    prompt = """Human: here is the content:
-        <text>""" + str(docs) + """</text>
-        Question: """ + question + """ 
+QUERY_DOCUMENT_TEMPLATE = """Human: here is the content:
+        <text>{documents}</text>
+        Question: {question} 
     \n\nAssistant: """
 
-    return call_claude_sonet_stream(prompt)
-
-def create_questions(input_text, callback): 
-    system_prompt = """You are an expert in creating high-quality multiple-choice quesitons and answer pairs 
+QUESTIONS_SYSTEM_PROMPT = """You are an expert in creating high-quality multiple-choice quesitons and answer pairs 
     based on a given context. Based on the given context (e.g a passage, a paragraph, or a set of information), you should:
     1. Come up with thought-provoking multiple-choice questions that assess the reader's understanding of the context. 
     2. The questions should be clear and concise.
@@ -96,31 +114,39 @@ def create_questions(input_text, callback):
     Continue with additional questions and answer pairs as needed.
 
     MAKE SURE TO INCLUDE THE FULL CORRECT ANSWER AT THE END, NO EXPLANATION NEEDED:"""
-    
-    prompt = f"""{system_prompt}. Based on the provided context, create 10 multiple-choice questions and answer pairs
+
+QUESTIONS_TEMPLATE = QUESTIONS_SYSTEM_PROMPT + """. Based on the provided context, create 10 multiple-choice questions and answer pairs
         \n\nHuman: here is the content
-        <text>""" + str(input_text) + """</text>
+        <text>{documents}</text>
     \n\nAssistant: """
-    return call_claude_sonet_stream(prompt)
 
-def suggest_writing_document(input_text): 
-    prompt = """Your name is good writer. You need to suggest and correct mistake in the essay: 
+SUGGEST_WRITING_TEMPLATE = """Your name is good writer. You need to suggest and correct mistake in the essay: 
         \n\nHuman: here is the content
-        <text>""" + str(input_text) + """</text>
+        <text>{documents}</text>
     \n\nAssistant: """
-    return call_claude_sonet_stream(prompt)
 
-def search(question, callback):
-    retriever = AmazonKnowledgeBasesRetriever(
-        knowledge_base_id="EWVHJIY9AS",
-        retrieval_config={"vectorSearchConfiguration": 
-                          {"numberOfResults": 3,
-                           'overrideSearchType': "SEMANTIC", # optional
-                           }
-                          },
-    )
+def rewrite_document(input_text): 
+    return call_claude_sonet_stream(prompts.build_prompt(REWRITE_TEMPLATE, documents=[str(input_text)]))
+
+
+def summary_stream(input_text):     
+    return call_claude_sonet_stream(prompts.build_prompt(SUMMARY_STREAM_TEMPLATE, documents=[str(input_text)]))
+
+def query_document(question, docs): 
+    return call_claude_sonet_stream(prompts.build_prompt(QUERY_DOCUMENT_TEMPLATE, documents=[str(docs)],
+                                                         question=question))
+
+def create_questions(input_text, callback): 
+    return call_claude_sonet_stream(prompts.build_prompt(QUESTIONS_TEMPLATE, documents=[str(input_text)]))
 
-    system_prompt = """
+def suggest_writing_document(input_text): 
+    return call_claude_sonet_stream(prompts.build_prompt(SUGGEST_WRITING_TEMPLATE, documents=[str(input_text)]))
+
+KNOWLEDGE_BASE_ID = os.getenv('KNOWLEDGE_BASE_ID', 'EWVHJIY9AS')
+KNOWLEDGE_BASE_RESULTS = int(os.getenv('KNOWLEDGE_BASE_RESULTS', '3'))
+MAX_QUERY_LENGTH = 1000
+
+SEARCH_SYSTEM_PROMPT = """
         You are a financial advisor AI system with deep market insights. Impress all customers with your financial data 
         and market trends analysis. Investigate and analyze specific trading strategies, 
         technical analysis, and technical tools, or market structures. Provide a comprehensive overview of the chosen topic, 
@@ -133,69 +159,72 @@ def search(question, callback):
         {context}
         """
 
-    # Truncate the question if it's too long
-    max_query_length = 1000
-    truncated_question = question[:max_query_length] if len(question) > max_query_length else question
-    bedrock_client = boto3.client('bedrock-runtime', region_name = 'us-east-1')
+_chains = {}
+_chains_lock = threading.Lock()
+
+def get_chain(name, build):
+    """Process-wide chain built once by build(); callbacks are bound per invoke, not at construction"""
+    chain = _chains.get(name)
+    if chain is None:
+        with _chains_lock:
+            chain = _chains.get(name)
+            if chain is None:
+                chain = _chains[name] = build()
+    return chain
+
+def knowledge_base_retriever():
+    """Knowledge-base retriever whose results are cached by normalized query"""
+    return CachedRetriever(retriever=AmazonKnowledgeBasesRetriever(
+        knowledge_base_id=KNOWLEDGE_BASE_ID,
+        client=bedrock_client.get_client("bedrock-agent-runtime"),
+        retrieval_config={"vectorSearchConfiguration": 
+                          {"numberOfResults": KNOWLEDGE_BASE_RESULTS,
+                           'overrideSearchType': "SEMANTIC", # optional
+                           }
+                          },
+    ))
 
-    model_kwargs_claude = { "temperature": 0.5, "top_p": 1}
+def build_search_chain():
     llm = BedrockChat(
-        model_id="anthropic.claude-3-5-sonnet-20240620-v1:0",
-        client=bedrock_client,
-        model_kwargs=model_kwargs_claude,
+        model_id=bedrock_client.MODEL_ID,
+        client=bedrock_client.get_bedrock_runtime(region_name='us-east-1'),
+        model_kwargs={"temperature": 0.5, "top_p": 1},
         streaming=True,
-        callbacks=[callback]
     )
 
     prompt = ChatPromptTemplate.from_messages(
     [
-        SystemMessagePromptTemplate.from_template(system_prompt),
-        HumanMessagePromptTemplate.from_template("input")
+        SystemMessagePromptTemplate.from_template(SEARCH_SYSTEM_PROMPT),
+        HumanMessagePromptTemplate.from_template("{input}")
     ]
     )
 
     # Create the chain with the custom prompt
     question_answer_chain = create_stuff_documents_chain(llm, prompt)
-    chain = create_retrieval_chain(retriever, question_answer_chain)
+    return create_retrieval_chain(knowledge_base_retriever(), question_answer_chain)
+
+def build_search_old_chain():
+    llm = BedrockChat(model_id=bedrock_client.MODEL_ID
+                      , client=bedrock_client.get_bedrock_runtime()
+                      , model_kwargs={"max_tokens": 2000}
+                      , streaming=True)
+
+    return RetrievalQA.from_chain_type(
+        llm=llm, retriever=knowledge_base_retriever(), return_source_documents=True
+    )
 
-    # Invoke the chain with the necessary inputs
-    return chain.invoke( {
+def search(question, callback):
+    # Truncate the question if it's too long
+    truncated_question = question[:MAX_QUERY_LENGTH]
+
+    # The callback receives the streamed tokens of this request only
+    return get_chain('search', build_search_chain).invoke({
         "input": truncated_question  
-    })
+    }, config={"callbacks": [callback]})
 
 def searchOld(question, callback):
-    retriever = AmazonKnowledgeBasesRetriever(
-        knowledge_base_id="EWVHJIY9AS",
-        retrieval_config={"vectorSearchConfiguration": 
-                          {"numberOfResults": 3,
-                           'overrideSearchType': "SEMANTIC", # optional
-                           }
-                          },
-    )
-    system_prompt = """
-        You are a financial advisor AI system with deep market insights. Impress all customers with your financial data 
-        and market trends analysis. Investigate and analyze specific trading strategies, 
-        technical analysis, and technical tools, or market structures. Provide a comprehensive overview of the chosen topic, 
-        ensuring the explanation is both in-depth and understandable for traders of all levels. 
-        Utilize your expertise and available market analysis tools to scan, filter, and evaluate potential assets for trading. 
-        Once identified, create a comprehensive list with supporting data for each asset, indicating why it meets the criteria. 
-        Ensure that all information is up-to-date and relevant to the current market conditions. 
-        If you don't know the answer, just say that you don't know, don't try to make up an answer.
-        Provide your answer in Vietnamese.
-        {context}
-        """
-    question = question
-    query = f"""{system_prompt}. Based on the provided context, provide the answer to the following question:
+    query = f"""{SEARCH_SYSTEM_PROMPT}. Based on the provided context, provide the answer to the following question:
     Question: {question}
     Answer: 
     """
-    model_kwargs_claude = {"max_tokens": 2000}
-    llm = BedrockChat(model_id="anthropic.claude-3-5-sonnet-20240620-v1:0"
-                      , model_kwargs=model_kwargs_claude
-                      , streaming=True
-                      , callbacks=[callback])
-
-    chain = RetrievalQA.from_chain_type(
-        llm=llm, retriever=retriever, return_source_documents=True
-    )
-    return chain.invoke(query)
\ No newline at end of file
+    return get_chain('search_old', build_search_old_chain).invoke(query, config={"callbacks": [callback]})
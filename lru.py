@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from singleflight import SingleFlight
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU cache shared by every session in the process.
+
+    With a ttl (seconds), entries older than ttl are treated as missing.
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._flight = SingleFlight()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                expires, value = self._data[key]
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def __contains__(self, key):
+        """Membership test that does not count as a lookup or refresh recency"""
+        sentinel = object()
+        return self._peek(key, sentinel) is not sentinel
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl if self.ttl else None, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _peek(self, key, default=None):
+        """Live value for key without counting a lookup or refreshing recency"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                return entry[1]
+            return default
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss.
+
+        Concurrent misses for the same key share one compute() call.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self._flight.do(key, lambda: self._compute(key, compute, sentinel))
+        return value
+
+    def _compute(self, key, compute, sentinel):
+        # A caller that missed just before another finished finds the stored value here
+        value = self._peek(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
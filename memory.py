@@ -0,0 +1,116 @@
+"""
+Rolling conversation memory for the chat pages.
+
+The newest turns are sent verbatim; everything older is folded into a running
+summary. The summary is updated incrementally on a background thread, so a
+turn never waits for it: until a fold finishes, the previous summary is used.
+The history part of a prompt is capped at MEMORY_HISTORY_TOKENS, so the cost
+and latency of a turn stay flat however long the session runs.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import prompts
+
+KEEP_TURNS = int(os.getenv('MEMORY_KEEP_TURNS', '4'))
+HISTORY_TOKENS = int(os.getenv('MEMORY_HISTORY_TOKENS', '2000'))
+SUMMARY_WORDS = int(os.getenv('MEMORY_SUMMARY_WORDS', '200'))
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and a financial assistant.
+Keep the user's goals, holdings, constraints and risk tolerance, the tickers and figures discussed,
+and the advice already given. Drop pleasantries. Use at most {words} words.
+
+<summary>
+{summary}
+</summary>
+
+<new_turns>
+{history}
+</new_turns>
+
+Updated summary:"""
+
+ROLES = {'user': 'User', 'assistant': 'Assistant'}
+
+_folds = ThreadPoolExecutor(max_workers=2, thread_name_prefix='memory-fold')
+
+
+def format_turn(message):
+    return f"{ROLES.get(message['role'], message['role'])}: {message['content']}"
+
+
+def summarize(summary, messages, words=SUMMARY_WORDS):
+    """New running summary from the previous one and the messages being folded in"""
+    import libs as glib
+    prompt = prompts.build_prompt(SUMMARY_PROMPT, history=[format_turn(m) for m in messages],
+                                  summary=summary or '(empty)', words=words)
+    # Summaries are per conversation, the response cache would never hit
+    return "".join(t for t in glib.call_claude_sonet_stream(prompt, use_cache=False) if t).strip()
+
+
+class ConversationMemory:
+    """Last keep_turns turns verbatim plus a background-updated summary of older ones"""
+
+    def __init__(self, keep_turns=KEEP_TURNS, history_tokens=HISTORY_TOKENS, summarizer=summarize):
+        self.keep_turns = keep_turns
+        self.history_tokens = history_tokens
+        self.summarizer = summarizer
+        self.summary = ''
+        self.summarized = 0  # messages[:summarized] are folded into the summary
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.summary = ''
+            self.summarized = 0
+            self._pending = None
+
+    def _collect(self):
+        """Adopt a finished fold, if any; never waits"""
+        pending = self._pending
+        if pending is None or not pending[1].done():
+            return
+        self._pending = None
+        end, future = pending
+        try:
+            self.summary = future.result()
+            self.summarized = end
+        except Exception as e:
+            # Keep the previous summary; the same messages are folded again next turn
+            print(f"Conversation summary failed: {e}")
+
+    def _verbatim_start(self, messages):
+        """Index of the oldest message sent verbatim: at most keep_turns turns within the token cap"""
+        budget = self.history_tokens - prompts.count_tokens(self.summary)
+        start, used = len(messages), 0
+        while start > self.summarized and len(messages) - start < 2 * self.keep_turns:
+            cost = prompts.count_tokens(format_turn(messages[start - 1]))
+            # The newest message is always kept (truncated if needed)
+            if used + cost > budget and start < len(messages):
+                break
+            used += cost
+            start -= 1
+        return start
+
+    def history(self, messages):
+        """History parts for prompts.build_prompt, oldest first, for the messages before the current prompt"""
+        with self._lock:
+            if len(messages) < self.summarized:
+                # The conversation was cleared
+                self.summary, self.summarized, self._pending = '', 0, None
+            self._collect()
+            start = self._verbatim_start(messages)
+            if start > self.summarized and self._pending is None:
+                # Fold the messages that left the verbatim window, off the request path
+                self._pending = (start, _folds.submit(self.summarizer, self.summary, messages[self.summarized:start]))
+            summary, summarized = self.summary, self.summarized
+
+        parts = [f"Summary of the earlier conversation: {summary}"] if summary else []
+        budget = self.history_tokens - prompts.count_tokens(parts[0] if parts else '')
+        turns = prompts.fit([format_turn(m) for m in messages[start:]][::-1], budget)[::-1]
+        budget -= sum(prompts.count_tokens(t) for t in turns) + prompts.count_tokens('\n\n') * len(turns)
+        # Turns that left the window but are not in the summary yet (fold pending or failed)
+        # fill what is left of the budget, newest first, so follow-ups keep their context
+        unfolded = prompts.fit([format_turn(m) for m in messages[summarized:start]][::-1], budget)[::-1]
+        return parts + unfolded + turns
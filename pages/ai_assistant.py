@@ -6,7 +6,10 @@ from dotenv import load_dotenv
 from datetime import date, datetime, timedelta
 import pandas as pd
 import os
-from polygon_client import PolygonClient
+import sys
+sys.path.append('scripts')
+import polygon_client
+from stock_data_client import StockDataClient
 from bs4 import BeautifulSoup
 import re
 import requests
@@ -14,69 +17,54 @@ from langchain.agents import Tool, create_react_agent, AgentExecutor
 from langchain import hub
 from langchain_community.callbacks.streamlit import StreamlitCallbackHandler
 import base
-
-# Modern CSS styling
-st.markdown("""
-<style>
-    .main-header {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        padding: 2rem;
-        border-radius: 10px;
-        margin-bottom: 2rem;
-        text-align: center;
-        color: white;
-    }
-    .agent-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        margin: 1rem 0;
-        border-left: 4px solid #667eea;
-    }
-    .tool-section {
-        background: #f8f9fa;
-        padding: 1rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-    }
-    .chat-container {
-        background: white;
-        border-radius: 15px;
-        padding: 1rem;
-        margin: 1rem 0;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.05);
-    }
-    .reportview-container {
-        margin-top: -2em;
-    }
-    #MainMenu {visibility: hidden;}
-    .stDeployButton {display:none;}
-    footer {visibility: hidden;}
-    #stDecoration {display:none;}
-</style>
-""", unsafe_allow_html=True)
-
-# Header
-st.markdown("""
-<div class="main-header">
-    <h1>🤖 AI Stock Assistant</h1>
-    <p>Advanced AI agent with real-time market data and analysis tools</p>
-</div>
-""", unsafe_allow_html=True)
+import bedrock_client
+import resilience
+import libs as glib
+import prompts
+import streaming
 
 load_dotenv()
 
+# Enhanced prompt for AI assistant
+ASSISTANT_TEMPLATE = """
+                    Context: AI Stock Assistant - Advanced Market Analysis & Investment Guidance
+                    
+                    Role: You are an expert AI stock assistant with deep knowledge of:
+                    - Real-time market analysis and trends
+                    - Company fundamentals and technical analysis  
+                    - Portfolio optimization and risk management
+                    - Economic indicators and market sentiment
+                    
+                    Task: Provide comprehensive stock market assistance
+                    
+                    Analysis Approach:
+                    1. MARKET CONTEXT: Current market conditions and trends
+                    2. STOCK ANALYSIS: Fundamental and technical evaluation
+                    3. RISK ASSESSMENT: Identify potential risks and opportunities
+                    4. STRATEGIC RECOMMENDATIONS: Actionable investment insights
+                    5. PORTFOLIO IMPACT: How this fits into broader investment strategy
+                    
+                    Response Style:
+                    - Professional yet accessible language
+                    - Data-driven insights with specific examples
+                    - Clear structure with headers and bullet points
+                    - Balanced perspective showing multiple viewpoints
+                    - Practical next steps for the investor
+                    
+                    {history}
+                    
+                    User Query: {prompt}
+                    """
+
 # Initialize AWS Bedrock
 def init_bedrock():
     try:
-        bedrock_runtime = boto3.client(
-            service_name="bedrock-runtime",
+        model_id = bedrock_client.MODEL_ID
+        bedrock_runtime = bedrock_client.get_bedrock_runtime(
             region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
+            model_id=model_id,
         )
         
-        model_id = "anthropic.claude-3-5-sonnet-20240620-v1:0"
-        
         model_kwargs = {
             "max_tokens": 2048,
             "temperature": 0.0,
@@ -94,11 +82,20 @@ def init_bedrock():
         st.error(f"Error initializing Bedrock: {str(e)}")
         return None
 
+_llm = None
+
+def get_llm():
+    """Chat model shared by every rerun and session, built on first use"""
+    global _llm
+    if _llm is None:
+        _llm = init_bedrock()
+    return _llm
+
 # Stock data tools
 def get_stock_price(symbol):
     """Get current stock price and basic info using Polygon.io"""
     try:
-        client = PolygonClient()
+        client = polygon_client.default_client
         df = client.get_stock_data(symbol, days=5)
         
         if df is None or df.empty:
@@ -147,6 +144,10 @@ def get_stock_price(symbol):
 - Try again in a few moments
         """
 
+def tool_stream(tool, *args):
+    """Run a tool lazily as a one-chunk stream, so its output renders like a model response"""
+    yield tool(*args)
+
 def get_stock_news(symbol):
     """Get recent news for a stock - simplified version"""
     try:
@@ -166,13 +167,13 @@ def get_market_summary():
 def analyze_stock_performance(symbol, period="1mo"):
     """Analyze stock performance over a period"""
     try:
-        client = PolygonClient()
+        client = StockDataClient()
         days_map = {"1mo": 30, "3mo": 90, "6mo": 180, "1y": 365}
         days = days_map.get(period, 30)
         
         df = client.get_stock_data(symbol, days=days)
         
-        if not df.empty:
+        if df is not None and not df.empty:
             start_price = df['Close'].iloc[0]
             end_price = df['Close'].iloc[-1]
             total_return = ((end_price - start_price) / start_price) * 100
@@ -230,161 +231,195 @@ tools = [
     )
 ]
 
-# Initialize session state
-base.init_stock_advisor()
-base.init_slidebar()
-
-# Agent capabilities section
-st.markdown("### 🛠️ Agent Capabilities")
-col1, col2, col3, col4 = st.columns(4)
+def render():
+    """Render the AI Assistant page"""
+    # Modern CSS styling
+    st.markdown("""
+<style>
+    .main-header {
+        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+        padding: 2rem;
+        border-radius: 10px;
+        margin-bottom: 2rem;
+        text-align: center;
+        color: white;
+    }
+    .agent-card {
+        background: white;
+        padding: 1.5rem;
+        border-radius: 10px;
+        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        margin: 1rem 0;
+        border-left: 4px solid #667eea;
+    }
+    .tool-section {
+        background: #f8f9fa;
+        padding: 1rem;
+        border-radius: 10px;
+        margin: 1rem 0;
+    }
+    .chat-container {
+        background: white;
+        border-radius: 15px;
+        padding: 1rem;
+        margin: 1rem 0;
+        box-shadow: 0 2px 10px rgba(0,0,0,0.05);
+    }
+    .reportview-container {
+        margin-top: -2em;
+    }
+    #MainMenu {visibility: hidden;}
+    .stDeployButton {display:none;}
+    footer {visibility: hidden;}
+    #stDecoration {display:none;}
+</style>
+""", unsafe_allow_html=True)
 
-with col1:
+    # Header
     st.markdown("""
+<div class="main-header">
+    <h1>🤖 AI Stock Assistant</h1>
+    <p>Advanced AI agent with real-time market data and analysis tools</p>
+</div>
+""", unsafe_allow_html=True)
+
+    # Initialize session state
+    base.init_stock_advisor()
+    base.init_slidebar()
+
+    # Agent capabilities section
+    st.markdown("### 🛠️ Agent Capabilities")
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.markdown("""
     <div class="agent-card">
         <h4>📊 Real-time Data</h4>
         <p>Live stock prices, market indices, and trading volumes</p>
     </div>
     """, unsafe_allow_html=True)
 
-with col2:
-    st.markdown("""
+    with col2:
+        st.markdown("""
     <div class="agent-card">
         <h4>📰 News Analysis</h4>
         <p>Latest financial news and market-moving events</p>
     </div>
     """, unsafe_allow_html=True)
 
-with col3:
-    st.markdown("""
+    with col3:
+        st.markdown("""
     <div class="agent-card">
         <h4>📈 Technical Analysis</h4>
         <p>Moving averages, volatility, and performance metrics</p>
     </div>
     """, unsafe_allow_html=True)
 
-with col4:
-    st.markdown("""
+    with col4:
+        st.markdown("""
     <div class="agent-card">
         <h4>🎯 Smart Insights</h4>
         <p>AI-powered analysis and investment recommendations</p>
     </div>
     """, unsafe_allow_html=True)
 
-# Sample queries
-st.markdown("### 💡 Try These Queries")
-sample_queries = [
-    "What's the current price of Apple (AAPL) and recent news?",
-    "Analyze Tesla's performance over the last month",
-    "Give me a market summary for today",
-    "Compare Microsoft and Google stock performance",
-    "What are the best performing tech stocks this week?",
-    "Explain the current market trends"
-]
+    # Sample queries
+    st.markdown("### 💡 Try These Queries")
+    sample_queries = [
+        "What's the current price of Apple (AAPL) and recent news?",
+        "Analyze Tesla's performance over the last month",
+        "Give me a market summary for today",
+        "Compare Microsoft and Google stock performance",
+        "What are the best performing tech stocks this week?",
+        "Explain the current market trends"
+    ]
 
-cols = st.columns(3)
-for i, query in enumerate(sample_queries):
-    with cols[i % 3]:
-        if st.button(query, key=f"sample_{i}"):
-            st.session_state.messages.append({"role": "user", "content": query})
-            st.rerun()
-
-# Chat interface
-st.markdown("### 💬 Chat with AI Agent")
-st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-
-# Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"], avatar=base.icons[message["role"]]):
-        st.write(message["content"])
-
-# Chat input
-if prompt := st.chat_input("Ask me about stocks, market analysis, or investment advice..."):
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    
-    with st.chat_message("user", avatar=base.icons["user"]):
-        st.write(prompt)
-
-# Generate response with agent
-if st.session_state.messages[-1]["role"] != "assistant":
-    with st.chat_message("assistant", avatar=base.icons["assistant"]):
-        st_callback = StreamlitCallbackHandler(st.container())
-        
-        # Get the user's prompt with safety check
-        user_prompt = ""
-        if st.session_state.messages and len(st.session_state.messages) > 0:
-            last_message = st.session_state.messages[-1]
-            if last_message and "content" in last_message:
-                user_prompt = last_message["content"] or ""
-        
-        if not user_prompt:
-            st.error("Please enter a valid question.")
-            st.stop()
-        
-        # Initialize LLM and agent
-        llm = init_bedrock()
-        if llm:
-            try:
-                # Simple tool execution without complex agent
-                if user_prompt and "price" in user_prompt.lower() and any(word in user_prompt.upper() for word in ["AAPL", "TSLA", "MSFT", "GOOGL", "AMZN"]):
-                    # Extract symbol and get price
-                    for symbol in ["AAPL", "TSLA", "MSFT", "GOOGL", "AMZN"]:
-                        if symbol in user_prompt.upper():
-                            response = get_stock_price(symbol)
-                            break
-                elif user_prompt and "news" in user_prompt.lower():
-                    response = "Please specify a stock symbol for news lookup."
-                elif user_prompt and "market" in user_prompt.lower():
-                    response = get_market_summary()
-                else:
-                    # Enhanced prompt for AI assistant
-                    enhanced_prompt = f"""
-                    Context: AI Stock Assistant - Advanced Market Analysis & Investment Guidance
-                    
-                    Role: You are an expert AI stock assistant with deep knowledge of:
-                    - Real-time market analysis and trends
-                    - Company fundamentals and technical analysis  
-                    - Portfolio optimization and risk management
-                    - Economic indicators and market sentiment
-                    
-                    Task: Provide comprehensive stock market assistance
-                    
-                    Analysis Approach:
-                    1. MARKET CONTEXT: Current market conditions and trends
-                    2. STOCK ANALYSIS: Fundamental and technical evaluation
-                    3. RISK ASSESSMENT: Identify potential risks and opportunities
-                    4. STRATEGIC RECOMMENDATIONS: Actionable investment insights
-                    5. PORTFOLIO IMPACT: How this fits into broader investment strategy
-                    
-                    Response Style:
-                    - Professional yet accessible language
-                    - Data-driven insights with specific examples
-                    - Clear structure with headers and bullet points
-                    - Balanced perspective showing multiple viewpoints
-                    - Practical next steps for the investor
-                    
-                    User Query: {user_prompt if user_prompt else "General market inquiry"}
-                    """
-                    
-                    # Use regular Bedrock for general queries
-                    import libs as glib
-                    response_stream = glib.call_claude_sonet_stream(enhanced_prompt)
-                    response = ""
-                    for chunk in response_stream:
-                        response += chunk
-                
-                st.write(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
-            except Exception as e:
-                error_msg = f"I encountered an error: {str(e)}. Please try rephrasing your question."
+    cols = st.columns(3)
+    for i, query in enumerate(sample_queries):
+        with cols[i % 3]:
+            if st.button(query, key=f"sample_{i}"):
+                st.session_state.messages.append({"role": "user", "content": query})
+                st.rerun()
+
+    # Chat interface
+    st.markdown("### 💬 Chat with AI Agent")
+    st.markdown('<div class="chat-container">', unsafe_allow_html=True)
+
+    # Display chat messages
+    for message in st.session_state.messages:
+        with st.chat_message(message["role"], avatar=base.icons[message["role"]]):
+            st.write(message["content"])
+
+    # Chat input
+    if prompt := st.chat_input("Ask me about stocks, market analysis, or investment advice..."):
+        st.session_state.messages.append({"role": "user", "content": prompt})
+
+        with st.chat_message("user", avatar=base.icons["user"]):
+            st.write(prompt)
+
+    # Generate response with agent
+    if st.session_state.messages[-1]["role"] != "assistant":
+        with st.chat_message("assistant", avatar=base.icons["assistant"]):
+            st_callback = StreamlitCallbackHandler(st.container())
+
+            # Get the user's prompt with safety check
+            user_prompt = ""
+            if st.session_state.messages and len(st.session_state.messages) > 0:
+                last_message = st.session_state.messages[-1]
+                if last_message and "content" in last_message:
+                    user_prompt = last_message["content"] or ""
+
+            if not user_prompt:
+                st.error("Please enter a valid question.")
+                st.stop()
+
+            # Initialize LLM and agent
+            llm = get_llm()
+            if llm:
+                # Tool status, then the answer, is drawn here as soon as it is available
+                answer_placeholder = st.empty()
+                try:
+                    # Simple tool execution without complex agent
+                    if user_prompt and "price" in user_prompt.lower() and any(word in user_prompt.upper() for word in ["AAPL", "TSLA", "MSFT", "GOOGL", "AMZN"]):
+                        # Extract symbol and get price
+                        for symbol in ["AAPL", "TSLA", "MSFT", "GOOGL", "AMZN"]:
+                            if symbol in user_prompt.upper():
+                                answer_placeholder.caption(f"Fetching {symbol} price...")
+                                response_stream = tool_stream(get_stock_price, symbol)
+                                break
+                    elif user_prompt and "news" in user_prompt.lower():
+                        response_stream = ["Please specify a stock symbol for news lookup."]
+                    elif user_prompt and "market" in user_prompt.lower():
+                        answer_placeholder.caption("Fetching market summary...")
+                        response_stream = tool_stream(get_market_summary)
+                    else:
+                        # Enhanced prompt for AI assistant
+                        history = base.get_memory().history(st.session_state.messages[:-1])
+                        enhanced_prompt = prompts.build_prompt(
+                            ASSISTANT_TEMPLATE, prompt=user_prompt if user_prompt else "General market inquiry",
+                            history=history)
+
+                        # Use regular Bedrock for general queries
+                        response_stream = glib.call_claude_sonet_stream(enhanced_prompt)
+
+                    # Tokens are shown as they arrive; the full text is kept for the history
+                    response = streaming.render_stream(response_stream, answer_placeholder).text
+                    st.session_state.messages.append({"role": "assistant", "content": response})
+                except Exception as e:
+                    if resilience.is_throttle(e) or isinstance(e, resilience.CircuitOpenError):
+                        # Still throttled after retries; rephrasing would not help
+                        error_msg = "The AI service is busy right now. Please try again in a moment."
+                    else:
+                        error_msg = f"I encountered an error: {str(e)}. Please try rephrasing your question."
+                    st.error(error_msg)
+                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+            else:
+                error_msg = "Unable to initialize AI model. Please check your AWS configuration."
                 st.error(error_msg)
                 st.session_state.messages.append({"role": "assistant", "content": error_msg})
-        else:
-            error_msg = "Unable to initialize AI model. Please check your AWS configuration."
-            st.error(error_msg)
-            st.session_state.messages.append({"role": "assistant", "content": error_msg})
 
-st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
 
-# Footer
-st.markdown("---")
-st.markdown("🔧 **Powered by:** AWS Bedrock Claude 3.5 Sonnet | Yahoo Finance API | LangChain Agents")
+    # Footer
+    st.markdown("---")
+    st.markdown("🔧 **Powered by:** AWS Bedrock Claude 3.5 Sonnet | Yahoo Finance API | LangChain Agents")
@@ -2,20 +2,14 @@ import streamlit as st
 import streamlit.components.v1 as components
 import libs as glib 
 import base
+import prompts
 
-def generate_response(prompt):
-    if base.get_num_tokens(prompt) >= 1000000:
-        st.error("Conversation length too long. Please keep it under 1000000 tokens.")
-        st.button(
-            "🗑 Clear Chat History",
-            on_click=base.clear_chat_history,
-            key="clear_chat_history",
-        )
-        st.stop()
-
-    # Enhanced prompt for general chat
-    enhanced_prompt = f"""
+# Enhanced prompt for general chat
+CHAT_TEMPLATE = """
     Context: General financial consultation and market discussion
+    
+    {history}
+    
     User Query: {prompt}
     
     Instructions:
@@ -25,12 +19,29 @@ def generate_response(prompt):
     - Maintain professional yet conversational tone
     - Format response with proper structure (headers, bullets, etc.)
     """
+
+def generate_response(messages):
+    # Earlier turns come from the rolling memory: recent ones verbatim, older ones summarized
+    prompt = messages[-1]["content"]
+    history = base.get_memory().history(messages[:-1])
+    try:
+        enhanced_prompt = prompts.build_prompt(CHAT_TEMPLATE, prompt=prompt, history=history)
+    except prompts.PromptTooLongError as e:
+        st.error(f"Message too long ({e.tokens:,} tokens). Please keep it under {e.budget:,} tokens.")
+        st.button(
+            "🗑 Clear Chat History",
+            on_click=base.clear_chat_history,
+            key="clear_chat_history",
+        )
+        st.stop()
     
     response = glib.call_claude_sonet_stream(enhanced_prompt)
     return response
 
-# Modern CSS styling
-st.markdown("""
+def render():
+    """Render the Chat page"""
+    # Modern CSS styling
+    st.markdown("""
 <style>
     .main-header {
         background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
@@ -71,23 +82,23 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Header
-st.markdown("""
+    # Header
+    st.markdown("""
 <div class="main-header">
     <h1>💰 Finance Chatbot</h1>
     <p>Your AI-powered financial analysis assistant</p>
 </div>
 """, unsafe_allow_html=True)
 
-# Initialize states
-base.init_home_state(None)
-base.init_slidebar()
+    # Initialize states
+    base.init_home_state(None)
+    base.init_slidebar()
 
-# Welcome section
-if len(st.session_state.messages) == 1:
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        st.markdown("""
+    # Welcome section
+    if len(st.session_state.messages) == 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            st.markdown("""
         <div class="feature-card">
             <h3>🚀 Getting Started</h3>
             <p>Ask me about:</p>
@@ -100,55 +111,55 @@ if len(st.session_state.messages) == 1:
         </div>
         """, unsafe_allow_html=True)
 
-# Chat interface
-st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-
-# Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"], avatar=base.icons[message["role"]]):
-        st.write(message["content"])
-        if message == st.session_state["messages"][0]:
-            if st.button("About Finance Chatbot?"):
-                st.info("Finance Chatbot is your AI-powered assistant for financial analysis, market insights, and investment guidance. Ask me anything about stocks, markets, or financial planning!")
-
-# Chat input
-if prompt := st.chat_input("Ask me about finance, stocks, or investments..."):
-    st.session_state.show_animation = False
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    
-    with st.chat_message("user", avatar=base.icons["user"]):
-        st.write(prompt)
-
-# Generate response
-if st.session_state.messages[-1]["role"] != "assistant":
-    with st.chat_message("assistant", avatar=base.icons["assistant"]):
-        response = generate_response(prompt)
-        full_response = st.write_stream(response)
-        message = {"role": "assistant", "content": full_response}
-        st.session_state.messages.append(message)
-
-st.markdown('</div>', unsafe_allow_html=True)
-
-# Quick actions
-st.markdown("### 🎯 Quick Actions")
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    if st.button("📈 Market Analysis", use_container_width=True):
-        st.session_state.messages.append({"role": "user", "content": "Give me a current market analysis"})
-        st.rerun()
-
-with col2:
-    if st.button("💹 Stock Picks", use_container_width=True):
-        st.session_state.messages.append({"role": "user", "content": "Suggest some good stock picks for today"})
-        st.rerun()
-
-with col3:
-    if st.button("📊 Portfolio Review", use_container_width=True):
-        st.session_state.messages.append({"role": "user", "content": "How should I review my investment portfolio?"})
-        st.rerun()
-
-with col4:
-    if st.button("💰 Investment Tips", use_container_width=True):
-        st.session_state.messages.append({"role": "user", "content": "Give me some investment tips for beginners"})
-        st.rerun()
+    # Chat interface
+    st.markdown('<div class="chat-container">', unsafe_allow_html=True)
+
+    # Display chat messages
+    for message in st.session_state.messages:
+        with st.chat_message(message["role"], avatar=base.icons[message["role"]]):
+            st.write(message["content"])
+            if message == st.session_state["messages"][0]:
+                if st.button("About Finance Chatbot?"):
+                    st.info("Finance Chatbot is your AI-powered assistant for financial analysis, market insights, and investment guidance. Ask me anything about stocks, markets, or financial planning!")
+
+    # Chat input
+    if prompt := st.chat_input("Ask me about finance, stocks, or investments..."):
+        st.session_state.show_animation = False
+        st.session_state.messages.append({"role": "user", "content": prompt})
+
+        with st.chat_message("user", avatar=base.icons["user"]):
+            st.write(prompt)
+
+    # Generate response
+    if st.session_state.messages[-1]["role"] != "assistant":
+        with st.chat_message("assistant", avatar=base.icons["assistant"]):
+            response = generate_response(st.session_state.messages)
+            full_response = st.write_stream(response)
+            message = {"role": "assistant", "content": full_response}
+            st.session_state.messages.append(message)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Quick actions
+    st.markdown("### 🎯 Quick Actions")
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        if st.button("📈 Market Analysis", use_container_width=True):
+            st.session_state.messages.append({"role": "user", "content": "Give me a current market analysis"})
+            st.rerun()
+
+    with col2:
+        if st.button("💹 Stock Picks", use_container_width=True):
+            st.session_state.messages.append({"role": "user", "content": "Suggest some good stock picks for today"})
+            st.rerun()
+
+    with col3:
+        if st.button("📊 Portfolio Review", use_container_width=True):
+            st.session_state.messages.append({"role": "user", "content": "How should I review my investment portfolio?"})
+            st.rerun()
+
+    with col4:
+        if st.button("💰 Investment Tips", use_container_width=True):
+            st.session_state.messages.append({"role": "user", "content": "Give me some investment tips for beginners"})
+            st.rerun()
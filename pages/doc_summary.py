@@ -1,10 +1,42 @@
+import itertools
 import streamlit as st
 import streamlit.components.v1 as components
 import libs as glib 
 import base
+import summarizer
+import extraction
+import prompts
+import streaming
 
-# Modern CSS styling
-st.markdown("""
+SUMMARY_TEMPLATE = """
+                    Context: Document Summarization - Financial & Business Analysis
+                    
+                    Task: Create a {length} summary of the provided document, focusing on {focus}
+                    
+                    Document Content: {documents}
+                    
+                    Summary Framework:
+                    1. EXECUTIVE SUMMARY: Key points in 2-3 sentences
+                    2. MAIN TOPICS: Core themes and subjects covered
+                    3. KEY INSIGHTS: Important findings, data, or conclusions
+                    4. FINANCIAL IMPLICATIONS: Market impact, investment relevance
+                    5. ACTION ITEMS: Recommendations or next steps (if applicable)
+                    
+                    Summary Requirements:
+                    - Write in Vietnamese (as requested)
+                    - Use clear, professional language
+                    - Highlight critical information with bullet points
+                    - Maintain logical flow and structure
+                    - Focus on actionable insights
+                    - Keep summary concise but comprehensive
+                    
+                    Please provide a well-structured summary following this framework.
+                    """
+
+def render():
+    """Render the Document Summary page"""
+    # Modern CSS styling
+    st.markdown("""
 <style>
     .main-header {
         background: linear-gradient(90deg, #a8edea 0%, #fed6e3 100%);
@@ -53,18 +85,18 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Header
-st.markdown("""
+    # Header
+    st.markdown("""
 <div class="main-header">
     <h1>📄 Document Summary</h1>
     <p>AI-powered document analysis and summarization</p>
 </div>
 """, unsafe_allow_html=True)
 
-base.init_slidebar()
+    base.init_slidebar()
 
-# Features section
-st.markdown("""
+    # Features section
+    st.markdown("""
 <div class="feature-grid">
     <div class="feature-card">
         <h3>📝 Smart Summarization</h3>
@@ -85,170 +117,119 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Document upload section
-st.markdown("### 📤 Upload Document")
-st.markdown("""
+    # Document upload section
+    st.markdown("### 📤 Upload Document")
+    st.markdown("""
 <div class="upload-section">
     <h4>📁 Choose Your Document</h4>
     <p>Upload a document to get an AI-powered summary</p>
 </div>
 """, unsafe_allow_html=True)
 
-uploaded_file = st.file_uploader(
-    "Choose a file",
-    type=['pdf', 'txt', 'docx', 'md', 'py', 'js', 'html', 'css', 'json'],
-    help="Supported formats: TXT, PDF, DOCX, MD, and other text files (Max size: 10MB)"
-)
-
-# Summary options
-col1, col2 = st.columns(2)
-with col1:
-    summary_length = st.selectbox(
-        "Summary Length",
-        ["Brief (2-3 sentences)", "Medium (1 paragraph)", "Detailed (multiple paragraphs)"],
-        index=1
+    uploaded_file = st.file_uploader(
+        "Choose a file",
+        type=['pdf', 'txt', 'docx', 'md', 'py', 'js', 'html', 'css', 'json'],
+        help="Supported formats: TXT, PDF, DOCX, MD, and other text files (Max size: 10MB)"
     )
 
-with col2:
-    summary_focus = st.selectbox(
-        "Focus Area",
-        ["General Overview", "Key Points", "Action Items", "Financial Highlights", "Technical Details"],
-        index=0
-    )
+    # Summary options
+    col1, col2 = st.columns(2)
+    with col1:
+        summary_length = st.selectbox(
+            "Summary Length",
+            ["Brief (2-3 sentences)", "Medium (1 paragraph)", "Detailed (multiple paragraphs)"],
+            index=1
+        )
 
-# Process document
-if uploaded_file is not None:
-    st.success(f"✅ File uploaded: {uploaded_file.name}")
-    
-    if st.button("🚀 Generate Summary", use_container_width=True):
-        with st.spinner("🔄 Processing document..."):
-            try:
-                # Read file content
-                content = None
-                
-                if uploaded_file.type == "text/plain" or uploaded_file.name.endswith('.txt'):
-                    content = str(uploaded_file.read(), "utf-8")
-                elif uploaded_file.type == "application/pdf" or uploaded_file.name.endswith('.pdf'):
-                    try:
-                        import PyPDF2
-                        from io import BytesIO
-                        
-                        pdf_reader = PyPDF2.PdfReader(BytesIO(uploaded_file.read()))
-                        content = ""
-                        for page in pdf_reader.pages:
-                            content += page.extract_text()
-                    except ImportError:
-                        st.warning("PDF processing requires PyPDF2. Please install it or use text files.")
-                        content = None
-                elif uploaded_file.name.endswith('.docx'):
+    with col2:
+        summary_focus = st.selectbox(
+            "Focus Area",
+            ["General Overview", "Key Points", "Action Items", "Financial Highlights", "Technical Details"],
+            index=0
+        )
+
+    # Process document
+    if uploaded_file is not None:
+        st.success(f"✅ File uploaded: {uploaded_file.name}")
+
+        if st.button("🚀 Generate Summary", use_container_width=True):
+            with st.spinner("🔄 Processing document..."):
+                try:
+                    # Pages are read lazily; the map step starts on the first ones while the rest are parsed
+                    segments = extraction.iter_extract_cached(uploaded_file.getvalue(), uploaded_file.name, uploaded_file.type)
+                    content = None
                     try:
-                        from docx import Document
-                        from io import BytesIO
-                        
-                        doc = Document(BytesIO(uploaded_file.read()))
-                        content = ""
-                        for paragraph in doc.paragraphs:
-                            if paragraph.text:  # Check if paragraph has text
-                                content += paragraph.text + "\n"
-                    except ImportError:
-                        st.warning("DOCX processing requires python-docx. Please install it or use text files.")
-                        content = None
-                else:
-                    st.error("❌ Could not extract text from the document. Please try a different file or format.")
-                
-                if content and content.strip():
-                    # Create summary prompt
-                    prompt = f"""
-                    Please provide a {summary_length.lower()} summary of the following document, 
-                    focusing on {summary_focus.lower()}:
-                    
-                    Document Content:
-                    {content[:5000]}  # Limit content to avoid token limits
-                    
-                    Please structure your summary with:
-                    1. Main Topic/Purpose
-                    2. Key Points (3-5 bullet points)
-                    3. Important Details
-                    4. Conclusion/Recommendations (if applicable)
-                    """
-                    
-                    # Enhanced prompt for document summary
-                    enhanced_prompt = f"""
-                    Context: Document Summarization - Financial & Business Analysis
-                    
-                    Task: Create a comprehensive summary of the provided document
-                    
-                    Document Content: {text_content}
-                    
-                    Summary Framework:
-                    1. EXECUTIVE SUMMARY: Key points in 2-3 sentences
-                    2. MAIN TOPICS: Core themes and subjects covered
-                    3. KEY INSIGHTS: Important findings, data, or conclusions
-                    4. FINANCIAL IMPLICATIONS: Market impact, investment relevance
-                    5. ACTION ITEMS: Recommendations or next steps (if applicable)
-                    
-                    Summary Requirements:
-                    - Write in Vietnamese (as requested)
-                    - Use clear, professional language
-                    - Highlight critical information with bullet points
-                    - Maintain logical flow and structure
-                    - Focus on actionable insights
-                    - Keep summary concise but comprehensive
-                    
-                    Please provide a well-structured summary following this framework.
-                    """
-                    
-                    # Generate summary using your existing function
-                    response = glib.call_claude_sonet_stream(enhanced_prompt)
-                    
-                    st.markdown("### 📋 Document Summary")
-                    st.markdown('<div class="summary-card">', unsafe_allow_html=True)
-                    
-                    # Display streaming response
-                    summary_placeholder = st.empty()
-                    full_summary = ""
-                    
-                    for chunk in response:
-                        full_summary += chunk
-                        summary_placeholder.markdown(full_summary)
-                    
-                    st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    # Additional actions
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        if st.button("📋 Copy Summary"):
-                            st.success("Summary copied to clipboard!")
-                    
-                    with col2:
-                        if st.button("💾 Save Summary"):
-                            st.download_button(
-                                "Download Summary",
-                                full_summary,
-                                file_name=f"summary_{uploaded_file.name}.txt",
-                                mime="text/plain"
-                            )
-                    
-                    with col3:
-                        if st.button("🔄 Regenerate"):
-                            st.rerun()
-                            
-            except Exception as e:
-                st.error(f"Error processing document: {str(e)}")
+                        # Unsupported files fail on the first segment
+                        first = next(segments, None)
+                        content = None if first is None else itertools.chain([first], segments)
+                    except ImportError as e:
+                        st.warning(f"{e}. Please install it or use text files.")
+                    except UnicodeDecodeError:
+                        st.error("❌ Could not extract text from the document. Please try a different file or format.")
 
-# Sample documents section
-st.markdown("### 📚 Try Sample Documents")
-st.markdown("Don't have a document ready? Try these sample texts:")
+                    if content is not None:
+                        # Enhanced prompt for document summary; long documents arrive here as map-step notes
+                        def build_prompt(text_content):
+                            return prompts.build_prompt(SUMMARY_TEMPLATE, documents=[text_content],
+                                                        length=summary_length.lower(), focus=summary_focus.lower())
 
-sample_texts = {
-    "Financial Report": """
+                        progress = st.progress(0.0, text="Reading document...")
+
+                        def on_progress(level, done, total):
+                            stage = "sections" if level == 1 else f"notes (pass {level})"
+                            progress.progress(done / total, text=f"Summarized {done}/{total} {stage}")
+
+                        # Map-reduce over token-budgeted chunks; chunk notes are cached across reruns
+                        # A document without text raises EmptyDocumentError, reported below
+                        response = summarizer.summarize(content, build_prompt, on_progress)
+                        progress.empty()
+                        cache_stats = extraction.text_cache.stats()
+                        st.caption(f"Extraction cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                                   f"{cache_stats['bytes_saved'] / 1e6:.1f} MB of parsing skipped")
+
+                        st.markdown("### 📋 Document Summary")
+                        st.markdown('<div class="summary-card">', unsafe_allow_html=True)
+
+                        # Display streaming response, redrawn on a throttled cadence
+                        full_summary = streaming.render_stream(response, st.empty()).text
+
+                        st.markdown('</div>', unsafe_allow_html=True)
+
+                        # Additional actions
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            if st.button("📋 Copy Summary"):
+                                st.success("Summary copied to clipboard!")
+
+                        with col2:
+                            if st.button("💾 Save Summary"):
+                                st.download_button(
+                                    "Download Summary",
+                                    full_summary,
+                                    file_name=f"summary_{uploaded_file.name}.txt",
+                                    mime="text/plain"
+                                )
+
+                        with col3:
+                            if st.button("🔄 Regenerate"):
+                                st.rerun()
+
+                except Exception as e:
+                    st.error(f"Error processing document: {str(e)}")
+
+    # Sample documents section
+    st.markdown("### 📚 Try Sample Documents")
+    st.markdown("Don't have a document ready? Try these sample texts:")
+
+    sample_texts = {
+        "Financial Report": """
     Q3 2024 Financial Results: Revenue increased 15% year-over-year to $2.8 billion, 
     driven by strong performance in cloud services and AI products. Net income rose 
     22% to $680 million. The company expanded its market share in enterprise software 
     and launched three new AI-powered solutions. Operating expenses increased 8% due 
     to R&D investments. The board approved a $500 million share buyback program.
     """,
-    "Market Analysis": """
+        "Market Analysis": """
     The technology sector showed mixed performance in October 2024. While AI and 
     cloud computing stocks gained 12% on average, semiconductor companies declined 
     5% due to supply chain concerns. Interest rate expectations continue to influence 
@@ -256,7 +237,7 @@ sample_texts = {
     sheets and recurring revenue models. The upcoming earnings season will be crucial 
     for determining market direction.
     """,
-    "Business Strategy": """
+        "Business Strategy": """
     Our digital transformation initiative aims to modernize operations and improve 
     customer experience. Key objectives include: implementing cloud-based systems, 
     automating manual processes, and developing mobile applications. The project 
@@ -264,13 +245,13 @@ sample_texts = {
     30% reduction in processing time and 25% improvement in customer satisfaction. 
     Risk mitigation strategies address cybersecurity and change management challenges.
     """
-}
+    }
 
-cols = st.columns(3)
-for i, (title, text) in enumerate(sample_texts.items()):
-    with cols[i]:
-        if st.button(f"📄 {title}", use_container_width=True):
-            prompt = f"""
+    cols = st.columns(3)
+    for i, (title, text) in enumerate(sample_texts.items()):
+        with cols[i]:
+            if st.button(f"📄 {title}", use_container_width=True):
+                prompt = f"""
             Please provide a medium-length summary of the following {title.lower()}:
             
             {text}
@@ -281,34 +262,29 @@ for i, (title, text) in enumerate(sample_texts.items()):
             3. Important Details
             4. Conclusion/Recommendations (if applicable)
             """
-            
-            st.markdown(f"### 📋 Summary: {title}")
-            st.markdown('<div class="summary-card">', unsafe_allow_html=True)
-            
-            response = glib.call_claude_sonet_stream(prompt)
-            summary_placeholder = st.empty()
-            full_summary = ""
-            
-            for chunk in response:
-                full_summary += chunk
-                summary_placeholder.markdown(full_summary)
-            
-            st.markdown('</div>', unsafe_allow_html=True)
 
-# Tips section
-st.markdown("### 💡 Tips for Better Summaries")
-tips_col1, tips_col2 = st.columns(2)
+                st.markdown(f"### 📋 Summary: {title}")
+                st.markdown('<div class="summary-card">', unsafe_allow_html=True)
 
-with tips_col1:
-    st.markdown("""
+                response = glib.call_claude_sonet_stream(prompt)
+                streaming.render_stream(response, st.empty())
+
+                st.markdown('</div>', unsafe_allow_html=True)
+
+    # Tips section
+    st.markdown("### 💡 Tips for Better Summaries")
+    tips_col1, tips_col2 = st.columns(2)
+
+    with tips_col1:
+        st.markdown("""
     **📝 Document Preparation:**
     - Ensure text is clear and readable
     - Remove unnecessary formatting
     - Include complete sentences and paragraphs
     """)
 
-with tips_col2:
-    st.markdown("""
+    with tips_col2:
+        st.markdown("""
     **🎯 Summary Optimization:**
     - Choose appropriate length for your needs
     - Select relevant focus area
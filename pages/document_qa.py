@@ -2,9 +2,33 @@ import streamlit as st
 import streamlit.components.v1 as components
 import libs as glib 
 import base
+import doc_index
+import extraction
+import prompts
+import streaming
 
-# Modern CSS styling
-st.markdown("""
+QA_TEMPLATE = """
+        Based on the following excerpts from a document, please answer this question: "{question}"
+        
+        Document excerpts:
+        {documents}
+        
+        Please provide a clear, accurate answer based only on the information in the document. 
+        If the information is not available in the excerpts, please say so.
+        """
+
+
+def load_document(content):
+    """Store document text in the session and chunk/index it once per distinct document"""
+    if content != st.session_state.document_content or 'doc_index' not in st.session_state:
+        st.session_state.document_content = content
+        st.session_state.doc_index = doc_index.DocumentIndex(content, doc_index.get_embedder())
+
+
+def render():
+    """Render the Document Q&A page"""
+    # Modern CSS styling
+    st.markdown("""
 <style>
     .main-header {
         background: linear-gradient(90deg, #ffecd2 0%, #fcb69f 100%);
@@ -58,92 +82,66 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Header
-st.markdown("""
+    # Header
+    st.markdown("""
 <div class="main-header">
     <h1>❓ Document Q&A</h1>
     <p>Ask questions about your documents and get AI-powered answers</p>
 </div>
 """, unsafe_allow_html=True)
 
-base.init_slidebar()
-
-# Initialize session state for document content
-if 'document_content' not in st.session_state:
-    st.session_state.document_content = ""
-if 'qa_history' not in st.session_state:
-    st.session_state.qa_history = []
-
-# Document upload section
-st.markdown("### 📤 Upload Document")
-uploaded_file = st.file_uploader(
-    "Choose a document to analyze",
-    type=['txt', 'pdf', 'docx', 'md', 'py', 'js', 'html', 'css', 'json'],
-    help="Upload a document to ask questions about its content"
-)
-
-# Process uploaded document
-if uploaded_file is not None:
-    try:
-        content = None
-        
-        if uploaded_file.type == "text/plain" or uploaded_file.name.endswith('.txt'):
-            content = str(uploaded_file.read(), "utf-8")
-        elif uploaded_file.type == "application/pdf" or uploaded_file.name.endswith('.pdf'):
-            try:
-                import PyPDF2
-                from io import BytesIO
-                
-                pdf_reader = PyPDF2.PdfReader(BytesIO(uploaded_file.read()))
-                content = ""
-                for page in pdf_reader.pages:
-                    content += page.extract_text()
-            except ImportError:
-                st.warning("PDF processing requires PyPDF2. Please install it or use text files.")
-                content = None
-        elif uploaded_file.name.endswith('.docx'):
-            try:
-                from docx import Document
-                from io import BytesIO
-                
-                doc = Document(BytesIO(uploaded_file.read()))
-                content = ""
-                for paragraph in doc.paragraphs:
-                    if paragraph.text:
-                        content += paragraph.text + "\n"
-            except ImportError:
-                st.warning("DOCX processing requires python-docx. Please install it or use text files.")
-                content = None
-        else:
-            # Try to read as text anyway
+    base.init_slidebar()
+
+    # Initialize session state for document content
+    if 'document_content' not in st.session_state:
+        st.session_state.document_content = ""
+    if 'qa_history' not in st.session_state:
+        st.session_state.qa_history = []
+
+    # Document upload section
+    st.markdown("### 📤 Upload Document")
+    uploaded_file = st.file_uploader(
+        "Choose a document to analyze",
+        type=['txt', 'pdf', 'docx', 'md', 'py', 'js', 'html', 'css', 'json'],
+        help="Upload a document to ask questions about its content"
+    )
+
+    # Process uploaded document
+    if uploaded_file is not None:
+        try:
+            content = None
             try:
-                content = str(uploaded_file.read(), "utf-8")
-            except:
+                content = extraction.extract_text(uploaded_file.getvalue(), uploaded_file.name, uploaded_file.type)
+            except ImportError as e:
+                st.warning(f"{e}. Please install it or use text files.")
+            except UnicodeDecodeError:
                 st.error("Unsupported file type. Please use text files (.txt), PDF, or DOCX files.")
-                content = None
-        
-        if content and content.strip():
-            st.session_state.document_content = content
-            st.success(f"✅ Document loaded: {uploaded_file.name}")
-        else:
-            st.error("❌ Could not extract text from the document. Please try a different file.")
-    except Exception as e:
-        st.error(f"Error reading file: {str(e)}")
-
-# Sample document option
-if not st.session_state.document_content:
-    st.markdown("### 📚 Or Try a Sample Document")
-    
-    sample_doc = st.selectbox("Choose a sample document:", [
-        "Select a sample...",
-        "Financial Report",
-        "Market Analysis", 
-        "Business Strategy",
-        "Technical Documentation"
-    ])
-    
-    sample_contents = {
-        "Financial Report": """
+
+            if content and content.strip():
+                load_document(content)
+                st.success(f"✅ Document loaded: {uploaded_file.name}")
+                cache_stats = extraction.text_cache.stats()
+                st.caption(f"Extraction cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                           f"{cache_stats['bytes_saved'] / 1e6:.1f} MB of parsing skipped")
+            else:
+                st.error("❌ Could not extract text from the document. Please try a different file.")
+        except Exception as e:
+            st.error(f"Error reading file: {str(e)}")
+
+    # Sample document option
+    if not st.session_state.document_content:
+        st.markdown("### 📚 Or Try a Sample Document")
+
+        sample_doc = st.selectbox("Choose a sample document:", [
+            "Select a sample...",
+            "Financial Report",
+            "Market Analysis", 
+            "Business Strategy",
+            "Technical Documentation"
+        ])
+
+        sample_contents = {
+            "Financial Report": """
         Q3 2024 Financial Results Summary
         
         Revenue Performance:
@@ -176,8 +174,8 @@ if not st.session_state.document_content:
         - Planning to hire 500 additional engineers
         - $500 million share buyback program approved
         """,
-        
-        "Market Analysis": """
+
+            "Market Analysis": """
         Technology Sector Analysis - October 2024
         
         Market Overview:
@@ -211,8 +209,8 @@ if not st.session_state.document_content:
         Outlook:
         Analysts remain cautiously optimistic about the tech sector heading into 2025, with particular strength expected in AI, cloud services, and cybersecurity segments.
         """,
-        
-        "Business Strategy": """
+
+            "Business Strategy": """
         Digital Transformation Strategy 2024-2026
         
         Executive Summary:
@@ -272,106 +270,99 @@ if not st.session_state.document_content:
         - ROI achievement: 18 months
         - Employee satisfaction: 80%+
         """
-    }
-    
-    if sample_doc != "Select a sample..." and sample_doc in sample_contents:
-        st.session_state.document_content = sample_contents[sample_doc]
-        st.success(f"✅ Sample document loaded: {sample_doc}")
-
-# Q&A Interface
-if st.session_state.document_content:
-    st.markdown("### 💬 Ask Questions About Your Document")
-    
-    # Display document preview
-    with st.expander("📄 Document Preview", expanded=False):
-        st.markdown('<div class="document-section">', unsafe_allow_html=True)
-        st.text_area("Document Content", st.session_state.document_content, height=200, disabled=True)
+        }
+
+        if sample_doc != "Select a sample..." and sample_doc in sample_contents:
+            load_document(sample_contents[sample_doc])
+            st.success(f"✅ Sample document loaded: {sample_doc}")
+
+    # Q&A Interface
+    if st.session_state.document_content:
+        st.markdown("### 💬 Ask Questions About Your Document")
+
+        # Display document preview
+        with st.expander("📄 Document Preview", expanded=False):
+            st.markdown('<div class="document-section">', unsafe_allow_html=True)
+            st.text_area("Document Content", st.session_state.document_content, height=200, disabled=True)
+            st.markdown('</div>', unsafe_allow_html=True)
+
+        # Suggested questions
+        st.markdown("### 💡 Suggested Questions")
+        suggested_questions = [
+            "What are the main points of this document?",
+            "What are the key financial metrics mentioned?",
+            "What are the biggest risks or challenges identified?",
+            "What are the next steps or recommendations?",
+            "Can you explain the most important findings?",
+            "What timeline or deadlines are mentioned?"
+        ]
+
+        cols = st.columns(3)
+        for i, question in enumerate(suggested_questions):
+            with cols[i % 3]:
+                if st.button(question, key=f"suggested_{i}"):
+                    # Add to Q&A history and process
+                    st.session_state.qa_history.append({
+                        "question": question,
+                        "answer": "Processing..."
+                    })
+                    st.rerun()
+
+        # Custom question input
+        st.markdown('<div class="qa-container">', unsafe_allow_html=True)
+
+        question = st.text_input(
+            "Ask your question:",
+            placeholder="What would you like to know about this document?",
+            key="question_input"
+        )
+
+        if st.button("🔍 Get Answer", use_container_width=True) and question:
+            # Only the most relevant chunks go into the prompt, not the whole document
+            index = st.session_state.doc_index
+            excerpts = index.search(question)
+            st.caption(f"Using {len(excerpts)} of {len(index.chunks)} document sections ({index.method})")
+
+            with st.spinner("🤔 Analyzing document and generating answer..."):
+                try:
+                    # Excerpts are kept in rank order until the prompt's token budget is used
+                    prompt = prompts.build_prompt(
+                        QA_TEMPLATE, question=question,
+                        documents=[f"[Excerpt {i}]\n{chunk}" for i, chunk in enumerate(excerpts, 1)])
+                    response = glib.call_claude_sonet_stream(prompt)
+
+                    # Redraws are throttled; the full answer is drawn once the stream ends
+                    full_answer = streaming.render_stream(response, st.empty(), prefix="**Answer:** ").text
+
+                    # Add to history
+                    st.session_state.qa_history.append({
+                        "question": question,
+                        "answer": full_answer
+                    })
+
+                except Exception as e:
+                    st.error(f"Error generating answer: {str(e)}")
+
         st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Suggested questions
-    st.markdown("### 💡 Suggested Questions")
-    suggested_questions = [
-        "What are the main points of this document?",
-        "What are the key financial metrics mentioned?",
-        "What are the biggest risks or challenges identified?",
-        "What are the next steps or recommendations?",
-        "Can you explain the most important findings?",
-        "What timeline or deadlines are mentioned?"
-    ]
-    
-    cols = st.columns(3)
-    for i, question in enumerate(suggested_questions):
-        with cols[i % 3]:
-            if st.button(question, key=f"suggested_{i}"):
-                # Add to Q&A history and process
-                st.session_state.qa_history.append({
-                    "question": question,
-                    "answer": "Processing..."
-                })
+
+        # Display Q&A History
+        if st.session_state.qa_history:
+            st.markdown("### 📝 Q&A History")
+
+            for i, qa in enumerate(reversed(st.session_state.qa_history)):
+                with st.expander(f"Q: {qa['question']}", expanded=(i == 0)):
+                    st.markdown('<div class="answer-section">', unsafe_allow_html=True)
+                    st.markdown(f"**A:** {qa['answer']}")
+                    st.markdown('</div>', unsafe_allow_html=True)
+
+            # Clear history button
+            if st.button("🗑️ Clear Q&A History"):
+                st.session_state.qa_history = []
                 st.rerun()
-    
-    # Custom question input
-    st.markdown('<div class="qa-container">', unsafe_allow_html=True)
-    
-    question = st.text_input(
-        "Ask your question:",
-        placeholder="What would you like to know about this document?",
-        key="question_input"
-    )
-    
-    if st.button("🔍 Get Answer", use_container_width=True) and question:
-        # Process the question
-        prompt = f"""
-        Based on the following document, please answer this question: "{question}"
-        
-        Document:
-        {st.session_state.document_content}
-        
-        Please provide a clear, accurate answer based only on the information in the document. 
-        If the information is not available in the document, please say so.
-        """
-        
-        with st.spinner("🤔 Analyzing document and generating answer..."):
-            try:
-                response = glib.call_claude_sonet_stream(prompt)
-                
-                # Collect the full response
-                full_answer = ""
-                answer_placeholder = st.empty()
-                
-                for chunk in response:
-                    full_answer += chunk
-                    answer_placeholder.markdown(f"**Answer:** {full_answer}")
-                
-                # Add to history
-                st.session_state.qa_history.append({
-                    "question": question,
-                    "answer": full_answer
-                })
-                
-            except Exception as e:
-                st.error(f"Error generating answer: {str(e)}")
-    
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Display Q&A History
-    if st.session_state.qa_history:
-        st.markdown("### 📝 Q&A History")
-        
-        for i, qa in enumerate(reversed(st.session_state.qa_history)):
-            with st.expander(f"Q: {qa['question']}", expanded=(i == 0)):
-                st.markdown('<div class="answer-section">', unsafe_allow_html=True)
-                st.markdown(f"**A:** {qa['answer']}")
-                st.markdown('</div>', unsafe_allow_html=True)
-        
-        # Clear history button
-        if st.button("🗑️ Clear Q&A History"):
-            st.session_state.qa_history = []
-            st.rerun()
 
-else:
-    # No document loaded
-    st.markdown("""
+    else:
+        # No document loaded
+        st.markdown("""
     <div class="document-section">
         <h3>📋 How to Use Document Q&A</h3>
         <ol>
@@ -392,6 +383,6 @@ else:
     </div>
     """, unsafe_allow_html=True)
 
-# Footer
-st.markdown("---")
-st.markdown("🔧 **Tip:** Ask specific questions to get more detailed and accurate answers from your documents!")
+    # Footer
+    st.markdown("---")
+    st.markdown("🔧 **Tip:** Ask specific questions to get more detailed and accurate answers from your documents!")
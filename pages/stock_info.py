@@ -2,19 +2,10 @@ import streamlit as st
 import streamlit.components.v1 as components
 import libs as glib 
 import base
+import prompts
 
-def generate_response(prompt):
-    if base.get_num_tokens(prompt) >= 1000000:
-        st.error("Conversation length too long. Please keep it under 1000000 tokens.")
-        st.button(
-            "🗑 Clear Chat History",
-            on_click=base.clear_stock_advisor,
-            key="clear_chat_history",
-        )
-        st.stop()
-
-    # Enhanced prompt for stock information
-    enhanced_prompt = f"""
+# Enhanced prompt for stock information
+STOCK_INFO_TEMPLATE = """
     Context: Stock Information & Market Data Analysis
     
     Task: Provide detailed stock information and market insights for user queries
@@ -34,14 +25,33 @@ def generate_response(prompt):
     - End with actionable insights or recommendations
     - Maintain professional yet accessible tone
     
+    {history}
+    
     User Question: {prompt}
     """
+
+def generate_response(messages):
+    # Earlier turns come from the rolling memory: recent ones verbatim, older ones summarized
+    prompt = messages[-1]["content"]
+    history = base.get_memory().history(messages[:-1])
+    try:
+        enhanced_prompt = prompts.build_prompt(STOCK_INFO_TEMPLATE, prompt=prompt, history=history)
+    except prompts.PromptTooLongError as e:
+        st.error(f"Message too long ({e.tokens:,} tokens). Please keep it under {e.budget:,} tokens.")
+        st.button(
+            "🗑 Clear Chat History",
+            on_click=base.clear_stock_advisor,
+            key="clear_chat_history",
+        )
+        st.stop()
     
     response = glib.call_claude_sonet_stream(enhanced_prompt)
     return response
 
-# Modern CSS styling
-st.markdown("""
+def render():
+    """Render the Stock Information page"""
+    # Modern CSS styling
+    st.markdown("""
 <style>
     .main-header {
         background: linear-gradient(90deg, #ff9a9e 0%, #fecfef 50%, #fecfef 100%);
@@ -84,119 +94,119 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Header
-st.markdown("""
+    # Header
+    st.markdown("""
 <div class="main-header">
     <h1>💹 Stock Information Hub</h1>
     <p>Get detailed information about any stock or company</p>
 </div>
 """, unsafe_allow_html=True)
 
-base.init_stock_advisor()
-base.init_slidebar()
-
-# Quick stock lookup section
-st.markdown("### 🔍 Quick Stock Lookup")
-col1, col2, col3 = st.columns([2, 2, 1])
-
-with col1:
-    stock_symbol = st.text_input("Enter Stock Symbol (e.g., AAPL, TSLA, MSFT)", placeholder="AAPL")
-
-with col2:
-    query_type = st.selectbox("Information Type", [
-        "Company Overview",
-        "Financial Performance", 
-        "Recent News",
-        "Analyst Ratings",
-        "Dividend Information",
-        "Technical Analysis"
-    ])
-
-with col3:
-    if st.button("🔍 Search", use_container_width=True):
-        if stock_symbol:
-            query = f"Provide {query_type.lower()} for {stock_symbol.upper()}"
-            st.session_state.messages.append({"role": "user", "content": query})
-            st.rerun()
-
-# Popular stocks section
-st.markdown("### 📈 Popular Stocks")
-popular_stocks = ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "NVDA", "META", "NFLX"]
-
-cols = st.columns(4)
-for i, stock in enumerate(popular_stocks):
-    with cols[i % 4]:
-        if st.button(f"📊 {stock}", use_container_width=True):
-            query = f"Give me a comprehensive overview of {stock} including current price, recent performance, and key metrics"
-            st.session_state.messages.append({"role": "user", "content": query})
-            st.rerun()
-
-# Chat interface
-st.markdown("### 💬 Stock Information Chat")
-st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-
-# Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"], avatar=base.icons[message["role"]]):
-        st.write(message["content"])
-
-# Chat input
-if prompt := st.chat_input("Ask about any stock, company, or market information..."):
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    
-    with st.chat_message("user", avatar=base.icons["user"]):
-        st.write(prompt)
-
-# Generate response
-if st.session_state.messages[-1]["role"] != "assistant":
-    with st.chat_message("assistant", avatar=base.icons["assistant"]):
-        response = generate_response(prompt)
-        full_response = st.write_stream(response)
-        message = {"role": "assistant", "content": full_response}
-        st.session_state.messages.append(message)
-
-st.markdown('</div>', unsafe_allow_html=True)
-
-# Quick queries section
-st.markdown("### ⚡ Quick Queries")
-quick_queries = [
-    "What are the top performing stocks today?",
-    "Show me dividend aristocrats",
-    "Which tech stocks are undervalued?",
-    "What are the best growth stocks?",
-    "Explain P/E ratios",
-    "How to read financial statements?"
-]
-
-cols = st.columns(3)
-for i, query in enumerate(quick_queries):
-    with cols[i % 3]:
-        if st.button(query, key=f"quick_{i}"):
-            st.session_state.messages.append({"role": "user", "content": query})
-            st.rerun()
-
-# Information cards
-st.markdown("### 📚 Stock Analysis Guide")
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.markdown("""
+    base.init_stock_advisor()
+    base.init_slidebar()
+
+    # Quick stock lookup section
+    st.markdown("### 🔍 Quick Stock Lookup")
+    col1, col2, col3 = st.columns([2, 2, 1])
+
+    with col1:
+        stock_symbol = st.text_input("Enter Stock Symbol (e.g., AAPL, TSLA, MSFT)", placeholder="AAPL")
+
+    with col2:
+        query_type = st.selectbox("Information Type", [
+            "Company Overview",
+            "Financial Performance", 
+            "Recent News",
+            "Analyst Ratings",
+            "Dividend Information",
+            "Technical Analysis"
+        ])
+
+    with col3:
+        if st.button("🔍 Search", use_container_width=True):
+            if stock_symbol:
+                query = f"Provide {query_type.lower()} for {stock_symbol.upper()}"
+                st.session_state.messages.append({"role": "user", "content": query})
+                st.rerun()
+
+    # Popular stocks section
+    st.markdown("### 📈 Popular Stocks")
+    popular_stocks = ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "NVDA", "META", "NFLX"]
+
+    cols = st.columns(4)
+    for i, stock in enumerate(popular_stocks):
+        with cols[i % 4]:
+            if st.button(f"📊 {stock}", use_container_width=True):
+                query = f"Give me a comprehensive overview of {stock} including current price, recent performance, and key metrics"
+                st.session_state.messages.append({"role": "user", "content": query})
+                st.rerun()
+
+    # Chat interface
+    st.markdown("### 💬 Stock Information Chat")
+    st.markdown('<div class="chat-container">', unsafe_allow_html=True)
+
+    # Display chat messages
+    for message in st.session_state.messages:
+        with st.chat_message(message["role"], avatar=base.icons[message["role"]]):
+            st.write(message["content"])
+
+    # Chat input
+    if prompt := st.chat_input("Ask about any stock, company, or market information..."):
+        st.session_state.messages.append({"role": "user", "content": prompt})
+
+        with st.chat_message("user", avatar=base.icons["user"]):
+            st.write(prompt)
+
+    # Generate response
+    if st.session_state.messages[-1]["role"] != "assistant":
+        with st.chat_message("assistant", avatar=base.icons["assistant"]):
+            response = generate_response(st.session_state.messages)
+            full_response = st.write_stream(response)
+            message = {"role": "assistant", "content": full_response}
+            st.session_state.messages.append(message)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Quick queries section
+    st.markdown("### ⚡ Quick Queries")
+    quick_queries = [
+        "What are the top performing stocks today?",
+        "Show me dividend aristocrats",
+        "Which tech stocks are undervalued?",
+        "What are the best growth stocks?",
+        "Explain P/E ratios",
+        "How to read financial statements?"
+    ]
+
+    cols = st.columns(3)
+    for i, query in enumerate(quick_queries):
+        with cols[i % 3]:
+            if st.button(query, key=f"quick_{i}"):
+                st.session_state.messages.append({"role": "user", "content": query})
+                st.rerun()
+
+    # Information cards
+    st.markdown("### 📚 Stock Analysis Guide")
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.markdown("""
     <div class="info-card">
         <h4>📊 Fundamental Analysis</h4>
         <p>Learn about P/E ratios, revenue growth, debt levels, and other key financial metrics that determine a company's intrinsic value.</p>
     </div>
     """, unsafe_allow_html=True)
 
-with col2:
-    st.markdown("""
+    with col2:
+        st.markdown("""
     <div class="info-card">
         <h4>📈 Technical Analysis</h4>
         <p>Understand chart patterns, moving averages, RSI, MACD, and other technical indicators for timing your trades.</p>
     </div>
     """, unsafe_allow_html=True)
 
-with col3:
-    st.markdown("""
+    with col3:
+        st.markdown("""
     <div class="info-card">
         <h4>📰 Market News</h4>
         <p>Stay updated with earnings reports, analyst upgrades/downgrades, and market-moving news that affects stock prices.</p>
@@ -0,0 +1,208 @@
+"""
+Token counting and token-budgeted prompt assembly.
+
+Token counts are local estimates: the tokenizer bundled with the `anthropic`
+package (an older vocabulary, not Claude 3's, but no request is made) or a
+character-class estimate when it is not installed. Neither is exact for Claude
+3 models, so the input budget keeps PROMPT_TOKEN_MARGIN of the window in
+reserve. Counts are cached by text hash, since the same templates, excerpts and
+history turns are counted on every rerun.
+
+`build_prompt` fills a template and then adds documents (most relevant first)
+and conversation history (newest first) only while they fit the model's input
+budget. The budget is the context window minus the output budget, optionally
+capped by PROMPT_MAX_INPUT_TOKENS to bound cost and time to first token.
+Trimming is deterministic, so the same inputs always give the same prompt and
+response cache key.
+"""
+import hashlib
+import math
+import os
+import re
+import textwrap
+import bedrock_client
+from lru import LRUCache
+try:
+    from anthropic import Anthropic
+except ImportError:
+    Anthropic = None
+
+# (context window, max output tokens) per Bedrock model id
+MODEL_LIMITS = {
+    'anthropic.claude-3-5-sonnet-20240620-v1:0': (200_000, 8_192),
+    'anthropic.claude-3-5-sonnet-20241022-v2:0': (200_000, 8_192),
+    'anthropic.claude-3-haiku-20240307-v1:0': (200_000, 4_096),
+    'anthropic.claude-3-sonnet-20240229-v1:0': (200_000, 4_096),
+}
+DEFAULT_LIMITS = (200_000, 4_096)
+
+MAX_OUTPUT_TOKENS = int(os.getenv('PROMPT_MAX_OUTPUT_TOKENS', '2000'))
+# 0 leaves the model's context window as the only limit
+MAX_INPUT_TOKENS = int(os.getenv('PROMPT_MAX_INPUT_TOKENS', '0'))
+# Fraction of the input budget held back because counts are estimates
+TOKEN_MARGIN = float(os.getenv('PROMPT_TOKEN_MARGIN', '0.15'))
+TOKEN_COUNTER = os.getenv('TOKEN_COUNTER', 'auto')
+# Documents or turns that would be cut below this many tokens are dropped instead
+MIN_PART_TOKENS = 64
+TRUNCATION_MARK = '\n[...]'
+
+token_cache = LRUCache(maxsize=int(os.getenv('TOKEN_CACHE_SIZE', '4096')))
+
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+NON_ASCII_RE = re.compile(r'[^\x00-\x7f]')
+
+
+class PromptTooLongError(ValueError):
+    """The fixed part of a prompt (template and fields) does not fit the input budget"""
+
+    def __init__(self, tokens, budget):
+        super().__init__(f"Prompt needs {tokens:,} tokens, the limit is {budget:,}")
+        self.tokens = tokens
+        self.budget = budget
+
+
+def estimate_tokens(text):
+    """Character-class estimate: ~3.5 ASCII characters per token, non-ASCII (e.g. Vietnamese) ~1.5"""
+    other = len(NON_ASCII_RE.findall(text))
+    return math.ceil((len(text) - other) / 3.5 + other / 1.5)
+
+
+def anthropic_counter():
+    # count_tokens runs the SDK's bundled (pre-Claude 3) tokenizer locally; the key is never sent anywhere
+    return Anthropic(api_key='unused').count_tokens
+
+
+def get_counter(name=TOKEN_COUNTER):
+    """Token counting function by name: anthropic, heuristic or auto (anthropic when installed)"""
+    if name in ('anthropic', 'auto') and Anthropic is not None:
+        try:
+            return anthropic_counter()
+        except Exception as e:
+            if name == 'anthropic':
+                raise
+            print(f"Anthropic tokenizer unavailable, estimating tokens: {e}")
+    elif name == 'anthropic':
+        raise ImportError("anthropic is not installed")
+    return estimate_tokens
+
+
+_counter = None
+
+
+def counter():
+    """The configured counting function, uncached"""
+    global _counter
+    if _counter is None:
+        _counter = get_counter()
+    return _counter
+
+
+def count_tokens(text):
+    """Estimated number of tokens in text, cached by content hash"""
+    if not text:
+        return 0
+    count = counter()
+    key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return token_cache.get_or_compute(key, lambda: count(text))
+
+
+def limits(model_id=None):
+    return MODEL_LIMITS.get(model_id or bedrock_client.MODEL_ID, DEFAULT_LIMITS)
+
+
+def output_tokens(model_id=None):
+    """max_tokens to request: the configured output budget within the model's limit"""
+    return min(MAX_OUTPUT_TOKENS, limits(model_id)[1])
+
+
+def input_budget(model_id=None):
+    """Estimated tokens available for the prompt: context minus output, capped, less the safety margin"""
+    context, _ = limits(model_id)
+    budget = context - output_tokens(model_id)
+    if MAX_INPUT_TOKENS:
+        budget = min(budget, MAX_INPUT_TOKENS)
+    return int(budget * (1 - TOKEN_MARGIN))
+
+
+def check(prompt, model_id=None):
+    """Raise PromptTooLongError before a request Bedrock would reject or that would exceed the budget"""
+    tokens = count_tokens(prompt)
+    budget = input_budget(model_id)
+    if tokens > budget:
+        raise PromptTooLongError(tokens, budget)
+    return tokens
+
+
+def compact(text):
+    """Strip the indentation, trailing spaces and runs of blank lines that inline templates carry"""
+    lines = [line.rstrip() for line in textwrap.dedent(text).splitlines()]
+    return BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def truncate(text, max_tokens):
+    """Longest prefix of text, cut at a line or word boundary, that fits in max_tokens"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - count_tokens(TRUNCATION_MARK)
+    count = counter()
+    lo, hi = 0, len(text)
+    # Binary search on the character length; token counts grow monotonically with the prefix.
+    # Candidate prefixes are one-off, so they bypass the cache rather than evict useful entries
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    prefix = text[:lo]
+    cut = max(prefix.rfind('\n'), prefix.rfind(' '))
+    if cut > lo // 2:
+        prefix = prefix[:cut]
+    return prefix.rstrip() + TRUNCATION_MARK if prefix.strip() else ''
+
+
+def fit(parts, budget, separator='\n\n'):
+    """Leading parts that fit in budget, the first overflowing one truncated if enough room is left"""
+    kept, used = [], 0
+    step = count_tokens(separator)
+    for part in parts:
+        cost = count_tokens(part) + (step if kept else 0)
+        if used + cost <= budget:
+            kept.append(part)
+            used += cost
+            continue
+        room = budget - used - (step if kept else 0)
+        if room >= MIN_PART_TOKENS:
+            kept.append(truncate(part, room))
+        break
+    return kept
+
+
+def build_prompt(template, documents=(), history=(), model_id=None, separator='\n\n', **fields):
+    """Fill template and fit documents and history into the model's input budget.
+
+    The template may contain {documents} and {history} placeholders besides the
+    named fields. `documents` are ordered most relevant first and kept from the
+    front; `history` is ordered oldest first and kept from the newest end.
+    Raises PromptTooLongError when the template and fields alone do not fit.
+    """
+    template = compact(template)
+    budget = input_budget(model_id)
+    fixed = count_tokens(template.format(documents='', history='', **fields))
+    if fixed > budget:
+        raise PromptTooLongError(fixed, budget)
+
+    remaining = budget - fixed
+    kept_documents = fit([d for d in documents if d], remaining, separator)
+    remaining -= count_tokens(separator.join(kept_documents))
+    kept_history = fit([h for h in reversed(history) if h], remaining, separator)[::-1]
+
+    prompt = template.format(documents=separator.join(kept_documents), history=separator.join(kept_history), **fields)
+    # Parts were counted separately; drop from the least important end if joining added tokens
+    while count_tokens(prompt) > budget and (kept_history or kept_documents):
+        if kept_history:
+            kept_history.pop(0)
+        else:
+            kept_documents.pop()
+        prompt = template.format(documents=separator.join(kept_documents), history=separator.join(kept_history), **fields)
+    return prompt
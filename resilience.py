@@ -0,0 +1,236 @@
+"""
+Client-side protection for upstream APIs (Polygon, vnstock, Bedrock).
+
+Each upstream gets a token-bucket rate limiter shared by every session in the
+process, retries with jittered exponential backoff on throttling and transient
+errors, and a circuit breaker that fails fast while the upstream is degraded so
+callers can route to a fallback. The limiter is adaptive: throttling responses
+halve the rate, and successes restore it gradually to the configured quota.
+"""
+import os
+import random
+import threading
+import time
+import requests
+try:
+    from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, ReadTimeoutError
+except ImportError:
+    ClientError = BotoConnectionError = ReadTimeoutError = None
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+THROTTLE_CODES = {'ThrottlingException', 'TooManyRequestsException', 'ServiceUnavailableException',
+                  'ModelNotReadyException', 'InternalServerException', 'ServiceQuotaExceededException'}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+
+class RetryableError(Exception):
+    """Transient upstream failure, e.g. an HTTP 429 or 5xx response"""
+
+    def __init__(self, message, status=None, throttled=False):
+        super().__init__(message)
+        self.status = status
+        self.throttled = throttled
+
+
+def is_throttle(error):
+    if isinstance(error, RetryableError):
+        return error.throttled
+    if ClientError is not None and isinstance(error, ClientError):
+        # Event stream errors use lower camel case, e.g. throttlingException
+        code = error.response.get('Error', {}).get('Code') or ''
+        return code[:1].upper() + code[1:] in THROTTLE_CODES
+    return False
+
+
+def is_retryable(error):
+    if isinstance(error, (RetryableError, requests.ConnectionError, requests.Timeout)):
+        return True
+    if ClientError is not None and isinstance(error, (BotoConnectionError, ReadTimeoutError)):
+        return True
+    return is_throttle(error)
+
+
+def check_response(response):
+    """Raise RetryableError for 429/5xx responses, otherwise return the response"""
+    if response.status_code in RETRYABLE_STATUS:
+        raise RetryableError(f"HTTP {response.status_code} from {response.url}",
+                             status=response.status_code, throttled=response.status_code == 429)
+    return response
+
+
+class TokenBucket:
+    """Thread-safe token bucket; rate is in tokens per second"""
+
+    def __init__(self, rate, capacity, min_rate=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout=None):
+        """Wait for a token; False if none became available within timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def throttled(self):
+        """Multiplicative decrease after the upstream pushed back"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def succeeded(self):
+        """Additive increase back towards the configured rate"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through after reset_timeout"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            return 'half-open' if time.monotonic() - self.opened_at >= self.reset_timeout else 'open'
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def release_trial(self):
+        """Give up a trial slot that was not used for an upstream call"""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class Upstream:
+    """Rate limit, retry and circuit breaker policy for one upstream service"""
+
+    def __init__(self, name, rate_per_minute, burst=None, retries=3, base_delay=0.5, max_delay=20.0,
+                 failure_threshold=5, reset_timeout=30.0, acquire_timeout=60.0):
+        self.name = name
+        self.limiter = TokenBucket(rate_per_minute / 60.0, burst or max(1, rate_per_minute // 6))
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, func, *args, **kwargs):
+        """Call func under this upstream's limiter, retry policy and circuit breaker"""
+        return self.call_with_timeout(self.acquire_timeout, func, *args, **kwargs)
+
+    def call_with_timeout(self, acquire_timeout, func, *args, **kwargs):
+        """call() with a different rate-limit wait; None waits as long as needed (batch jobs)"""
+        return self._call(acquire_timeout, self.retries, func, args, kwargs)
+
+    def try_call(self, func, *args, **kwargs):
+        """One attempt that never sleeps: no token or a transient failure raises at once.
+
+        For callers on the Streamlit script thread that have a fallback, so a
+        busy quota switches source instead of blocking the render.
+        """
+        return self._call(0, 0, func, args, kwargs)
+
+    def _call(self, acquire_timeout, retries, func, args, kwargs):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        attempt = 0
+        while True:
+            if not self.limiter.acquire(acquire_timeout):
+                self.breaker.release_trial()
+                raise RetryableError(f"{self.name} rate limit wait exceeded {acquire_timeout}s", throttled=True)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    # Client errors say nothing about upstream health
+                    self.breaker.record_success()
+                    raise
+                if is_throttle(e):
+                    self.limiter.throttled()
+                if attempt >= retries:
+                    self.breaker.record_failure()
+                    raise
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            self.limiter.succeeded()
+            self.breaker.record_success()
+            return result
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, str(default)))
+
+
+# Polygon requests per minute by plan. Paid plans have no call quota; Polygon asks
+# clients to stay under ~100 requests/second
+POLYGON_PLAN_RATES = {'free': 5, 'starter': 6000, 'developer': 6000, 'advanced': 6000}
+POLYGON_PLAN = os.getenv('POLYGON_PLAN', 'starter')
+POLYGON_RATE = _env_int('POLYGON_RATE_PER_MINUTE', POLYGON_PLAN_RATES.get(POLYGON_PLAN, 5))
+
+# Quotas per upstream; defaults follow docs/API.md
+UPSTREAMS = {
+    # Interactive Polygon calls use try_call and fall back to Yahoo Finance instead of waiting
+    'polygon': Upstream('polygon', POLYGON_RATE, burst=_env_int('POLYGON_BURST', max(5, POLYGON_RATE // 6))),
+    'vnstock': Upstream('vnstock', _env_int('VNSTOCK_RATE_PER_MINUTE', 60)),
+    'bedrock': Upstream('bedrock', _env_int('BEDROCK_RATE_PER_MINUTE', 60), burst=_env_int('BEDROCK_BURST', 10)),
+}
+
+
+def get_upstream(name):
+    return UPSTREAMS[name]
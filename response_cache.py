@@ -0,0 +1,129 @@
+"""
+Response cache for Bedrock generations.
+
+Prompts are normalized (whitespace collapsed, case kept, since tickers and code
+differ by case) and hashed for an exact-match lookup. When an embedder is
+configured, a miss falls back to the most similar cached prompt above a
+cosine-similarity threshold. Entries expire after a TTL and the cache is
+LRU-bounded. A hit is replayed as a stream of
+small text chunks so callers render it exactly like a live response.
+"""
+import hashlib
+import os
+import re
+import threading
+import numpy as np
+from lru import LRUCache
+
+CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '512'))
+CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '900'))
+# Empty disables the similarity lookup; otherwise a doc_index embedder name (bedrock or local)
+EMBEDDER = os.getenv('RESPONSE_CACHE_EMBEDDER', '')
+SIMILARITY_THRESHOLD = float(os.getenv('RESPONSE_CACHE_SIMILARITY', '0.97'))
+
+REPLAY_RE = re.compile(r'\S+\s*|\s+')
+REPLAY_WORDS = 4
+
+
+def normalize(prompt):
+    return ' '.join(prompt.split())
+
+
+def prompt_key(prompt):
+    return hashlib.sha256(normalize(prompt).encode('utf-8')).hexdigest()
+
+
+def replay(text, words=REPLAY_WORDS):
+    """Yield cached text in small word groups, like a live stream"""
+    tokens = REPLAY_RE.findall(text)
+    for i in range(0, len(tokens), words):
+        yield ''.join(tokens[i:i + words])
+
+
+class ResponseCache:
+    """Exact plus optional embedding-similarity cache of complete responses"""
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL, embedder=None, threshold=SIMILARITY_THRESHOLD):
+        self.entries = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.embedder = embedder
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._keys = []
+        self._vectors = None
+        self.similar_hits = 0
+
+    def _embed(self, prompt):
+        vector = np.asarray(self.embedder([normalize(prompt)]), dtype=np.float32)[0]
+        return vector / max(np.linalg.norm(vector), 1e-12)
+
+    def _similar(self, vector):
+        """Key of the closest live cached prompt above the threshold, or None"""
+        with self._lock:
+            # Drop vectors whose entries were evicted or expired
+            live = [i for i, key in enumerate(self._keys) if key in self.entries]
+            if len(live) != len(self._keys):
+                self._keys = [self._keys[i] for i in live]
+                self._vectors = self._vectors[live] if live else None
+            if self._vectors is None:
+                return None
+            scores = self._vectors @ vector
+            best = int(np.argmax(scores))
+            return self._keys[best] if scores[best] >= self.threshold else None
+
+    def lookup(self, prompt):
+        """Return (key, vector, cached_text); cached_text is None on a miss"""
+        key = prompt_key(prompt)
+        text = self.entries.get(key)
+        if text is not None or self.embedder is None:
+            return key, None, text
+        try:
+            vector = self._embed(prompt)
+        except Exception as e:
+            print(f"Response cache embedding error: {e}")
+            return key, None, None
+        similar = self._similar(vector)
+        text = self.entries.get(similar) if similar else None
+        if text is not None:
+            with self._lock:
+                self.similar_hits += 1
+        return key, vector, text
+
+    def store(self, key, vector, text):
+        self.entries.put(key, text)
+        if vector is not None:
+            with self._lock:
+                self._keys.append(key)
+                self._vectors = vector[None, :] if self._vectors is None else np.vstack([self._vectors, vector])
+
+    def stream(self, prompt, generate):
+        """Stream a response for prompt, replaying a cached one or caching a complete live one.
+
+        `generate(prompt)` must return an iterator of text chunks. A generation
+        that fails or is abandoned part-way is not cached.
+        """
+        key, vector, text = self.lookup(prompt)
+        if text is not None:
+            yield from replay(text)
+            return
+        parts = []
+        for chunk in generate(prompt):
+            if chunk:
+                parts.append(chunk)
+            yield chunk
+        if parts:
+            self.store(key, vector, ''.join(parts))
+
+    def stats(self):
+        stats = self.entries.stats()
+        stats['similar_hits'] = self.similar_hits
+        return stats
+
+
+def _default_embedder():
+    if not EMBEDDER:
+        return None
+    import doc_index
+    return doc_index.get_embedder(EMBEDDER)
+
+
+response_cache = ResponseCache(embedder=_default_embedder())
@@ -0,0 +1,42 @@
+"""
+Cache of knowledge-base retrieval results.
+
+Each question sent to `libs.search` costs a Bedrock knowledge-base round trip
+before generation starts. Results are cached by normalized query (case folded,
+punctuation and repeated whitespace dropped), so a repeated or trivially
+reworded question reuses the documents for RETRIEVAL_CACHE_TTL seconds.
+"""
+import os
+import re
+from typing import Any, List
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.pydantic_v1 import Field
+from langchain_core.retrievers import BaseRetriever
+from lru import LRUCache
+
+CACHE_SIZE = int(os.getenv('RETRIEVAL_CACHE_SIZE', '256'))
+CACHE_TTL = int(os.getenv('RETRIEVAL_CACHE_TTL', '3600'))
+
+PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+retrieval_cache = LRUCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+
+
+def normalize(query):
+    return ' '.join(PUNCTUATION_RE.sub(' ', query).split()).casefold()
+
+
+class CachedRetriever(BaseRetriever):
+    """Wrap a retriever so results for the same normalized query are served from a TTL cache"""
+
+    retriever: BaseRetriever
+    # A factory, since pydantic deep-copies plain defaults and the cache holds a lock
+    cache: Any = Field(default_factory=lambda: retrieval_cache)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        key = normalize(query)
+        documents = self.cache.get_or_compute(
+            key, lambda: self.retriever.invoke(query, config={"callbacks": run_manager.get_child()}))
+        # Callers may mutate the list; the cached one stays intact
+        return list(documents)
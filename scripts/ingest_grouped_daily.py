@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Refresh the local OHLCV store for the whole US market from Polygon's grouped
+daily endpoint: one request per trading day instead of one per ticker.
+
+Usage:
+    python scripts/ingest_grouped_daily.py                 # last weekday
+    python scripts/ingest_grouped_daily.py --start 2024-06-03 --end 2024-06-28
+    python scripts/ingest_grouped_daily.py --days 5 --only-cached
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from polygon_client import default_client
+from ohlcv_store import default_store
+
+
+def weekdays(start, end):
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def last_weekday(before):
+    day = before - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest Polygon grouped daily bars into the OHLCV store")
+    parser.add_argument('--start', help="First date (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Last date (YYYY-MM-DD), defaults to the last weekday")
+    parser.add_argument('--days', type=int, help="Ingest the last N weekdays")
+    parser.add_argument('--batch-days', type=int, default=5, help="Days buffered before writing to the store")
+    parser.add_argument('--only-cached', action='store_true', help="Only update tickers already in the store")
+    args = parser.parse_args()
+
+    end = datetime.strptime(args.end, '%Y-%m-%d') if args.end else last_weekday(datetime.now())
+    if args.start:
+        start = datetime.strptime(args.start, '%Y-%m-%d')
+    elif args.days:
+        start = end
+        for _ in range(args.days - 1):
+            start = last_weekday(start)
+    else:
+        start = end
+
+    cached = default_store.tickers() if args.only_cached else None
+    batch, requests_made, updated = [], 0, 0
+
+    def flush():
+        nonlocal batch, updated
+        if batch:
+            updated += default_store.ingest(pd.concat(batch))
+            batch = []
+
+    # Days are fetched in order and written in batches, so memory stays bounded on long backfills
+    for day in weekdays(start, end):
+        date = day.strftime('%Y-%m-%d')
+        bars = default_client.get_grouped_daily(date, wait=True)
+        requests_made += 1
+        if bars.empty:
+            print(f"{date}: no bars (market holiday?)")
+            continue
+        if cached is not None:
+            bars = bars[bars['Ticker'].str.upper().isin(cached)]
+        print(f"{date}: {len(bars)} tickers")
+        batch.append(bars)
+        if len(batch) >= args.batch_days:
+            flush()
+    flush()
+    print(f"✅ {requests_made} requests, {updated} ticker updates written to {default_store.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from ohlcv_store import OHLCV_COLUMNS, OHLCVStore, pyarrow
+
+# Minute bars are ~400x the size of daily bars, so they are partitioned by month
+INTRADAY_CACHE_DIR = os.getenv('INTRADAY_CACHE_DIR', os.path.join('data', 'cache', 'intraday'))
+INTRADAY_REFRESH_SECONDS = int(os.getenv('INTRADAY_REFRESH_SECONDS', '60'))
+
+
+class IntradayStore:
+    """On-disk 1-minute bar cache: one parquet file per ticker and month plus a JSON index.
+
+    Timestamps are tz-naive UTC. Reads only open the monthly files that overlap
+    the requested window and push the time filter down to the parquet reader,
+    so a 5-day chart does not load months of minute bars.
+    """
+
+    def __init__(self, cache_dir=INTRADAY_CACHE_DIR, refresh_seconds=INTRADAY_REFRESH_SECONDS):
+        self.cache_dir = cache_dir
+        self.refresh_seconds = refresh_seconds
+        self.enabled = pyarrow is not None
+        self._lock = threading.RLock()
+        self._index_path = os.path.join(cache_dir, '_index.json')
+        self._index = None
+
+    def _dir(self, ticker):
+        safe = ticker.upper().replace('/', '_').replace('\\', '_')
+        return os.path.join(self.cache_dir, safe)
+
+    def _path(self, ticker, month):
+        return os.path.join(self._dir(ticker), f"{month}.parquet")
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self._index_path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        tmp = self._index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path)
+
+    def meta(self, ticker):
+        """Return the index entry for a ticker, or None if it is not cached"""
+        with self._lock:
+            return self._load_index().get(ticker.upper())
+
+    def load(self, ticker, start, end=None, columns=None):
+        """Load cached bars in [start, end) reading only the overlapping monthly files"""
+        if not self.enabled:
+            return None
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(end) if end is not None else None
+        months = pd.period_range(start, end or pd.Timestamp.now(), freq='M')
+        filters = [('Date', '>=', start)] + ([('Date', '<', end)] if end is not None else [])
+        frames = []
+        for month in months.strftime('%Y-%m'):
+            path = self._path(ticker, month)
+            if not os.path.exists(path):
+                continue
+            try:
+                frames.append(pd.read_parquet(path, columns=columns, filters=filters))
+            except Exception as e:
+                print(f"Intraday cache read error for {ticker} {month}: {e}")
+        if not frames:
+            return None
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+    def save(self, ticker, bars, requested_from):
+        """Merge bars into their monthly files and update the ticker's index entry"""
+        if not self.enabled or bars is None or bars.empty:
+            return
+        with self._lock:
+            os.makedirs(self._dir(ticker), exist_ok=True)
+            # Only the months touched by the new bars are rewritten
+            for month, fresh in bars.groupby(bars.index.strftime('%Y-%m')):
+                path = self._path(ticker, month)
+                cached = pd.read_parquet(path) if os.path.exists(path) else None
+                merged = OHLCVStore.merge(cached, fresh)
+                merged.to_parquet(path + '.tmp')
+                os.replace(path + '.tmp', path)
+
+            index = self._load_index()
+            previous = index.get(ticker.upper(), {})
+            first = bars.index[0].isoformat()
+            last = bars.index[-1].isoformat()
+            index[ticker.upper()] = {
+                'requested_from': min(filter(None, [previous.get('requested_from'), requested_from.isoformat()])),
+                'first_bar': min(filter(None, [previous.get('first_bar'), first])),
+                'last_bar': max(filter(None, [previous.get('last_bar'), last])),
+                'fetched_at': time.time(),
+            }
+            self._save_index()
+
+    @staticmethod
+    def normalize(df):
+        """Coerce upstream minute bars to a sorted, tz-naive UTC, de-duplicated OHLCV frame"""
+        if df is None or df.empty or not isinstance(df.index, pd.DatetimeIndex):
+            return None
+        df = df[[c for c in OHLCV_COLUMNS if c in df.columns]].copy()
+        if df.index.tz is not None:
+            df.index = df.index.tz_convert('UTC').tz_localize(None)
+        df.index = df.index.astype('datetime64[ns]')
+        df.index.name = 'Date'
+        df = df[~df.index.duplicated(keep='last')]
+        return df.sort_index()
+
+    def _fetch(self, fetch, start, end):
+        """Normalized bars and the start they really cover.
+
+        A source that cannot reach back to `start` (Yahoo keeps 30 days of
+        minutes) sets attrs['covers_from'], so the uncovered part of the window
+        is not recorded as requested and is backfilled on a later call.
+        """
+        raw = fetch(start, end)
+        covers_from = raw.attrs.get('covers_from', start) if raw is not None else start
+        return self.normalize(raw), max(start, covers_from)
+
+    def get(self, ticker, days, fetch):
+        """Return 1-minute bars for the last `days` days, fetching only what is missing.
+
+        `fetch(start, end)` must return minute bars between two datetimes.
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        window_start = now - timedelta(days=days)
+        if not self.enabled:
+            return self.normalize(fetch(window_start, now))
+
+        with self._lock:
+            meta = self.meta(ticker)
+
+        if meta is None:
+            self.save(ticker, *self._fetch(fetch, window_start, now))
+        else:
+            requested_from = datetime.fromisoformat(meta['requested_from'])
+            if requested_from > window_start:
+                # Backfill only the older part of the window
+                self.save(ticker, *self._fetch(fetch, window_start, requested_from))
+            if time.time() - meta.get('fetched_at', 0) >= self.refresh_seconds:
+                # Refetch from the last cached bar so a still-forming bar gets replaced
+                last_bar = datetime.fromisoformat(meta['last_bar'])
+                self.save(ticker, self.normalize(fetch(last_bar, now)), last_bar)
+
+        return self.load(ticker, window_start)
+
+
+default_intraday_store = IntradayStore()
@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+try:
+    import pyarrow  # noqa: F401  (parquet engine)
+except ImportError:
+    pyarrow = None
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Where per-ticker parquet files live and how long the latest bar is trusted
+CACHE_DIR = os.getenv('OHLCV_CACHE_DIR', os.path.join('data', 'cache', 'ohlcv'))
+REFRESH_SECONDS = int(os.getenv('OHLCV_REFRESH_SECONDS', '900'))
+# Weekdays that may be missing between a ticker's last cached bar and bulk-ingested bars (a market holiday)
+MAX_INGEST_GAP_WEEKDAYS = 1
+
+
+class OHLCVStore:
+    """On-disk daily bar cache, one parquet file per ticker plus a small JSON index.
+
+    The index records for each ticker the earliest date it was requested from,
+    the last bar it covers and when it was last refreshed, so a rerun only has
+    to fetch the missing tail from the upstream source.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, refresh_seconds=REFRESH_SECONDS):
+        self.cache_dir = cache_dir
+        self.refresh_seconds = refresh_seconds
+        self.enabled = pyarrow is not None
+        self._lock = threading.RLock()
+        self._index_path = os.path.join(cache_dir, '_index.json')
+        self._index = None
+
+    def _path(self, ticker):
+        safe = ticker.upper().replace('/', '_').replace('\\', '_')
+        return os.path.join(self.cache_dir, f"{safe}.parquet")
+
+    def _state_path(self, ticker, name):
+        return self._path(ticker)[:-len('.parquet')] + f".{name}.json"
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self._index_path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        tmp = self._index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path)
+
+    def meta(self, ticker):
+        """Return the index entry for a ticker, or None if it is not cached"""
+        with self._lock:
+            return self._load_index().get(ticker.upper())
+
+    def load(self, ticker):
+        """Load every cached bar for a ticker"""
+        path = self._path(ticker)
+        if not self.enabled or not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"OHLCV cache read error for {ticker}: {e}")
+            return None
+
+    def save(self, ticker, df, requested_from):
+        """Merge bars fetched from requested_from onwards into the ticker's file; returns the merged frame.
+
+        The merge is with the file on disk under the store lock, so concurrent
+        get() calls for the same ticker never overwrite each other's bars.
+        """
+        if not self.enabled or df is None or df.empty:
+            return None
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            index = self._load_index()
+            previous = index.get(ticker.upper())
+            cached = self.load(ticker) if previous else None
+            merged = self.merge(cached, df)
+            path = self._path(ticker)
+            tmp = path + '.tmp'
+            merged.to_parquet(tmp)
+            os.replace(tmp, path)
+
+            # Coverage only extends back past the new bars if they connect to the cached history
+            start = requested_from.strftime('%Y-%m-%d')
+            if previous and cached is not None and not cached.empty and self._connects(cached, df):
+                start = min(start, previous['requested_from'])
+            index[ticker.upper()] = {
+                'requested_from': start,
+                'first_date': merged.index[0].strftime('%Y-%m-%d'),
+                'last_date': merged.index[-1].strftime('%Y-%m-%d'),
+                'fetched_at': time.time(),
+            }
+            self._save_index()
+            return merged
+
+    @staticmethod
+    def _connects(cached, fresh):
+        """True when fresh starts no more than a holiday after the end of cached"""
+        gap = np.busday_count(cached.index[-1].to_datetime64().astype('datetime64[D]') + 1,
+                              fresh.index[0].to_datetime64().astype('datetime64[D]'))
+        return gap <= MAX_INGEST_GAP_WEEKDAYS
+
+    def tickers(self):
+        """Symbols with cached bars"""
+        with self._lock:
+            return set(self._load_index())
+
+    def ingest(self, bars):
+        """Merge a multi-ticker frame ('Ticker' column plus OHLCV) into the store.
+
+        Used for bulk loads such as Polygon grouped daily bars: every ticker file
+        is written once and the index once. Bars that would leave a gap after a
+        ticker's cached history are skipped; the next get() backfills that gap
+        from the ticker's own source. Returns the number of tickers updated.
+        """
+        if not self.enabled or bars is None or bars.empty:
+            return 0
+        updated = 0
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            index = self._load_index()
+            for ticker, group in bars.groupby('Ticker', sort=False):
+                fresh = self.normalize(group.drop(columns='Ticker'))
+                if fresh is None:
+                    continue
+                key = str(ticker).upper()
+                entry = index.get(key)
+                cached = self.load(key) if entry else None
+                if cached is not None and not cached.empty:
+                    if not self._connects(cached, fresh):
+                        continue
+                    requested_from = entry['requested_from']
+                else:
+                    requested_from = fresh.index[0].strftime('%Y-%m-%d')
+                merged = self.merge(cached, fresh)
+                path = self._path(key)
+                merged.to_parquet(path + '.tmp')
+                os.replace(path + '.tmp', path)
+                index[key] = {
+                    'requested_from': min(requested_from, merged.index[0].strftime('%Y-%m-%d')),
+                    'first_date': merged.index[0].strftime('%Y-%m-%d'),
+                    'last_date': merged.index[-1].strftime('%Y-%m-%d'),
+                    'fetched_at': time.time(),
+                }
+                updated += 1
+            self._save_index()
+        return updated
+
+    def save_state(self, ticker, name, state):
+        """Persist a JSON-serializable state (e.g. streaming indicators) next to the bars"""
+        if not self.enabled:
+            return
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._state_path(ticker, name)
+            tmp = path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp, path)
+
+    def load_state(self, ticker, name):
+        """Load a state saved with save_state, or None"""
+        try:
+            with open(self._state_path(ticker, name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def normalize(df):
+        """Coerce an upstream frame to a sorted, tz-naive, de-duplicated OHLCV frame"""
+        if df is None or df.empty or not isinstance(df.index, pd.DatetimeIndex):
+            return None
+        df = df[[c for c in OHLCV_COLUMNS if c in df.columns]].copy()
+        if df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        df.index = df.index.normalize()
+        df.index.name = 'Date'
+        df = df[~df.index.duplicated(keep='last')]
+        return df.sort_index()
+
+    @staticmethod
+    def merge(cached, fresh):
+        """Merge fresh bars over cached ones; fresh values win on overlapping dates"""
+        if cached is None or cached.empty:
+            return fresh
+        if fresh is None or fresh.empty:
+            return cached
+        combined = pd.concat([cached, fresh])
+        combined = combined[~combined.index.duplicated(keep='last')]
+        return combined.sort_index()
+
+    def get(self, ticker, days, fetch):
+        """Return the last `days` calendar days of bars, fetching only what is missing.
+
+        `fetch(days)` must return the most recent `days` of bars from upstream.
+        """
+        if not self.enabled:
+            return fetch(days)
+
+        now = datetime.now()
+        window_start = pd.Timestamp(now - timedelta(days=days)).normalize()
+
+        with self._lock:
+            meta = self.meta(ticker)
+            cached = self.load(ticker) if meta else None
+
+        if cached is None or cached.empty:
+            fresh = fetch(days)
+            normalized = self.normalize(fresh)
+            if normalized is None:
+                # Upstream did not return date-indexed bars, nothing to cache
+                return fresh
+            merged = self.save(ticker, normalized, window_start)
+            if merged is not None:
+                # Another call may have cached more of the window meanwhile
+                normalized = merged
+            return normalized[normalized.index >= window_start]
+
+        if meta['requested_from'] > window_start.strftime('%Y-%m-%d'):
+            # Cache does not reach back far enough, backfill the whole window once
+            fetch_days = days
+        elif time.time() - meta.get('fetched_at', 0) < self.refresh_seconds:
+            fetch_days = 0
+        else:
+            # Refetch from the last cached bar so a partial session bar gets replaced
+            last_date = datetime.strptime(meta['last_date'], '%Y-%m-%d')
+            fetch_days = max((now - last_date).days + 1, 1)
+
+        if fetch_days:
+            fresh = self.normalize(fetch(fetch_days))
+            if fresh is not None:
+                fetched_from = pd.Timestamp(now - timedelta(days=fetch_days)).normalize()
+                cached = self.save(ticker, fresh, fetched_from)
+
+        return cached[cached.index >= window_start]
+
+
+default_store = OHLCVStore()
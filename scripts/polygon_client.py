@@ -1,45 +1,124 @@
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 from datetime import datetime, timedelta
 import os
+import threading
 from dotenv import load_dotenv
+from resilience import get_upstream, check_response
 
 load_dotenv()
 
+# (connect, read) timeouts and keep-alive pool size for api.polygon.io
+REQUEST_TIMEOUT = (float(os.getenv('POLYGON_CONNECT_TIMEOUT', '3.05')), float(os.getenv('POLYGON_TIMEOUT', '10')))
+POOL_SIZE = int(os.getenv('POLYGON_POOL_SIZE', '20'))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide keep-alive HTTP session, so repeat calls skip the TCP and TLS handshakes"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # Retries are handled by the resilience layer, not urllib3
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+            session.mount('https://', adapter)
+            session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+            _session = session
+    return _session
+
+
 class PolygonClient:
     def __init__(self):
         self.api_key = os.getenv('POLYGON_API_KEY', 'VrfSOcc5LpOqortTXVDZuxqP6QWhVfVJ')
         self.base_url = 'https://api.polygon.io'
+        self.upstream = get_upstream('polygon')
+        self.session = get_session()
+    
+    def _get(self, url, params=None, wait=False):
+        """GET through the shared Polygon rate limiter, retry policy and circuit breaker.
+        
+        wait=True blocks until the quota allows the call and retries with backoff (batch
+        jobs). Otherwise a single attempt is made without sleeping, so a page render
+        never blocks on the quota; callers fall back to Yahoo Finance.
+        """
+        params = dict(params or {}, apikey=self.api_key)
+        request = lambda: check_response(self.session.get(url, params=params, timeout=REQUEST_TIMEOUT))
+        if wait:
+            return self.upstream.call_with_timeout(None, request)
+        return self.upstream.try_call(request)
+    
+    @staticmethod
+    def bars_frame(results):
+        """OHLCV DataFrame indexed by bar start time from Polygon aggregate results"""
+        if not results:
+            return pd.DataFrame()
+        df = pd.DataFrame(results)
+        df['Date'] = pd.to_datetime(df['t'], unit='ms')
+        df = df.rename(columns={
+            'o': 'Open', 'h': 'High', 'l': 'Low', 'c': 'Close', 'v': 'Volume'
+        })
+        df.set_index('Date', inplace=True)
+        return df[['Open', 'High', 'Low', 'Close', 'Volume']]
+    
+    def iter_aggregates(self, symbol, start, end, multiplier=1, timespan='day', limit=50000, wait=False):
+        """Yield raw aggregate bars for [start, end], following next_url across result pages"""
+        url = f"{self.base_url}/v2/aggs/ticker/{symbol}/range/{multiplier}/{timespan}/{start}/{end}"
+        params = {'adjusted': 'true', 'sort': 'asc', 'limit': limit}
+        while url:
+            response = self._get(url, params, wait)
+            if response.status_code != 200:
+                return
+            data = response.json()
+            yield from data.get('results') or []
+            # next_url already carries the cursor and query parameters
+            url = data.get('next_url')
+            params = None
     
     def get_stock_data(self, symbol, days=30):
         """Get stock data for the specified number of days"""
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
+        results = self.iter_aggregates(symbol, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+        return self.bars_frame(list(results))
+    
+    def get_minute_bars(self, symbol, start, end, wait=False):
+        """1-minute bars between two tz-naive UTC datetimes"""
+        # Millisecond timestamps let a tail refresh ask for minutes rather than whole days
+        start_ms = pd.Timestamp(start).value // 1_000_000
+        end_ms = pd.Timestamp(end).value // 1_000_000
+        results = self.iter_aggregates(symbol, start_ms, end_ms, 1, 'minute', wait=wait)
+        return self.bars_frame(list(results))
+    
+    def get_grouped_daily(self, date, wait=False):
+        """Daily bars for every US stock on one date in a single request.
         
-        url = f"{self.base_url}/v2/aggs/ticker/{symbol}/range/1/day/{start_date.strftime('%Y-%m-%d')}/{end_date.strftime('%Y-%m-%d')}"
-        params = {'apikey': self.api_key}
-        
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if 'results' in data:
-                df = pd.DataFrame(data['results'])
-                df['Date'] = pd.to_datetime(df['t'], unit='ms')
-                df = df.rename(columns={
-                    'o': 'Open', 'h': 'High', 'l': 'Low', 'c': 'Close', 'v': 'Volume'
-                })
-                df.set_index('Date', inplace=True)
-                return df[['Open', 'High', 'Low', 'Close', 'Volume']]
-        return pd.DataFrame()
+        Returns a DataFrame with a 'Ticker' column plus OHLCV, indexed by date.
+        """
+        url = f"{self.base_url}/v2/aggs/grouped/locale/us/market/stocks/{date}"
+        response = self._get(url, {'adjusted': 'true'}, wait)
+        if response.status_code != 200:
+            return pd.DataFrame()
+        results = response.json().get('results') or []
+        df = self.bars_frame(results)
+        if not df.empty:
+            df.insert(0, 'Ticker', [r['T'] for r in results])
+        return df
     
     def get_current_price(self, symbol):
         """Get current stock price"""
         url = f"{self.base_url}/v2/last/trade/{symbol}"
-        params = {'apikey': self.api_key}
         
-        response = requests.get(url, params=params)
+        response = self._get(url)
         if response.status_code == 200:
             data = response.json()
             if 'results' in data:
                 return data['results']['p']
         return None
+
+
+# Shared instance; the client holds no per-request state
+default_client = PolygonClient()
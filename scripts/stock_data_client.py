@@ -1,15 +1,48 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import yfinance as yf
 import pandas as pd
-from polygon_client import PolygonClient
+import polygon_client
+from ohlcv_store import default_store
+from intraday_store import default_intraday_store
+import timeframes
+from resilience import get_upstream, CircuitOpenError
+from singleflight import SingleFlight
 import streamlit as st
 try:
     from vnstock import Vnstock
 except ImportError:
     Vnstock = None
 
+# Upper bound on concurrent upstream calls per data source, shared by all clients
+SOURCE_LIMITS = {
+    'polygon': threading.BoundedSemaphore(int(os.getenv('POLYGON_MAX_CONCURRENCY', '5'))),
+    'vnstock': threading.BoundedSemaphore(int(os.getenv('VNSTOCK_MAX_CONCURRENCY', '3'))),
+}
+MAX_WORKERS = int(os.getenv('STOCK_DATA_MAX_WORKERS', '8'))
+# Yahoo Finance serves 1-minute bars for the last 30 days, at most 7 days per request
+YAHOO_MINUTE_DAYS = 30
+YAHOO_MINUTE_CHUNK_DAYS = 7
+
+# Concurrent identical fetches from any session share one upstream call
+fetch_flight = SingleFlight()
+
+# Tickers whose last Polygon fetch fell back to Yahoo Finance, with the reason
+polygon_fallbacks = {}
+
+
+def record_fallback(ticker, reason):
+    polygon_fallbacks[ticker.upper()] = reason
+    print(f"Polygon unavailable for {ticker} ({reason}), using Yahoo Finance")
+
+
 class StockDataClient:
-    def __init__(self):
-        self.polygon_client = PolygonClient()
+    def __init__(self, store=None, intraday_store=None):
+        self.polygon_client = polygon_client.default_client
+        self.store = store or default_store
+        self.intraday_store = intraday_store or default_intraday_store
         
     def is_vietnamese_stock(self, ticker):
         """Check if ticker is Vietnamese stock"""
@@ -18,14 +51,85 @@ class StockDataClient:
     def get_stock_data(self, ticker, days=365):
         """Get stock data from appropriate source"""
         try:
-            if self.is_vietnamese_stock(ticker):
-                return self._get_vnstock_data(ticker, days)
-            else:
-                return self._get_polygon_data(ticker, days)
+            return self._fetch(ticker, days)
         except Exception as e:
             st.error(f"Error fetching data for {ticker}: {str(e)}")
             return None
     
+    def get_bars(self, ticker, timeframe='1d', days=365):
+        """Get OHLCV bars at a timeframe from timeframes.TIMEFRAMES (1m, 5m, 15m, 1h, 1d).
+        
+        Intraday timeframes are resampled from one cached 1-minute series, so
+        switching between them never calls the upstream again.
+        """
+        if not timeframes.is_intraday(timeframe):
+            return self.get_stock_data(ticker, days)
+        try:
+            minutes = self._fetch_minutes(ticker, min(days, timeframes.MAX_DAYS[timeframe]))
+        except Exception as e:
+            st.error(f"Error fetching {timeframe} data for {ticker}: {str(e)}")
+            return None
+        if minutes is None or minutes.empty:
+            return None
+        return timeframes.resample(minutes, timeframe)
+    
+    def get_many(self, tickers, days=365, max_workers=MAX_WORKERS):
+        """Get stock data for several tickers concurrently.
+        
+        Returns a dict of ticker -> DataFrame (None when every source failed).
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+        
+        def fetch_one(ticker):
+            try:
+                return self._fetch(ticker, days)
+            except Exception as e:
+                # Worker threads have no Streamlit context, so no st.error here
+                print(f"Error fetching data for {ticker}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as executor:
+            results = executor.map(fetch_one, tickers)
+            return dict(zip(tickers, results))
+    
+    def source_for(self, ticker):
+        """Name of the primary upstream source for a ticker"""
+        return 'vnstock' if self.is_vietnamese_stock(ticker) else 'polygon'
+    
+    def _fetch(self, ticker, days):
+        if self.is_vietnamese_stock(ticker):
+            upstream = self._get_vnstock_data
+        else:
+            upstream = self._get_polygon_data
+        limit = SOURCE_LIMITS[self.source_for(ticker)]
+        
+        def fetch(d):
+            with limit:
+                return upstream(ticker, d)
+        
+        # Historical bars never change, only the missing tail is fetched upstream
+        key = (self.source_for(ticker), ticker.upper(), days)
+        df = fetch_flight.do(key, lambda: self.store.get(ticker, days, fetch))
+        # Coalesced callers share the frame; hand out copies so callers can modify them
+        return df.copy() if isinstance(df, pd.DataFrame) else df
+    
+    def _fetch_minutes(self, ticker, days):
+        if self.is_vietnamese_stock(ticker):
+            upstream = self._get_vnstock_minutes
+        else:
+            upstream = self._get_polygon_minutes
+        limit = SOURCE_LIMITS[self.source_for(ticker)]
+        
+        def fetch(start, end):
+            with limit:
+                return upstream(ticker, start, end)
+        
+        key = (self.source_for(ticker), ticker.upper(), timeframes.BASE_TIMEFRAME, days)
+        df = fetch_flight.do(key, lambda: self.intraday_store.get(ticker, days, fetch))
+        return df.copy() if isinstance(df, pd.DataFrame) else df
+    
     def _get_vnstock_data(self, ticker, days):
         """Get data from vnstock for Vietnamese stocks"""
         try:
@@ -37,12 +141,19 @@ class StockDataClient:
             
             # Use new vnstock API
             stock = Vnstock().stock(symbol=clean_ticker, source='VCI')
-            df = stock.quote.history(start='2023-01-01', end='2024-12-31')
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=days)
+            df = get_upstream('vnstock').call(stock.quote.history, start=start_date.strftime('%Y-%m-%d'),
+                                              end=end_date.strftime('%Y-%m-%d'))
             
             if df is None or df.empty:
                 # Fallback to Yahoo Finance
                 return self._get_yahoo_data(ticker, days)
                 
+            # vnstock returns the bar date as a column rather than the index
+            if 'time' in df.columns:
+                df = df.set_index(pd.to_datetime(df['time']))
+            
             # Rename columns to match standard format
             column_mapping = {
                 'open': 'Open',
@@ -75,7 +186,7 @@ class StockDataClient:
             return self._get_yahoo_data(ticker, days)
     
     def _get_yahoo_data(self, ticker, days):
-        """Get data from Yahoo Finance for Vietnamese stocks"""
+        """Get data from Yahoo Finance (Vietnamese stocks and the Polygon fallback)"""
         try:
             stock = yf.Ticker(ticker)
             df = stock.history(period=f"{days}d")
@@ -99,9 +210,74 @@ class StockDataClient:
             return None
     
     def _get_polygon_data(self, ticker, days):
-        """Get data from Polygon.io for US stocks"""
+        """Get data from Polygon.io for US stocks, falling back to Yahoo Finance when it fails"""
+        try:
+            df = self.polygon_client.get_stock_data(ticker, days)
+            if df is not None and not df.empty:
+                polygon_fallbacks.pop(ticker.upper(), None)
+                return df
+            record_fallback(ticker, "no data")
+        except CircuitOpenError:
+            # Polygon is degraded, skip it until the breaker lets a trial call through
+            record_fallback(ticker, "circuit open")
+        except Exception as e:
+            record_fallback(ticker, str(e))
+        return self._get_yahoo_data(ticker, days)
+    
+    def _get_yahoo_minutes(self, ticker, start, end):
+        """1-minute bars from Yahoo Finance, limited to its last 30 days"""
+        covers_from = max(start, datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=YAHOO_MINUTE_DAYS - 1))
+        frames = []
         try:
-            return self.polygon_client.get_stock_data(ticker, days)
+            stock = yf.Ticker(ticker)
+            chunk_start = covers_from
+            while chunk_start < end:
+                chunk_end = min(end, chunk_start + timedelta(days=YAHOO_MINUTE_CHUNK_DAYS))
+                # Store times are naive UTC; tell yfinance so it does not assume exchange time
+                df = stock.history(start=pd.Timestamp(chunk_start, tz='UTC'), end=pd.Timestamp(chunk_end, tz='UTC'), interval='1m')
+                if not df.empty:
+                    frames.append(df)
+                chunk_start = chunk_end
         except Exception as e:
-            print(f"Polygon error: {e}")
+            print(f"Yahoo Finance error: {e}")
+        if not frames:
             return None
+        df = pd.concat(frames)
+        if covers_from > start:
+            # Tell the intraday store the older part of the window is still missing
+            print(f"Yahoo Finance keeps {YAHOO_MINUTE_DAYS} days of minute bars; {ticker} starts at {covers_from:%Y-%m-%d}")
+            df.attrs['covers_from'] = covers_from
+        return df
+    
+    def _get_polygon_minutes(self, ticker, start, end):
+        """1-minute bars from Polygon.io, falling back to Yahoo Finance when it fails"""
+        try:
+            df = self.polygon_client.get_minute_bars(ticker, start, end)
+            if df is not None and not df.empty:
+                polygon_fallbacks.pop(ticker.upper(), None)
+                return df
+            record_fallback(ticker, "no minute data")
+        except CircuitOpenError:
+            record_fallback(ticker, "circuit open")
+        except Exception as e:
+            record_fallback(ticker, str(e))
+        return self._get_yahoo_minutes(ticker, start, end)
+    
+    def _get_vnstock_minutes(self, ticker, start, end):
+        """1-minute bars from vnstock (exchange local time, converted to UTC)"""
+        if Vnstock is None:
+            return self._get_yahoo_minutes(ticker, start, end)
+        try:
+            stock = Vnstock().stock(symbol=ticker.replace('.VN', ''), source='VCI')
+            df = get_upstream('vnstock').call(stock.quote.history, start=start.strftime('%Y-%m-%d'),
+                                              end=end.strftime('%Y-%m-%d'), interval='1m')
+            if df is None or df.empty or 'time' not in df.columns:
+                return self._get_yahoo_minutes(ticker, start, end)
+            index = pd.DatetimeIndex(pd.to_datetime(df['time']))
+            if index.tz is None:
+                index = index.tz_localize('Asia/Ho_Chi_Minh')
+            df = df.set_index(index)
+            return df.rename(columns=str.capitalize)[['Open', 'High', 'Low', 'Close', 'Volume']]
+        except Exception as e:
+            print(f"vnstock error: {e}")
+            return self._get_yahoo_minutes(ticker, start, end)
@@ -0,0 +1,250 @@
+import csv
+import math
+import os
+import sqlite3
+import threading
+import unicodedata
+from update_top10_tickers import TOP_10_STOCKS
+
+# Ticker universe sources, in priority order (the first source that lists a symbol wins)
+TICKERS_FILE = os.getenv('TICKERS_FILE', 'all_tickers.txt')
+SP500_CSV = os.path.join('data', 'SP500.csv')
+TICKERS_CSV = os.path.join('data', 'tickers.csv')
+DB_PATH = os.getenv('TICKER_DB_PATH', os.path.join('data', 'cache', 'tickers.sqlite'))
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE tickers (
+    id INTEGER PRIMARY KEY,
+    symbol TEXT NOT NULL UNIQUE,
+    base TEXT NOT NULL,
+    name TEXT NOT NULL,
+    sector TEXT,
+    country TEXT,
+    name_key TEXT NOT NULL
+);
+CREATE INDEX tickers_base ON tickers (base);
+CREATE INDEX tickers_name_key ON tickers (name_key);
+CREATE TABLE grams (gram TEXT NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (gram, id)) WITHOUT ROWID;
+CREATE TABLE gram_counts (gram TEXT PRIMARY KEY, n INTEGER NOT NULL) WITHOUT ROWID;
+"""
+
+
+def fold(text):
+    """Lowercase, strip Vietnamese diacritics and collapse punctuation to single spaces"""
+    text = unicodedata.normalize('NFD', text.replace('đ', 'd').replace('Đ', 'D'))
+    text = ''.join(c if c.isalnum() else ' ' for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def trigrams(text, pad=True):
+    """Character trigrams; indexed text is padded so word starts and ends get their own grams"""
+    text = f" {text} " if pad else text
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _parse_line(line):
+    parts = [p.strip() for p in line.strip().split('|')]
+    if not parts[0]:
+        return None
+    name = parts[1] if len(parts) > 1 and parts[1] else parts[0]
+    sector = parts[2] if len(parts) > 2 else ''
+    country = parts[3] if len(parts) > 3 else 'Unknown'
+    return parts[0], name, sector, country
+
+
+def read_tickers_file(path):
+    """Rows from all_tickers.txt (SYMBOL|COMPANY_NAME|SECTOR|COUNTRY), as written by update_tickers.py"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [row for row in map(_parse_line, f) if row]
+
+
+def read_sp500_csv(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(r['Symbol'].strip(), r['Name'].strip(), r['Sector'].strip(), 'VN')
+                for r in csv.DictReader(f, skipinitialspace=True) if r.get('Symbol')]
+
+
+def read_tickers_csv(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(r['company_ticker'].strip() + '.VN', r['company_name'].strip(), 'Vietnam', 'VN')
+                for r in csv.DictReader(f) if r.get('company_ticker')]
+
+
+DEFAULT_SOURCES = [
+    (TICKERS_FILE, read_tickers_file),
+    (SP500_CSV, read_sp500_csv),
+    (TICKERS_CSV, read_tickers_csv),
+]
+
+
+class TickerRegistry:
+    """SQLite-backed ticker universe with symbol and name-trigram indexes for search-as-you-type.
+
+    The database is rebuilt only when one of the source files changes, so page
+    reruns just run indexed lookups instead of re-parsing the ticker lists.
+    """
+
+    def __init__(self, db_path=DB_PATH, sources=DEFAULT_SOURCES):
+        self.db_path = db_path
+        self.sources = sources
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _signature(self):
+        parts = []
+        for path, _ in self.sources:
+            try:
+                st = os.stat(path)
+                parts.append(f"{path}:{st.st_mtime_ns}:{st.st_size}")
+            except OSError:
+                parts.append(f"{path}:missing")
+        return ';'.join(parts)
+
+    def _rows(self):
+        rows = [_parse_line(line) for line in TOP_10_STOCKS]
+        for path, reader in self.sources:
+            try:
+                rows.extend(reader(path))
+            except (OSError, KeyError, csv.Error) as e:
+                if not isinstance(e, FileNotFoundError):
+                    print(f"Ticker source error for {path}: {e}")
+        return rows
+
+    def build(self, rows, signature=''):
+        """(Re)create the database from (symbol, name, sector, country) rows.
+
+        Ids are assigned US first and then in source order, so ordering by id is the default ranking.
+        """
+        seen = {}
+        for symbol, name, sector, country in rows:
+            seen.setdefault(symbol.upper(), (symbol.upper(), name, sector, country))
+        ordered = sorted(seen.values(), key=lambda r: r[3] != 'US')
+
+        if self.db_path != ':memory:':
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        tmp = self.db_path + '.tmp' if self.db_path != ':memory:' else ':memory:'
+        if tmp != ':memory:' and os.path.exists(tmp):
+            os.remove(tmp)
+        conn = sqlite3.connect(tmp, check_same_thread=False)
+        conn.executescript(SCHEMA)
+        tickers, grams = [], []
+        for i, (symbol, name, sector, country) in enumerate(ordered, 1):
+            base = symbol.split('.')[0]
+            name_key = fold(name)
+            tickers.append((i, symbol, base, name, sector, country, name_key))
+            grams.extend((g, i) for g in trigrams(name_key) | trigrams(base.lower()))
+        conn.executemany("INSERT INTO tickers VALUES (?, ?, ?, ?, ?, ?, ?)", tickers)
+        conn.executemany("INSERT OR IGNORE INTO grams VALUES (?, ?)", grams)
+        conn.execute("INSERT INTO gram_counts SELECT gram, COUNT(*) FROM grams GROUP BY gram")
+        conn.execute("INSERT INTO meta VALUES ('signature', ?)", (signature,))
+        conn.commit()
+        if tmp == ':memory:':
+            return conn
+        conn.close()
+        os.replace(tmp, self.db_path)
+        return sqlite3.connect(self.db_path, check_same_thread=False)
+
+    def _connect(self):
+        if self._conn is None:
+            signature = self._signature()
+            conn = None
+            if self.db_path != ':memory:' and os.path.exists(self.db_path):
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                try:
+                    stored = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+                except sqlite3.DatabaseError:
+                    stored = None
+                if not stored or stored[0] != signature:
+                    conn.close()
+                    conn = None
+            self._conn = conn or self.build(self._rows(), signature)
+        return self._conn
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM tickers")[0][0]
+
+    def get(self, symbol):
+        """Return {'symbol', 'name', 'sector', 'country'} for an exact symbol, or None"""
+        row = self._query("SELECT symbol, name, sector, country FROM tickers WHERE symbol = ?",
+                          (symbol.upper(),))
+        return dict(zip(('symbol', 'name', 'sector', 'country'), row[0])) if row else None
+
+    def label(self, symbol):
+        """Display string for a selectbox option"""
+        t = self.get(symbol)
+        return f"{t['symbol']} - {t['name']} [{t['country']}]" if t else symbol
+
+    def _gram_counts(self, grams):
+        placeholders = ','.join('?' * len(grams))
+        counts = dict(self._query(f"SELECT gram, n FROM gram_counts WHERE gram IN ({placeholders})", tuple(grams)))
+        return sorted(((counts.get(g, 0), g) for g in grams))
+
+    def _substring(self, key, limit):
+        """Walk the posting list of the rarest trigram in rank order and keep rows containing key"""
+        count, rarest = self._gram_counts(trigrams(key, pad=False))[0]
+        if not count:
+            return []
+        matches = []
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT t.symbol, t.name_key, t.base FROM grams g JOIN tickers t ON t.id = g.id "
+                "WHERE g.gram = ? ORDER BY g.id", (rarest,))
+            for symbol, name_key, base in rows:
+                if key in name_key or key in base.lower():
+                    matches.append((symbol,))
+                    if len(matches) >= limit:
+                        break
+        return matches
+
+    def _fuzzy(self, key, limit):
+        """Typo-tolerant fallback: rows sharing most of the query's rarer trigrams"""
+        counts = self._gram_counts(trigrams(key, pad=False))
+        # Very common grams say little about the match and dominate the scan, skip the top third
+        grams = [g for n, g in counts[:max(2, len(counts) * 2 // 3)] if n]
+        if not grams:
+            return []
+        placeholders = ','.join('?' * len(grams))
+        return self._query(
+            f"SELECT t.symbol FROM grams g JOIN tickers t ON t.id = g.id WHERE g.gram IN ({placeholders}) "
+            f"GROUP BY g.id HAVING COUNT(*) >= ? ORDER BY COUNT(*) DESC, g.id LIMIT ?",
+            (*grams, math.ceil(len(grams) * 0.6), limit))
+
+    def search(self, query, limit=50):
+        """Symbols matching a search-as-you-type query, best matches first.
+
+        Order: exact symbol, symbol prefix, name prefix, then substring matches;
+        fuzzy trigram matches are used only when nothing else matched. An empty
+        query returns the default ranking (US first).
+        """
+        key = fold(query or '')
+        if not key:
+            return [r[0] for r in self._query("SELECT symbol FROM tickers ORDER BY id LIMIT ?", (limit,))]
+
+        results = {}
+
+        def add(rows):
+            for (symbol,) in rows:
+                if len(results) >= limit:
+                    return
+                results.setdefault(symbol, None)
+
+        upper = (query or '').strip().upper()
+        add(self._query("SELECT symbol FROM tickers WHERE symbol = ? OR base = ? ORDER BY id", (upper, upper)))
+        # Range scans on the base/name_key indexes implement prefix matching
+        add(self._query("SELECT symbol FROM tickers WHERE base >= ? AND base < ? ORDER BY id LIMIT ?",
+                        (upper, upper + '\uffff', limit)))
+        add(self._query("SELECT symbol FROM tickers WHERE name_key >= ? AND name_key < ? ORDER BY id LIMIT ?",
+                        (key, key + '\uffff', limit)))
+        if len(results) < limit and len(key) >= 3:
+            add(self._substring(key, limit - len(results)))
+        if not results and len(key) >= 5:
+            add(self._fuzzy(key, limit))
+        return list(results)
+
+
+default_registry = TickerRegistry()
@@ -0,0 +1,93 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls with the same key share one in-flight execution: the first
+caller runs the function, later callers wait for and receive its result (or
+its exception). Nothing is cached once the call completes, so this only cuts
+duplicate upstream work during bursts, e.g. many sessions opening the same
+ticker at once.
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls from threads (do) and coroutines (ado)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        """Run func() once for all threads that ask for key at the same time"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, coro_func):
+        """Await coro_func() once for all coroutines on this event loop that ask for key at the same time"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._async_calls.get((loop, key))
+            leader = future is None
+            if leader:
+                future = self._async_calls[(loop, key)] = loop.create_future()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            # shield: one waiter being cancelled must not cancel the shared call
+            return await asyncio.shield(future)
+
+        try:
+            result = await coro_func()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._async_calls[(loop, key)]
+
+    def stats(self):
+        with self._lock:
+            return {"executions": self.executions, "coalesced": self.coalesced, "in_flight": len(self._calls)}
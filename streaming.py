@@ -0,0 +1,109 @@
+"""
+Throttled rendering of streamed LLM output.
+
+Redrawing a Streamlit placeholder on every chunk re-sends and re-parses the
+whole growing markdown each time, so a long answer costs O(n²) in websocket
+traffic and browser work. StreamRenderer buffers chunks and redraws at most
+every STREAM_FLUSH_SECONDS, or sooner once STREAM_FLUSH_CHARS have piled up.
+The first chunk is drawn at once, so time to first visible token is unchanged,
+and a final flush always draws the complete text.
+"""
+import os
+import time
+
+FLUSH_SECONDS = float(os.getenv('STREAM_FLUSH_SECONDS', '0.1'))
+FLUSH_CHARS = int(os.getenv('STREAM_FLUSH_CHARS', '1000'))
+CURSOR = ' ▌'
+
+
+class StreamRenderer:
+    """Accumulate streamed chunks and redraw a placeholder on a time or size cadence"""
+
+    def __init__(self, placeholder, prefix='', interval=FLUSH_SECONDS, flush_chars=FLUSH_CHARS, cursor=CURSOR):
+        self.placeholder = placeholder
+        self.prefix = prefix
+        self.interval = interval
+        self.flush_chars = flush_chars
+        self.cursor = cursor
+        self._parts = []
+        self._pending = 0  # characters received since the last redraw
+        self._last_flush = None
+        self.started = None
+        self.first_chunk = None
+        self.finished = None
+        self.chunks = 0
+        self.chars = 0
+        self.flushes = 0
+        self.bytes_sent = 0
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def write(self, chunk):
+        if not chunk:
+            return
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now
+        if self.first_chunk is None:
+            self.first_chunk = now
+        self._parts.append(chunk)
+        self.chunks += 1
+        self.chars += len(chunk)
+        self._pending += len(chunk)
+        if (self._last_flush is None or now - self._last_flush >= self.interval
+                or self._pending >= self.flush_chars):
+            self.flush(now=now)
+
+    def flush(self, final=False, now=None):
+        body = self.prefix + self.text + ('' if final else self.cursor)
+        self.placeholder.markdown(body)
+        self.flushes += 1
+        self.bytes_sent += len(body.encode('utf-8'))
+        self._pending = 0
+        self._last_flush = now or time.perf_counter()
+
+    def close(self):
+        """Draw the complete text without the cursor and return it"""
+        if self.chunks and (self._pending or self.cursor):
+            self.flush(final=True)
+        self.finished = time.perf_counter()
+        return self.text
+
+    def consume(self, chunks):
+        """Render an iterable of text chunks and return the full text"""
+        self.started = time.perf_counter()
+        try:
+            for chunk in chunks:
+                self.write(chunk)
+        finally:
+            # Release the upstream stream now (e.g. a Bedrock reader thread on a rerun), not at garbage collection
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+            # Whatever arrived before an error stays on screen
+            self.close()
+        return self.text
+
+    def stats(self):
+        """Chunk-rate and redraw counters for monitoring"""
+        end = self.finished or time.perf_counter()
+        elapsed = end - self.started if self.started is not None else 0.0
+        return {
+            "chunks": self.chunks,
+            "chars": self.chars,
+            "flushes": self.flushes,
+            "bytes_sent": self.bytes_sent,
+            "seconds": elapsed,
+            "first_chunk_seconds": self.first_chunk - self.started if self.first_chunk is not None else None,
+            "chunks_per_second": self.chunks / elapsed if elapsed else 0.0,
+            "chars_per_second": self.chars / elapsed if elapsed else 0.0,
+        }
+
+
+def render_stream(chunks, placeholder, prefix='', **kwargs):
+    """Render chunks into placeholder with a StreamRenderer; returns the renderer after the stream ends"""
+    renderer = StreamRenderer(placeholder, prefix, **kwargs)
+    renderer.consume(chunks)
+    return renderer
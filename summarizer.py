@@ -0,0 +1,127 @@
+"""
+Map-reduce summarization for documents longer than one prompt.
+
+The document is split into token-budgeted chunks, each chunk is condensed into
+notes by Bedrock, multiplexed on the shared streaming event loop with bounded
+concurrency (map), and the notes are combined -
+recursively if they are still too long - into the prompt for the final,
+streamed summary (reduce). The document may arrive as a stream of segments
+(PDF pages as they are parsed); chunks are cut and mapped as soon as enough
+text has arrived. Chunk notes do not depend on the summary length or focus, so
+they are cached by content hash and changing those options only re-runs the
+reduce step.
+"""
+import hashlib
+import itertools
+import os
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+import libs as glib
+import prompts
+from lru import LRUCache
+
+CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', '3000'))
+MAX_CONCURRENCY = int(os.getenv('SUMMARY_MAX_CONCURRENCY', '4'))
+MAX_LEVELS = 3
+chunk_cache = LRUCache(maxsize=int(os.getenv('SUMMARY_CACHE_SIZE', '2048')))
+
+MAP_PROMPT = """Extract the essential content of this section of a longer document as concise notes.
+Keep every key fact, figure, date, name, risk, decision and recommendation; drop filler.
+
+<section>
+{text}
+</section>
+
+Notes:"""
+
+
+def split_chunks(text, chunk_tokens=CHUNK_TOKENS):
+    """Split text into chunks of at most chunk_tokens tokens on natural boundaries"""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_tokens, chunk_overlap=0,
+                                              length_function=prompts.count_tokens,
+                                              separators=["\n\n", "\n", ". ", " ", ""])
+    return [c for c in splitter.split_text(text) if c.strip()]
+
+
+def chunk_key(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def iter_chunks(segments, chunk_tokens=CHUNK_TOKENS):
+    """split_chunks over a stream of segments, yielding chunks before the stream ends"""
+    count = prompts.counter()  # buffers are one-off, keep them out of the token cache
+    buffer = ''
+    for segment in segments:
+        buffer = f"{buffer}\n{segment}" if buffer else segment
+        # Wait for two chunks' worth, so the kept tail still has room to grow into a full chunk
+        if count(buffer) > 2 * chunk_tokens:
+            *ready, buffer = split_chunks(buffer, chunk_tokens)
+            yield from ready
+    yield from split_chunks(buffer, chunk_tokens) if buffer.strip() else ()
+
+
+def map_chunks(chunks, on_progress=None, max_concurrency=MAX_CONCURRENCY):
+    """Notes for each chunk, cached by the SHA-256 of its text; on_progress(done, total) runs on the calling thread.
+
+    chunks may be a lazy iterable: uncached chunks are submitted as they arrive.
+    """
+    keys, notes, missing = [], [], []
+
+    def uncached_prompts():
+        for chunk in chunks:
+            keys.append(chunk_key(chunk))
+            notes.append(chunk_cache.get(keys[-1]))
+            if notes[-1] is None:
+                missing.append(len(notes) - 1)
+                yield MAP_PROMPT.format(text=chunk)
+
+    # Chunk notes have their own cache, so the response cache is not involved
+    progress = (lambda done, total: on_progress(len(notes) - total + done, len(notes))) if on_progress else None
+    texts = glib.complete_many(uncached_prompts(), max_concurrency, progress)
+    for i, text in zip(missing, texts):
+        chunk_cache.put(keys[i], text)
+        notes[i] = text
+    if on_progress and not missing and notes:
+        on_progress(len(notes), len(notes))
+    return notes
+
+
+def condense(document, on_progress=None, chunk_tokens=CHUNK_TOKENS):
+    """Reduce a document to notes that fit in one chunk, mapping again over the notes if needed.
+
+    document is a string or an iterable of text segments; segments are chunked
+    and mapped while the rest are still being produced.
+    """
+    segments = [document] if isinstance(document, str) else document
+    chunks = iter_chunks(segments, chunk_tokens)
+    head = list(itertools.islice(chunks, 2))
+    if len(head) < 2:
+        # The whole document fits in one chunk
+        return head[0] if head else ''
+    progress = (lambda done, total: on_progress(1, done, total)) if on_progress else None
+    text = "\n\n".join(map_chunks(itertools.chain(head, chunks), progress))
+
+    level = 1
+    while prompts.count_tokens(text) > chunk_tokens and level < MAX_LEVELS:
+        level += 1
+        chunks = split_chunks(text, chunk_tokens)
+        progress = (lambda done, total, level=level: on_progress(level, done, total)) if on_progress else None
+        text = "\n\n".join(map_chunks(chunks, progress))
+    return text
+
+
+class EmptyDocumentError(ValueError):
+    """The document has no extractable text"""
+
+
+def summarize(document, build_prompt, on_progress=None, chunk_tokens=CHUNK_TOKENS):
+    """Stream the final summary of a document (a string or an iterable of segments).
+
+    build_prompt(document_text) returns the final summary prompt for the given
+    (possibly condensed) document text. on_progress(level, done, total) reports
+    map progress, level 1 being the original chunks. Raises EmptyDocumentError
+    when the document has no text.
+    """
+    text = condense(document, on_progress, chunk_tokens)
+    if not text.strip():
+        raise EmptyDocumentError("No text could be extracted from the document")
+    return glib.call_claude_sonet_stream(build_prompt(text))
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modules are flat at the repo root and in scripts/, as the pages import them
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
@@ -0,0 +1,51 @@
+import numpy as np
+from doc_index import DocumentIndex
+
+PARAGRAPHS = [
+    "Revenue grew in the third quarter.",
+    "Dividends are paid twice a year.",
+    "Dividends rose and dividends were reinvested.",
+    "The board approved a buyback.",
+    "Dividends were cut.",
+]
+TEXT = "\n\n".join(PARAGRAPHS)
+
+
+def one_hot_embedder(vectors):
+    """Embed each known chunk (or query) to a fixed vector"""
+    def embed(texts):
+        return np.array([vectors[t] for t in texts], dtype=float)
+    return embed
+
+
+def test_embedding_search_is_ranked_by_similarity():
+    vectors = {p: [1.0, float(i)] for i, p in enumerate(PARAGRAPHS)}
+    vectors['query'] = [0.0, 1.0]
+    index = DocumentIndex(TEXT, embedder=one_hot_embedder(vectors), chunk_size=50, chunk_overlap=0)
+    assert index.method == 'embedding'
+    assert index.chunks == PARAGRAPHS
+    # Cosine similarity to (0, 1) grows with i
+    assert index.search('query', k=3) == PARAGRAPHS[::-1][:3]
+    assert index.search('query', k=10) == PARAGRAPHS[::-1]
+
+
+def test_ties_keep_document_order():
+    vectors = {p: [1.0, 0.0] for p in PARAGRAPHS}
+    vectors['query'] = [1.0, 0.0]
+    index = DocumentIndex(TEXT, embedder=one_hot_embedder(vectors), chunk_size=50, chunk_overlap=0)
+    assert index.search('query', k=3) == PARAGRAPHS[:3]
+
+
+def test_bm25_search_is_ranked_by_score():
+    index = DocumentIndex(TEXT, chunk_size=50, chunk_overlap=0)
+    assert index.method == 'bm25'
+    scores = index.index.scores('dividends')
+    results = index.search('dividends', k=3)
+    ranked = [scores[index.chunks.index(r)] for r in results]
+    assert ranked == sorted(ranked, reverse=True)
+    assert results[0] == PARAGRAPHS[2]
+    assert set(results) == set(PARAGRAPHS[1:3] + PARAGRAPHS[4:])
+
+
+def test_empty_document():
+    assert DocumentIndex("   ").search('anything') == []
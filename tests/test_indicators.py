@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import indicators
+from ohlcv_store import OHLCVStore
+
+
+def synthetic_bars(n, seed=7):
+    """Random-walk daily OHLCV bars"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = np.abs(rng.normal(0, 0.01, n)) * close
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(1_000_000, 50_000_000, n).astype(float)
+    index = pd.date_range('2020-01-01', periods=n, freq='D')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+
+def assert_rows_match(batch, streamed):
+    for col in streamed.columns:
+        np.testing.assert_allclose(streamed[col].to_numpy(), batch[col].to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=col)
+
+
+def test_streaming_matches_batch():
+    df = synthetic_bars(300)
+    state = indicators.IndicatorState()
+    streamed = pd.DataFrame([state.update(bar, ts) for ts, bar in df.iterrows()], index=df.index)
+    assert_rows_match(indicators.compute_indicators(df)[streamed.columns], streamed)
+
+
+def test_saved_state_resumes_like_batch(tmp_path):
+    df = synthetic_bars(320)
+    history = 250
+    store = OHLCVStore(cache_dir=str(tmp_path))
+    store.enabled = True
+    store.save_state('TEST', 'indicators', indicators.IndicatorState.from_frame(df.iloc[:history]).to_dict())
+
+    state = indicators.IndicatorState.from_dict(store.load_state('TEST', 'indicators'))
+    assert state.last_date == df.index[history - 1].isoformat()
+    rows = [state.update(bar, ts) for ts, bar in df.iloc[history:].iterrows()]
+    streamed = pd.DataFrame(rows, index=df.index[history:])
+
+    batch = indicators.compute_indicators(df).iloc[history:]
+    assert_rows_match(batch[streamed.columns], streamed)
+
+
+def test_copy_leaves_state_untouched():
+    df = synthetic_bars(60)
+    state = indicators.IndicatorState.from_frame(df.iloc[:-1])
+    before = state.to_dict()
+    state.copy().update(df.iloc[-1], df.index[-1])
+    assert state.to_dict() == before
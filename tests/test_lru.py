@@ -0,0 +1,85 @@
+import threading
+import time
+from lru import LRUCache
+
+
+def test_least_recently_used_is_evicted():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the oldest
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+    assert len(cache) == 2
+
+
+def test_contains_does_not_refresh_recency():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert 'a' in cache
+    cache.put('c', 3)
+    assert 'a' not in cache
+    assert cache.stats()['hits'] == 0
+
+
+def test_entries_expire_after_ttl():
+    cache = LRUCache(maxsize=4, ttl=0.05)
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(0.1)
+    assert 'a' not in cache
+    assert cache.get('a', 'missing') == 'missing'
+    assert cache.get_or_compute('a', lambda: 2) == 2
+    assert cache.get('a') == 2
+
+
+def test_put_refreshes_ttl():
+    cache = LRUCache(maxsize=4, ttl=0.1)
+    cache.put('a', 1)
+    time.sleep(0.06)
+    cache.put('a', 2)
+    time.sleep(0.06)
+    assert cache.get('a') == 2
+
+
+def test_get_or_compute_counts_and_caches():
+    cache = LRUCache(maxsize=4)
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute('k', lambda: calls.append(1) or 'v') == 'v'
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 1)
+    assert stats['hit_rate'] == 2 / 3
+
+
+def test_concurrent_misses_compute_once():
+    cache = LRUCache(maxsize=4)
+    calls = []
+    start = threading.Barrier(20)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'v'
+
+    def run():
+        start.wait()
+        assert cache.get_or_compute('k', compute) == 'v'
+
+    threads = [threading.Thread(target=run) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+
+
+def test_clear():
+    cache = LRUCache(maxsize=4)
+    cache.put('a', 1)
+    cache.clear()
+    assert len(cache) == 0 and 'a' not in cache
@@ -0,0 +1,100 @@
+import threading
+import pytest
+import prompts
+from memory import ConversationMemory, format_turn
+
+
+@pytest.fixture(autouse=True)
+def estimated_counts(monkeypatch):
+    monkeypatch.setattr(prompts, '_counter', prompts.estimate_tokens)
+    prompts.token_cache.clear()
+    yield
+    prompts.token_cache.clear()
+
+
+class Summarizer:
+    """Records folds; a fold blocks until released when `gate` is set"""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.calls = []
+
+    def __call__(self, summary, messages):
+        self.calls.append((summary, len(messages)))
+        if self.gate is not None:
+            self.gate.wait()
+        return f"{summary}+{len(messages)}".lstrip('+')
+
+
+def conversation(turns):
+    messages = []
+    for i in range(turns):
+        messages.append({'role': 'user', 'content': f"question {i}"})
+        messages.append({'role': 'assistant', 'content': f"answer {i}"})
+    return messages
+
+
+def settle(memory):
+    if memory._pending is not None:
+        memory._pending[1].result()
+
+
+def test_short_conversation_is_sent_verbatim():
+    summarizer = Summarizer()
+    memory = ConversationMemory(keep_turns=4, summarizer=summarizer)
+    messages = conversation(3)
+    assert memory.history(messages) == [format_turn(m) for m in messages]
+    assert summarizer.calls == []
+
+
+def test_older_turns_are_folded_into_the_summary():
+    summarizer = Summarizer()
+    memory = ConversationMemory(keep_turns=2, summarizer=summarizer)
+    messages = conversation(5)
+    memory.history(messages)
+    settle(memory)
+    assert summarizer.calls == [('', 6)]
+
+    parts = memory.history(messages)
+    assert parts[0] == "Summary of the earlier conversation: 6"
+    assert parts[1:] == [format_turn(m) for m in messages[6:]]
+    assert memory.summarized == 6
+
+
+def test_pending_fold_keeps_unfolded_turns():
+    gate = threading.Event()
+    memory = ConversationMemory(keep_turns=2, summarizer=Summarizer(gate))
+    messages = conversation(5)
+    # The fold is still running: nothing is lost meanwhile
+    assert memory.history(messages) == [format_turn(m) for m in messages]
+    gate.set()
+    settle(memory)
+
+
+def test_history_stays_within_the_token_cap():
+    memory = ConversationMemory(keep_turns=4, history_tokens=60, summarizer=Summarizer())
+    messages = [{'role': 'user', 'content': 'word ' * 100}, {'role': 'assistant', 'content': 'short answer'}]
+    parts = memory.history(messages)
+    settle(memory)
+    assert sum(prompts.count_tokens(p) for p in parts) <= 60
+    assert parts[-1] == format_turn(messages[-1])
+
+
+def test_reset_and_cleared_conversation():
+    memory = ConversationMemory(keep_turns=1, summarizer=Summarizer())
+    messages = conversation(4)
+    memory.history(messages)
+    settle(memory)
+    memory.history(messages)
+    assert memory.summary
+
+    memory.reset()
+    assert (memory.summary, memory.summarized, memory._pending) == ('', 0, None)
+
+    memory.history(messages)
+    settle(memory)
+    memory.history(messages)
+    assert memory.summarized
+    # A shorter message list means the chat was cleared
+    assert memory.history(conversation(1)) == [format_turn(m) for m in conversation(1)]
+    assert memory.summary == ''
@@ -0,0 +1,112 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+import ohlcv_store
+from ohlcv_store import OHLCVStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    if ohlcv_store.pyarrow is None:
+        # No parquet engine here; the store only needs a round trip
+        monkeypatch.setattr(pd.DataFrame, 'to_parquet', lambda self, path: self.to_pickle(path))
+        monkeypatch.setattr(pd, 'read_parquet', pd.read_pickle)
+    store = OHLCVStore(cache_dir=str(tmp_path), refresh_seconds=900)
+    store.enabled = True
+    return store
+
+
+class Upstream:
+    """Daily bars for the last `days` calendar days, recording each request"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, days):
+        with self._lock:
+            self.calls.append(days)
+        time.sleep(self.delay)
+        end = pd.Timestamp(datetime.now()).normalize()
+        index = pd.bdate_range(end - pd.Timedelta(days=days), end, name='Date')
+        close = 100 + np.arange(len(index), dtype=float)
+        return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                             'Volume': 1000.0}, index=index)
+
+
+def window_start(days):
+    return pd.Timestamp(datetime.now() - timedelta(days=days)).normalize()
+
+
+def test_first_get_caches_the_window(store):
+    fetch = Upstream()
+    df = store.get('aapl', 30, fetch)
+    assert fetch.calls == [30]
+    assert df.index[0] >= window_start(30)
+    assert store.meta('AAPL')['requested_from'] == window_start(30).strftime('%Y-%m-%d')
+    assert len(store.load('AAPL')) == len(df)
+
+
+def test_fresh_cache_is_served_without_fetching(store):
+    fetch = Upstream()
+    store.get('AAPL', 30, fetch)
+    df = store.get('AAPL', 20, fetch)
+    assert fetch.calls == [30]
+    assert df.index[0] >= window_start(20)
+
+
+def test_longer_window_backfills_the_gap(store):
+    fetch = Upstream()
+    store.get('AAPL', 30, fetch)
+    df = store.get('AAPL', 120, fetch)
+    assert fetch.calls == [30, 120]
+    assert df.index[0] == pd.bdate_range(window_start(120), periods=1)[0]
+    assert store.meta('AAPL')['requested_from'] == window_start(120).strftime('%Y-%m-%d')
+    # Served from disk afterwards
+    store.get('AAPL', 120, fetch)
+    assert fetch.calls == [30, 120]
+
+
+def test_stale_cache_fetches_only_the_tail(store):
+    fetch = Upstream()
+    store.get('AAPL', 120, fetch)
+    store._index['AAPL']['fetched_at'] = time.time() - 2 * store.refresh_seconds
+    last_date = datetime.strptime(store.meta('AAPL')['last_date'], '%Y-%m-%d')
+    df = store.get('AAPL', 120, fetch)
+    assert fetch.calls == [120, max((datetime.now() - last_date).days + 1, 1)]
+    assert df.index[0] >= window_start(120)
+    assert store.meta('AAPL')['requested_from'] == window_start(120).strftime('%Y-%m-%d')
+
+
+def test_concurrent_gets_keep_every_bar(store):
+    fetch = Upstream(delay=0.05)
+    results = {}
+
+    def get(days):
+        results[days] = store.get('AAPL', days, fetch)
+
+    threads = [threading.Thread(target=get, args=(days,)) for days in (30, 365, 90)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    on_disk = store.load('AAPL')
+    assert len(on_disk) == len(fetch(365))
+    assert store.meta('AAPL')['requested_from'] == window_start(365).strftime('%Y-%m-%d')
+    for days, df in results.items():
+        assert df.index[0] >= window_start(days)
+        assert df.index[-1] == on_disk.index[-1]
+
+
+def test_disabled_store_passes_through(store):
+    store.enabled = False
+    fetch = Upstream()
+    df = store.get('AAPL', 10, fetch)
+    assert fetch.calls == [10]
+    assert store.meta('AAPL') is None
+    assert not df.empty
@@ -0,0 +1,76 @@
+import pytest
+import prompts
+
+
+@pytest.fixture(autouse=True)
+def small_budget(monkeypatch):
+    # Deterministic counts and a budget small enough to force trimming
+    monkeypatch.setattr(prompts, '_counter', prompts.estimate_tokens)
+    monkeypatch.setattr(prompts, 'MAX_INPUT_TOKENS', 400)
+    monkeypatch.setattr(prompts, 'TOKEN_MARGIN', 0.0)
+    prompts.token_cache.clear()
+    yield
+    prompts.token_cache.clear()
+
+
+TEMPLATE = """
+    Context:
+    {documents}
+
+    Conversation:
+    {history}
+
+    Question: {question}
+"""
+
+
+def words(prefix, n):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+def test_small_inputs_are_kept_whole():
+    prompt = prompts.build_prompt(TEMPLATE, documents=['doc one', 'doc two'], history=['old', 'new'], question='q?')
+    assert prompt == "Context:\ndoc one\n\ndoc two\n\nConversation:\nold\n\nnew\n\nQuestion: q?"
+
+
+def test_documents_are_kept_from_the_front():
+    documents = [words('first', 100), words('second', 300), words('third', 10)]
+    prompt = prompts.build_prompt(TEMPLATE, documents=documents, question='q?')
+    assert prompts.count_tokens(prompt) <= prompts.input_budget()
+    assert documents[0] in prompt
+    assert 'second0' in prompt and prompts.TRUNCATION_MARK in prompt
+    assert 'second299' not in prompt
+    assert 'third0' not in prompt
+
+
+def test_history_is_kept_from_the_newest_end():
+    history = [words('old', 300), words('mid', 50), words('new', 50)]
+    prompt = prompts.build_prompt(TEMPLATE, documents=[words('doc', 50)], history=history, question='q?')
+    assert prompts.count_tokens(prompt) <= prompts.input_budget()
+    assert 'doc49' in prompt and history[1] in prompt and history[2] in prompt
+    assert 'old299' not in prompt
+    assert prompt.index('mid0') < prompt.index('new0')
+
+
+def test_trimming_is_deterministic():
+    kwargs = dict(documents=[words('d', 400)], history=[words('h', 400)], question='q?')
+    assert prompts.build_prompt(TEMPLATE, **kwargs) == prompts.build_prompt(TEMPLATE, **kwargs)
+
+
+def test_fixed_part_over_budget_raises():
+    with pytest.raises(prompts.PromptTooLongError) as error:
+        prompts.build_prompt(TEMPLATE, question=words('q', 500))
+    assert error.value.budget == prompts.input_budget()
+    assert error.value.tokens > error.value.budget
+
+
+def test_check():
+    assert prompts.check('short prompt') == prompts.count_tokens('short prompt')
+    with pytest.raises(prompts.PromptTooLongError):
+        prompts.check(words('w', 500))
+
+
+def test_budget_defaults_to_the_context_window(monkeypatch):
+    monkeypatch.setattr(prompts, 'MAX_INPUT_TOKENS', 0)
+    context, _ = prompts.limits()
+    assert prompts.input_budget() == context - prompts.output_tokens()
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+import pytest
+from singleflight import SingleFlight
+
+
+def run_threads(n, target):
+    results = [None] * n
+    errors = [None] * n
+
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'value'
+
+    results, errors = run_threads(10, lambda: flight.do('key', slow))
+    assert results == ['value'] * 10 and errors == [None] * 10
+    assert len(calls) == 1
+    assert flight.stats() == {'executions': 1, 'coalesced': 9, 'in_flight': 0}
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError('upstream down')
+
+    results, errors = run_threads(5, lambda: flight.do('key', fail))
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert flight.stats()['executions'] == 1
+
+
+def test_nothing_is_cached_after_completion():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    assert flight.do('other', lambda: 3) == 3
+    assert flight.stats()['executions'] == 3
+
+
+def test_async_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'value'
+
+    async def main():
+        return await asyncio.gather(*(flight.ado('key', slow) for _ in range(5)))
+
+    assert asyncio.run(main()) == ['value'] * 5
+    assert len(calls) == 1
+    assert flight.stats()['coalesced'] == 4
+
+
+def test_async_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('bad')
+
+    async def main():
+        return await asyncio.gather(*(flight.ado('key', fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(main()))
+    with pytest.raises(ValueError):
+        asyncio.run(flight.ado('key', fail))
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import timeframes
+
+
+def minute_bars():
+    """Two sessions of 1-minute bars with a missing minute and an overnight gap"""
+    index = pd.date_range('2024-03-04 14:30', periods=90, freq='min').append(
+        pd.date_range('2024-03-05 14:30', periods=45, freq='min'))
+    index = index.delete(7)
+    rng = np.random.default_rng(1)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(index)))
+    return pd.DataFrame({'Open': close + rng.normal(0, 0.05, len(index)), 'High': close + 0.2,
+                         'Low': close - 0.2, 'Close': close,
+                         'Volume': rng.integers(100, 1000, len(index)).astype(float)}, index=index)
+
+
+def test_resample_matches_pandas():
+    df = minute_bars()
+    for timeframe in ('5m', '15m', '1h'):
+        expected = df.resample(f"{timeframes.TIMEFRAMES[timeframe]}min").agg(
+            {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}).dropna()
+        actual = timeframes.resample(df, timeframe)
+        assert list(actual.index) == list(expected.index), timeframe
+        np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), err_msg=timeframe)
+
+
+def test_empty_buckets_produce_no_bars():
+    hourly = timeframes.resample(minute_bars(), '1h')
+    assert list(hourly.index) == [pd.Timestamp('2024-03-04 14:00'), pd.Timestamp('2024-03-04 15:00'),
+                                  pd.Timestamp('2024-03-05 14:00'), pd.Timestamp('2024-03-05 15:00')]
+
+
+def test_resample_without_volume():
+    df = minute_bars().drop(columns='Volume')
+    assert list(timeframes.resample(df, '5m').columns) == ['Open', 'High', 'Low', 'Close']
+
+
+def test_base_timeframe_and_empty_frames_pass_through():
+    df = minute_bars()
+    assert timeframes.resample(df, '1m') is df
+    assert timeframes.resample(None, '5m') is None
+    assert timeframes.resample(df.iloc[:0], '5m').empty
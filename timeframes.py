@@ -0,0 +1,50 @@
+"""
+Bar timeframes and vectorized OHLCV resampling.
+
+Intraday charts are built from one cached series of 1-minute bars. Coarser
+timeframes are derived locally: each bar is mapped to its bucket start, and the
+bucket's open/high/low/close/volume are reduced with numpy ufunc.reduceat over
+the contiguous runs of that bucket. Empty buckets (outside trading hours) do
+not produce bars.
+"""
+import numpy as np
+import pandas as pd
+
+# Timeframe -> bucket length in minutes; '1d' bars come from the daily store
+TIMEFRAMES = {'1m': 1, '5m': 5, '15m': 15, '1h': 60, '1d': 1440}
+INTRADAY = ('1m', '5m', '15m', '1h')
+BASE_TIMEFRAME = '1m'
+
+# Longest lookback offered per intraday timeframe; keeps the 1m base series to tens of thousands of bars
+MAX_DAYS = {'1m': 5, '5m': 30, '15m': 60, '1h': 180}
+
+_MINUTE_NS = 60 * 1_000_000_000
+
+
+def is_intraday(timeframe):
+    return timeframe in INTRADAY
+
+
+def resample(df, timeframe):
+    """Aggregate finer OHLCV bars (sorted DatetimeIndex) into `timeframe` bars labelled by bucket start"""
+    minutes = TIMEFRAMES[timeframe]
+    if df is None or df.empty or minutes == 1:
+        return df
+    # Work in int64 nanoseconds whatever the index resolution
+    stamps = df.index.values.astype('datetime64[ns]').view('i8')
+    step = minutes * _MINUTE_NS
+    buckets = stamps - stamps % step
+    # Start offset of each run of bars that share a bucket
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(stamps)] - 1
+
+    out = {
+        'Open': df['Open'].to_numpy()[starts],
+        'High': np.maximum.reduceat(df['High'].to_numpy(), starts),
+        'Low': np.minimum.reduceat(df['Low'].to_numpy(), starts),
+        'Close': df['Close'].to_numpy()[ends],
+    }
+    if 'Volume' in df.columns:
+        out['Volume'] = np.add.reduceat(df['Volume'].to_numpy(), starts)
+    index = pd.DatetimeIndex(buckets[starts].view('datetime64[ns]'), name=df.index.name)
+    return pd.DataFrame(out, index=index)